@@ -1,81 +1,365 @@
+"""
+Synthetic ICMR AMRSN Surveillance Data
+Draws one record per year x center x pathogen x antibiotic cell (isolates tested,
+isolates resistant, resistance %) from a seeded np.random.Generator. All cells of
+a block of centers are drawn at once as arrays, so there is no per-record loop.
+Output is written block by block (CSV appends or Parquet row groups), so memory
+stays bounded however many centers and years are requested.
+
+Runs within the named centers (the default 14 centers, 2022-2023) draw their
+parameters from np.random.RandomState(seed) in the original per-record order, so
+they reproduce the tracked data/raw/synthetic_icmr_amr_data.csv byte for byte.
+
+Isolate mode (--isolates) expands every center x pathogen cell into one row per
+isolate, like a WHONET export: specimen, clinical setting, and per drug an
+MIC (_NM) or disk zone (_ND<potency>) value with its S/I/R call. Drug results of
+one isolate are correlated through a shared latent normal (Gaussian copula:
+strong within a drug class, moderate across classes, shifted by setting), and
+each cell's resistant share follows the aggregate record's rate. Rows are
+produced by a generator in batches of about --chunk-rows isolates.
+
+Usage:
+    python src/00_generate_synthetic_data.py                                  # 14 centers, 2022-2023 (840 rows)
+    python src/00_generate_synthetic_data.py --centers 70000 --years 2010-2024 \\
+        --out data/raw/synthetic_load_test.parquet                            # 31.5M rows for load testing
+    python src/00_generate_synthetic_data.py --isolates --centers 500 --years 2020-2024 \\
+        --out data/raw/synthetic_isolates.parquet                             # ~5.5M isolates
+"""
 
-import pandas as pd
-import numpy as np
 import os
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from data_cache import temp_path
+
+OUT_PATH = 'data/raw/synthetic_icmr_amr_data.csv'
+SEED = 42
+YEARS = [2022, 2023]
+
+# Centers beyond this list are named "Synthetic Hospital <n>, <city>", cycling through its cities
+CENTERS = [
+    'AIIMS, New Delhi', 'CMC, Vellore', 'PGIMER, Chandigarh', 'JIPMER, Puducherry',
+    'Apollo Hospital, Chennai', 'Tata Memorial Hospital, Mumbai', 'Kaling Institute, Bhubaneswar',
+    'Amrita Institute, Kochi', 'Sams Hospital, Hyderabad', 'King George Medical Univ, Lucknow',
+    'IPGMER, Kolkata', 'SMS Hospital, Jaipur', 'RIMS, Ranchi', 'GMCH, Guwahati'
+]
+
+# Pathogen -> baseline resistance (MRSA ~40%; carbapenem resistance high in Kleb/Acineto)
+PATHOGENS = {
+    'Escherichia coli': 0.2,
+    'Klebsiella pneumoniae': 0.5,
+    'Staphylococcus aureus': 0.4,
+    'Acinetobacter baumannii': 0.5,
+    'Pseudomonas aeruginosa': 0.2,
+}
+GRAM_POSITIVE = ['Staphylococcus aureus']
+
+ANTIBIOTICS_GNEG = ['Imipenem', 'Meropenem', 'Ceftriaxone', 'Ciprofloxacin', 'Amikacin', 'Colistin']
+ANTIBIOTICS_GPOS = ['Penicillin', 'Ciprofloxacin', 'Erythromycin', 'Clindamycin', 'Vancomycin', 'Linezolid']
+
+# Drug modifiers on the resistance rate: low colistin, high cephalosporin resistance
+DRUG_MODIFIERS = {'Colistin': 0.1, 'Ceftriaxone': 1.5}
+
+# North India centers often show higher resistance
+NORTH_CITIES = ['Delhi', 'Lucknow', 'Chandigarh', 'Jaipur']
+NORTH_MODIFIER = 1.2
+OTHER_MODIFIER = 0.9
+
+# Centers drawn (and written) per block
+CHUNK_CENTERS = 20_000
+
+# Isolate mode: rows per written batch, and the default output
+CHUNK_ROWS = 500_000
+ISOLATE_OUT_PATH = 'data/raw/synthetic_isolates.parquet'
+
+SPECIMENS = {'Blood': 0.25, 'Urine': 0.30, 'Pus/Wound': 0.20, 'Respiratory': 0.20, 'Sterile fluid': 0.05}
+SETTINGS = {'OPD': 0.30, 'Ward': 0.45, 'ICU': 0.25}
+
+# Latent shift per setting (negative = more resistant across the whole panel)
+SETTING_SHIFT = {'OPD': 0.25, 'Ward': 0.0, 'ICU': -0.35}
+
+# Latent correlation between two drugs of one isolate: same class / different class
+DRUG_CLASSES = {'Imipenem': 'Carbapenem', 'Meropenem': 'Carbapenem', 'Erythromycin': 'MLS', 'Clindamycin': 'MLS'}
+RHO_CLASS = 0.8
+RHO_OTHER = 0.3
+
+# Share of isolates called I (drugs whose breakpoints leave an I range)
+I_SHARE = 0.05
+
+# WHONET drug code, test (NM = MIC in mg/L, ND<n> = disk zone in mm) and breakpoints (S, R)
+# per Gram group: MIC S <= s, R >= r; zone S >= s, R <= r. MIC breakpoints are exact
+# MIC_LADDER values (CLSI's printed 0.12 is the 0.125 dilution)
+AST_TESTS = {
+    'Imipenem': ('IPM', 'NM'), 'Meropenem': ('MEM', 'NM'), 'Ceftriaxone': ('CRO', 'NM'),
+    'Ciprofloxacin': ('CIP', 'ND5'), 'Amikacin': ('AMK', 'ND30'), 'Colistin': ('COL', 'NM'),
+    'Penicillin': ('PEN', 'NM'), 'Erythromycin': ('ERY', 'ND15'), 'Clindamycin': ('CLI', 'ND2'),
+    'Vancomycin': ('VAN', 'NM'), 'Linezolid': ('LNZ', 'NM'),
+}
+BREAKPOINTS = {
+    'negative': {'Imipenem': (1, 4), 'Meropenem': (1, 4), 'Ceftriaxone': (1, 4), 'Ciprofloxacin': (26, 21),
+                 'Amikacin': (17, 14), 'Colistin': (2, 4)},
+    'positive': {'Penicillin': (0.125, 0.25), 'Ciprofloxacin': (21, 15), 'Erythromycin': (23, 13),
+                 'Clindamycin': (21, 14), 'Vancomycin': (2, 16), 'Linezolid': (4, 8)},
+}
+
+# Reportable values: MIC doubling dilutions, disk zones (6 mm = no zone)
+MIC_LADDER = 2.0 ** np.arange(-5, 9)
+ZONE_RANGE = np.arange(6, 41)
+
+COLUMNS = ['Year', 'Center_Name', 'Pathogen', 'Antibiotic', 'Total_Isolates', 'Resistant_Isolates',
+           'Resistance_Percentage']
+
+
+def center_names(n_centers):
+    """The first n_centers center names (real centers first, then synthetic ones)."""
+    extra = range(len(CENTERS), n_centers)
+    cities = [c.split(', ')[-1] for c in CENTERS]
+    return CENTERS[:n_centers] + [f"Synthetic Hospital {i + 1}, {cities[i % len(cities)]}" for i in extra]
+
+
+def _panel():
+    """(pathogen, antibiotic) pairs in record order, with base resistance and drug modifier per pair."""
+    pairs = [(p, abx) for p in PATHOGENS for abx in (ANTIBIOTICS_GPOS if p in GRAM_POSITIVE else ANTIBIOTICS_GNEG)]
+    base = np.array([PATHOGENS[p] for p, _ in pairs])
+    modifier = np.array([DRUG_MODIFIERS.get(abx, 1.0) for _, abx in pairs])
+    pathogen_idx = np.array([list(PATHOGENS).index(p) for p, _ in pairs])
+    return pairs, base, modifier, pathogen_idx
+
+
+def _draws(rng, n_c, pathogen_idx):
+    """
+    Hospital size per center, isolate share per center x pathogen and resistance noise
+    per center x (pathogen, antibiotic). A legacy RandomState is drawn center by center,
+    pathogen by pathogen, in the order of the original per-record loop.
+    """
+    n_p, n_pairs = len(PATHOGENS), len(pathogen_idx)
+    if not isinstance(rng, np.random.RandomState):
+        return (rng.integers(500, 3000, size=n_c), rng.uniform(0.1, 0.4, size=(n_c, n_p)),
+                rng.normal(1, 0.1, size=(n_c, n_pairs)))
+    n_base, share, noise = np.empty(n_c, dtype=np.int64), np.empty((n_c, n_p)), np.empty((n_c, n_pairs))
+    for c in range(n_c):
+        n_base[c] = rng.randint(500, 3000)
+        for p in range(n_p):
+            share[c, p] = rng.uniform(0.1, 0.4)
+            noise[c, pathogen_idx == p] = rng.normal(1, 0.1, size=(pathogen_idx == p).sum())
+    return n_base, share, noise
+
+
+def generate_block(rng, year, centers):
+    """All records of one year for a block of centers, drawn as (center x pathogen x antibiotic) arrays."""
+    pairs, base, modifier, pathogen_idx = _panel()
+    n_c = len(centers)
+
+    # Hospital size per center, share of isolates per pathogen
+    n_isolates_base, share, noise = _draws(rng, n_c, pathogen_idx)
+    n_isolates = (n_isolates_base[:, None] * share).astype(np.int64)[:, pathogen_idx]
+
+    region_mod = np.where(pd.Series(centers).str.contains('|'.join(NORTH_CITIES)).to_numpy(),
+                          NORTH_MODIFIER, OTHER_MODIFIER)
+    res_rate = np.clip(base[None, :] * region_mod[:, None] * noise, 0.01, 0.95)
+    res_rate = np.minimum(0.98, res_rate * modifier[None, :])
+
+    center_codes = np.repeat(np.arange(n_c), len(pairs))
+    pair_codes = np.tile(np.arange(len(pairs)), n_c)
+    return pd.DataFrame({
+        'Year': np.full(n_c * len(pairs), year, dtype=np.int64),
+        'Center_Name': pd.Categorical.from_codes(center_codes, categories=centers),
+        'Pathogen': pd.Categorical.from_codes(pathogen_idx[pair_codes], categories=list(PATHOGENS)),
+        'Antibiotic': np.array([abx for _, abx in pairs], dtype=object)[pair_codes],
+        'Total_Isolates': n_isolates.ravel(),
+        'Resistant_Isolates': (n_isolates * res_rate).astype(np.int64).ravel(),
+        'Resistance_Percentage': np.round(res_rate * 100, 1).ravel(),
+    }, columns=COLUMNS)
+
+
+def iter_blocks(n_centers=len(CENTERS), years=YEARS, seed=SEED, chunk_centers=CHUNK_CENTERS):
+    """
+    Yield record blocks in year, center order. Each block has its own seed stream, except
+    within the named centers, where one legacy RandomState(seed) runs through all years.
+    """
+    names = center_names(n_centers)
+    legacy = np.random.RandomState(seed) if n_centers <= len(CENTERS) else None
+    for i, year in enumerate(years):
+        for j, start in enumerate(range(0, n_centers, chunk_centers)):
+            rng = legacy or np.random.default_rng([seed, i, j])
+            yield generate_block(rng, year, names[start:start + chunk_centers])
+
+
+def _latent_factor(antibiotics):
+    """Cholesky factor of the latent correlation between a panel's drugs."""
+    classes = [DRUG_CLASSES.get(abx, abx) for abx in antibiotics]
+    corr = np.array([[1.0 if i == j else RHO_CLASS if a == b else RHO_OTHER
+                      for j, b in enumerate(classes)] for i, a in enumerate(classes)])
+    return np.linalg.cholesky(corr)
+
+
+def _levels(method, s_bp, r_bp):
+    """Reportable values of a test ordered from most to least resistant, and their S/I/R calls."""
+    levels = MIC_LADDER[::-1] if method == 'NM' else ZONE_RANGE.astype(float)
+    return levels, interpret_ast(levels, method, s_bp, r_bp)
+
+
+def interpret_ast(values, method, s_bp, r_bp):
+    """S/I/R calls for MIC (method 'NM') or disk zone ('ND...') values; NaN values give NA."""
+    values = np.asarray(values, dtype=float)
+    if method == 'NM':
+        calls = np.where(values >= r_bp, 'R', np.where(values <= s_bp, 'S', 'I'))
+    else:
+        calls = np.where(values <= r_bp, 'R', np.where(values >= s_bp, 'S', 'I'))
+    return pd.array(np.where(np.isnan(values), None, calls), dtype='string')
+
+
+def ast_values(u, rate, method, s_bp, r_bp):
+    """
+    Test values from latent uniforms u: u below the resistance rate gives an R value,
+    the next I_SHARE an I value (when the breakpoints leave one), the rest S. Within a
+    band, lower u gives a more resistant value, so correlated u give correlated values.
+    """
+    levels, calls = _levels(method, s_bp, r_bp)
+    bands = {c: levels[np.asarray(calls == c)] for c in 'RIS'}
+    i_share = np.minimum(I_SHARE if len(bands['I']) else 0.0, 1 - rate)
+    edges = [np.zeros_like(rate), rate, rate + i_share, np.ones_like(rate)]
+    values = np.empty(len(u))
+    for k, c in enumerate('RIS'):
+        in_band = (u >= edges[k]) & (u < edges[k + 1]) if c != 'S' else u >= edges[k]
+        width = (edges[k + 1] - edges[k])[in_band]
+        frac = np.divide(u[in_band] - edges[k][in_band], width, out=np.zeros(in_band.sum()), where=width > 0)
+        values[in_band] = bands[c][np.minimum((frac * len(bands[c])).astype(int), len(bands[c]) - 1)]
+    return values
+
+
+def isolate_rows(rng, cells):
+    """
+    One row per isolate for a batch of aggregate records (generate_block output, six
+    antibiotic rows per center x pathogen). Each cell yields Total_Isolates isolates.
+    """
+    n_drugs = len(ANTIBIOTICS_GNEG)
+    first = cells.iloc[::n_drugs]
+    counts = first['Total_Isolates'].to_numpy()
+    rates = cells['Resistance_Percentage'].to_numpy().reshape(-1, n_drugs) / 100
+    cell = np.repeat(np.arange(len(first)), counts)
+    n = len(cell)
+    positive = np.isin(first['Pathogen'].astype(str).to_numpy(), GRAM_POSITIVE)[cell]
+
+    setting = rng.choice(len(SETTINGS), size=n, p=list(SETTINGS.values()))
+    specimen = rng.choice(len(SPECIMENS), size=n, p=list(SPECIMENS.values()))
+    z = rng.standard_normal((n, n_drugs))
+    z = np.where(positive[:, None], z @ _latent_factor(ANTIBIOTICS_GPOS).T, z @ _latent_factor(ANTIBIOTICS_GNEG).T)
+    u = norm.cdf(z + np.array(list(SETTING_SHIFT.values()))[setting][:, None])
+
+    rows = {
+        'Year': first['Year'].to_numpy()[cell],
+        'Center_Name': first['Center_Name'].to_numpy()[cell],
+        'Pathogen': first['Pathogen'].to_numpy()[cell],
+        'Specimen': pd.Categorical.from_codes(specimen, categories=list(SPECIMENS)),
+        'Setting': pd.Categorical.from_codes(setting, categories=list(SETTINGS)),
+    }
+    # Untested drugs (the other Gram panel) stay empty
+    values = {abx: np.full(n, np.nan) for abx in AST_TESTS}
+    for group, panel, mask in (('negative', ANTIBIOTICS_GNEG, ~positive), ('positive', ANTIBIOTICS_GPOS, positive)):
+        for k, abx in enumerate(panel):
+            values[abx][mask] = ast_values(u[mask, k], rates[cell[mask], k], AST_TESTS[abx][1], *BREAKPOINTS[group][abx])
+    for abx, (code, method) in AST_TESTS.items():
+        rows[f'{code}_{method}'] = values[abx]
+        calls = np.full(n, None, dtype=object)
+        for group, mask in (('negative', ~positive), ('positive', positive)):
+            if abx in BREAKPOINTS[group]:
+                calls[mask] = np.asarray(interpret_ast(values[abx][mask], method, *BREAKPOINTS[group][abx]), dtype=object)
+        rows[f'{code}_SIR'] = pd.array(calls, dtype='string')
+    return pd.DataFrame(rows)
+
+
+def iter_isolates(n_centers=len(CENTERS), years=YEARS, seed=SEED, chunk_centers=CHUNK_CENTERS,
+                  chunk_rows=CHUNK_ROWS):
+    """
+    Yield isolate-level frames of about chunk_rows rows (whole cells per batch), in
+    year, center order, with a running Isolate_ID. Cell parameters are the aggregate
+    records of iter_blocks, so both modes describe the same surveillance data.
+    """
+    n_drugs = len(ANTIBIOTICS_GNEG)
+    next_id = 1
+    for block in iter_blocks(n_centers, years, seed, chunk_centers):
+        rng = np.random.default_rng([seed, int(block['Year'].iloc[0]), next_id])
+        counts = block['Total_Isolates'].to_numpy()[::n_drugs]
+        batch = (np.cumsum(counts) - 1) // chunk_rows
+        for b in np.unique(batch):
+            cells = np.flatnonzero(batch == b)
+            rows = isolate_rows(rng, block.iloc[(cells[:, None] * n_drugs + np.arange(n_drugs)).ravel()])
+            rows.insert(0, 'Isolate_ID', np.arange(next_id, next_id + len(rows)))
+            next_id += len(rows)
+            yield rows
+
+
+def write_blocks(blocks, out_path):
+    """Write blocks to CSV (appended) or Parquet (one row group per block). Returns the row count."""
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp_path = temp_path(out_path)
+    n_rows = 0
+    writer = None
+    try:
+        for block in blocks:
+            if out_path.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                categorical = block.select_dtypes('category').columns
+                table = pa.Table.from_pandas(block.astype({c: str for c in categorical}), preserve_index=False)
+                writer = writer or pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                block.to_csv(tmp_path, mode='a' if n_rows else 'w', header=not n_rows, index=False)
+            n_rows += len(block)
+    finally:
+        if writer is not None:
+            writer.close()
+    if n_rows:
+        os.replace(tmp_path, out_path)
+    else:
+        # Nothing to write (no centers or years): leave any existing output alone
+        os.remove(tmp_path)
+    return n_rows
+
+
+def generate_synthetic_icmr_data(n_centers=len(CENTERS), years=YEARS, seed=SEED, out_path=OUT_PATH,
+                                 chunk_centers=CHUNK_CENTERS, isolates=False, chunk_rows=CHUNK_ROWS):
+    print(f"Generating Synthetic ICMR AMR Data{' (isolate level)' if isolates else ''}...")
+    if isolates:
+        blocks = iter_isolates(n_centers, years, seed, chunk_centers, chunk_rows)
+    else:
+        blocks = iter_blocks(n_centers, years, seed, chunk_centers)
+    n_rows = write_blocks(blocks, out_path)
+    if not n_rows:
+        print("No records to generate (no centers or years); nothing written.")
+        return
+    print(f"Generated {n_rows} {'isolates' if isolates else 'records'} at {out_path}")
 
-def generate_synthetic_icmr_data():
-    print("Generating Synthetic ICMR AMR Data...")
-    os.makedirs('data/raw', exist_ok=True)
-    
-    # Define realistic parameters based on ICMR AMRSN knowledge
-    centers = [
-        'AIIMS, New Delhi', 'CMC, Vellore', 'PGIMER, Chandigarh', 'JIPMER, Puducherry',
-        'Apollo Hospital, Chennai', 'Tata Memorial Hospital, Mumbai', 'Kaling Institute, Bhubaneswar',
-        'Amrita Institute, Kochi', 'Sams Hospital, Hyderabad', 'King George Medical Univ, Lucknow',
-        'IPGMER, Kolkata', 'SMS Hospital, Jaipur', 'RIMS, Ranchi', 'GMCH, Guwahati'
-    ]
-    
-    pathogens = ['Escherichia coli', 'Klebsiella pneumoniae', 'Staphylococcus aureus', 'Acinetobacter baumannii', 'Pseudomonas aeruginosa']
-    
-    antibiotics_gneg = ['Imipenem', 'Meropenem', 'Ceftriaxone', 'Ciprofloxacin', 'Amikacin', 'Colistin']
-    antibiotics_gpos = ['Penicillin', 'Ciprofloxacin', 'Erythromycin', 'Clindamycin', 'Vancomycin', 'Linezolid']
-    
-    records = []
-    
-    np.random.seed(42)
-    
-    for year in [2022, 2023]:
-        for center in centers:
-            # Simulate hospital size/type
-            n_isolates_base = np.random.randint(500, 3000)
-            
-            for pathogen in pathogens:
-                n_isolates = int(n_isolates_base * np.random.uniform(0.1, 0.4))
-                
-                # Assign antibiotics based on Gram type
-                if pathogen == 'Staphylococcus aureus':
-                    abx_list = antibiotics_gpos
-                    # MRSA logic: ~40% resistance to Cefoxitin/Penicillin proxies
-                    base_res = 0.4
-                else: 
-                    abx_list = antibiotics_gneg
-                    # Carbapenem resistance logic (high in Kleb/Acineto)
-                    if pathogen in ['Klebsiella pneumoniae', 'Acinetobacter baumannii']:
-                        base_res = 0.5
-                    else:
-                        base_res = 0.2
-                
-                for abx in abx_list:
-                    # Resistance rate with some spatial noise
-                    # North India (Delhi/Lucknow) often higher resistance
-                    region_mod = 1.2 if any(x in center for x in ['Delhi', 'Lucknow', 'Chandigarh', 'Jaipur']) else 0.9
-                    
-                    res_rate = min(0.95, max(0.01, base_res * region_mod * np.random.normal(1, 0.1)))
-                    # Specific drug modifiers
-                    if abx == 'Colistin': res_rate *= 0.1 # Low colistin resistance
-                    if abx == 'Ceftriaxone': res_rate *= 1.5 # High cephalosporin resistance
-                    res_rate = min(0.98, res_rate)
-                    
-                    res_count = int(n_isolates * res_rate)
-                    
-                    records.append({
-                        'Year': year,
-                        'Center_Name': center,
-                        'Pathogen': pathogen,
-                        'Antibiotic': abx,
-                        'Total_Isolates': n_isolates,
-                        'Resistant_Isolates': res_count,
-                        'Resistance_Percentage': round(res_rate * 100, 1)
-                    })
-                    
-    df = pd.DataFrame(records)
-    out_path = 'data/raw/synthetic_icmr_amr_data.csv'
-    df.to_csv(out_path, index=False)
-    print(f"Generated {len(df)} records at {out_path}")
-    
     # Preview
     print("\nTop 5 rows:")
-    print(df.head())
+    if out_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        print(pq.ParquetFile(out_path).read_row_group(0).to_pandas().head())
+    else:
+        print(pd.read_csv(out_path, nrows=5))
+
+
+def parse_years(text):
+    """'2022,2023' or '2010-2024' -> list of years."""
+    if '-' in text:
+        first, last = (int(y) for y in text.split('-'))
+        return list(range(first, last + 1))
+    return [int(y) for y in text.split(',')]
+
 
 if __name__ == "__main__":
-    generate_synthetic_icmr_data()
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--centers', type=int, default=len(CENTERS), help="number of centers")
+    parser.add_argument('--years', type=parse_years, default=YEARS, help="e.g. 2022,2023 or 2010-2024")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--out', help=f".csv or .parquet (default {OUT_PATH}, {ISOLATE_OUT_PATH} with --isolates)")
+    parser.add_argument('--chunk-centers', type=int, default=CHUNK_CENTERS, help="centers per written block")
+    parser.add_argument('--isolates', action='store_true', help="one row per isolate (WHONET-like)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="isolates per written batch")
+    args = parser.parse_args()
+    out_path = args.out or (ISOLATE_OUT_PATH if args.isolates else OUT_PATH)
+    generate_synthetic_icmr_data(args.centers, args.years, args.seed, out_path, args.chunk_centers,
+                                 args.isolates, args.chunk_rows)
@@ -1,13 +1,11 @@
 
-import pdfplumber
+from pdf_pages import page_text
 
 def dump_page_86():
     pdf_path = 'data/raw/ICMR reports/AMRSN_Annual_Report_2022.pdf'
     print("Dumping Page 86 (Index 85)...")
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[85]
-        text = page.extract_text()
-        print(text)
+    text = page_text(pdf_path, 85)
+    print(text)
 
 if __name__ == "__main__":
     dump_page_86()
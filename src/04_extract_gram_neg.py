@@ -1,35 +1,35 @@
 
-import pdfplumber
 import pandas as pd
+from pdf_pages import extract_pages
+from report_index import search_report
+from report_tables import RC_QUERY
 
 def extract_gram_neg_tables():
     pdf_path = 'data/raw/ICMR reports/AMRSN_Annual_Report_2022.pdf'
-    # Page 94 (Index 93) -> E. coli?
-    # Page 97 (Index 96) -> K. pneumo?
-    
-    target_pages = [93, 94, 96, 97]
+    # Pages that mention RC codes (found through the report index, not fixed page numbers)
+    target_pages = search_report(pdf_path, RC_QUERY)
     
     print("Extracting Gram Negative RC Data...")
     
-    with pdfplumber.open(pdf_path) as pdf:
-        for i in target_pages:
-            try:
-                page = pdf.pages[i]
-                text = page.extract_text()
-                print(f"\n--- PAGE {i+1} ---")
-                print(text[:300])
-                
-                tables = page.extract_tables()
-                if tables:
-                    for idx, table in enumerate(tables):
-                        df = pd.DataFrame(table)
-                        # Check if it has RC column
-                        first_col = df.iloc[:,0].astype(str).values
-                        if any("RC" in str(x) for x in first_col):
-                            print(f"Found RC Table on Page {i+1} Table {idx}")
-                            df.to_csv(f"outputs/table_p{i+1}_{idx}.csv", index=False, header=False)
-            except:
-                pass
+    pages = extract_pages(pdf_path, target_pages, tables=True)
+    for i in target_pages:
+        try:
+            page = pages[i]
+            text = page['text']
+            print(f"\n--- PAGE {i+1} ---")
+            print(text[:300])
+            
+            tables = page['tables']
+            if tables:
+                for idx, table in enumerate(tables):
+                    df = pd.DataFrame(table)
+                    # Check if it has RC column
+                    first_col = df.iloc[:,0].astype(str).values
+                    if any("RC" in str(x) for x in first_col):
+                        print(f"Found RC Table on Page {i+1} Table {idx}")
+                        df.to_csv(f"outputs/table_p{i+1}_{idx}.csv", index=False, header=False)
+        except:
+            pass
 
 if __name__ == "__main__":
     extract_gram_neg_tables()
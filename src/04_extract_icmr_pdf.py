@@ -1,7 +1,7 @@
 
 import os
-import pypdf
 import re
+from pdf_pages import extract_pages, page_count
 
 def extract_pdf_data():
     print("Scanning ICMR Reports for Center-wise AMR Data...")
@@ -22,14 +22,15 @@ def extract_pdf_data():
             f.write(f"\n{'='*50}\nFILE: {fname}\n{'='*50}\n")
             
             try:
-                reader = pypdf.PdfReader(path)
+                num_pages = page_count(path)
                 # Read first 10 pages for metadata/intro
                 # And maybe check a middle page for tables?
-                pages_to_check = list(range(10)) + [len(reader.pages)//2]
+                pages_to_check = list(range(10)) + [num_pages//2]
+                pages = extract_pages(path, pages_to_check, engine='pypdf')
                 
                 for i in pages_to_check:
-                    if i < len(reader.pages):
-                        text = reader.pages[i].extract_text()
+                    if i < num_pages:
+                        text = pages[i]['text']
                         # Look for potential table keywords
                         if "Table" in text or "Resistance" in text or "Escherichia" in text:
                              f.write(f"\n--- PAGE {i+1} ---\n")
@@ -1,23 +1,23 @@
 
-import pdfplumber
+from pdf_pages import extract_pages
+from report_index import search_report
 
 def extract_rc_key():
     pdf_path = 'data/raw/ICMR reports/AMRSN_Annual_Report_2022.pdf'
-    # Page 221 in Scan results (1-indexed) = Index 220
-    # Also Page 86 = Index 85
-    
-    target_pages = [85, 220, 221]
+    # RC key pages: Annexure I (list of participating centers) and the
+    # "individual Regional Centers" section, found by content rather than page number
+    query = '(annexure AND participating NEAR/2 cent*) OR (individual NEAR/2 regional NEAR/1 cent*)'
+    target_pages = search_report(pdf_path, query)
     
     print("Extracting potential RC Keys...")
-    with pdfplumber.open(pdf_path) as pdf:
-        for i in target_pages:
-            try:
-                page = pdf.pages[i]
-                text = page.extract_text()
-                print(f"\n--- PAGE {i+1} ---")
-                print(text)
-            except:
-                print(f"Error on Page {i+1}")
+    pages = extract_pages(pdf_path, target_pages)
+    for i in target_pages:
+        try:
+            text = pages[i]['text']
+            print(f"\n--- PAGE {i+1} ---")
+            print(text)
+        except:
+            print(f"Error on Page {i+1}")
 
 if __name__ == "__main__":
     extract_rc_key()
@@ -1,6 +1,7 @@
 
 import os
-import pypdf
+from pdf_pages import extract_pages, page_count
+from report_index import search_report
 
 def scan_pdf_for_keywords():
     print("Full Scan of ICMR 2022 Report for Granular Data...")
@@ -14,34 +15,26 @@ def scan_pdf_for_keywords():
         
     print(f"Scanning: {pdf_path}")
     
-    keywords = ["Annexure", "Appendix", "Center wise", "Centre wise", "Site wise", "Table 2", "Table 3", "AIIMS", "CMC", "PGI"]
+    # Pages are found through the report's inverted index (built once, then cached)
+    queries = {
+        "Annexure": 'annexure',
+        "Table+Center": 'table AND (center* OR site* OR hospital*)',
+    }
     
     try:
-        reader = pypdf.PdfReader(pdf_path)
-        num_pages = len(reader.pages)
+        num_pages = page_count(pdf_path)
         print(f"Total Pages: {num_pages}")
         
-        matches = []
+        found_on = {}
+        for label, query in queries.items():
+            for page in search_report(pdf_path, query):
+                found_on.setdefault(page, []).append(label)
         
-        for i in range(num_pages):
-            try:
-                text = reader.pages[i].extract_text()
-                # Check for "Table" AND ("Center" or "Site")
-                # Or just "Annexure"
-                
-                found = []
-                if "Annexure" in text:
-                    found.append("Annexure")
-                
-                if "Table" in text and ("Center" in text or "Site" in text or "Hospital" in text):
-                    found.append("Table+Center")
-                    
-                if found:
-                    snippet = text[:200].replace('\n', ' ')
-                    matches.append(f"Page {i+1}: Found {found} - '{snippet}...'")
-                    
-            except:
-                pass
+        pages = extract_pages(pdf_path, sorted(found_on), engine='pypdf')
+        matches = []
+        for i in sorted(found_on):
+            snippet = pages[i]['text'][:200].replace('\n', ' ')
+            matches.append(f"Page {i+1}: Found {found_on[i]} - '{snippet}...'")
                 
         # Write matches to file
         with open('outputs/pdf_scan_results.txt', 'w') as f:
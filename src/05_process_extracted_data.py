@@ -1,177 +1,124 @@
-
 import pandas as pd
 import os
-import re
+import argparse
+from gazetteer import rc_places
+from gene_matcher import find_genes
+from report_tables import STORE_PATH, build_table_store, load_table_store
+
+# Report whose tables are normalized (its year as parsed from the file name by report_tables)
+REPORT_YEAR = 2022
+
+# Report tables to normalize, found in the RC table store by content. A table belongs to a
+# spec when its caption (or, on a continuation page without one, the caption before it) matches
+# 'caption' and its column labels match: 'columns' keeps (and renames) the columns whose label
+# starts with a key; None keeps every column under its own label, for tables with at least
+# MIN_GENE_COLUMNS resistance-gene columns. 'percent' is the pattern holding the percentage.
+TABLE_SPECS = [
+    # MRSA (Phenotypic); cells read "343 / 589 (58.2)"
+    {'pathogen': 'S. aureus',
+     'caption': r'S(?:taphylococcus|\.)\s*aureus|MRSA',
+     'columns': {'Cefoxitin': 'MRSA (Phenotypic)'},
+     'percent': r'\((\d+\.?\d*)\)'},
+    # Genotypic; cells read "55%"
+    {'pathogen': 'E. coli',
+     'caption': r'E(?:scherichia|\.)\s*coli',
+     'columns': None,
+     'percent': r'(\d+\.?\d*)'},
+    {'pathogen': 'K. pneumoniae',
+     'caption': r'K(?:lebsiella|\.)\s*pneumoniae',
+     'columns': None,
+     'percent': r'(\d+\.?\d*)'},
+]
+
+MIN_GENE_COLUMNS = 3
+
+TABLE_KEY = ['Report', 'Page', 'Table_Index']
+
+OUT_PATH = 'data/processed/amr_data_real.csv'
+
+
+def table_catalog(store):
+    """One row per stored table: its caption (continuations inherit the previous one) and column labels."""
+    store = store.astype({'Report': 'object', 'Caption': 'object', 'Column_Label': 'object'})
+    tables = store.groupby(TABLE_KEY, sort=True).agg(
+        Caption=('Caption', 'first'),
+        Labels=('Column_Label', lambda s: set(s.dropna())),
+    ).reset_index()
+    tables['Caption'] = tables.groupby('Report')['Caption'].ffill().fillna('')
+    tables['Gene_Columns'] = tables['Labels'].map(lambda labels: sum(bool(find_genes(label)) for label in labels))
+    return tables
+
+
+def select_tables(tables, spec):
+    """Keys of the catalogued tables a spec applies to."""
+    by_caption = tables['Caption'].str.contains(spec['caption'], case=False, regex=True)
+    if spec['columns'] is None:
+        by_content = tables['Gene_Columns'] >= MIN_GENE_COLUMNS
+    else:
+        prefixes = tuple(spec['columns'])
+        by_content = tables['Labels'].map(lambda labels: any(label.startswith(prefixes) for label in labels))
+    return tables.loc[by_caption & by_content, TABLE_KEY]
 
-def process_extracted_data():
+
+def normalize_rc_table(long, spec):
+    """Store rows of one table to (RC_Code, Pathogen, Antibiotic_Gene, Resistance_Percentage) rows."""
+    long = long.astype({'RC_Code': 'object', 'Column_Label': 'object', 'Raw_Value': 'string'})
+    long = long.sort_values(['Row_Index', 'Column_Index'], kind='stable')
+    if spec['columns'] is None:
+        long['Antibiotic_Gene'] = long['Column_Label']
+    else:
+        long['Antibiotic_Gene'] = pd.NA
+        for prefix, name in spec['columns'].items():
+            long.loc[long['Column_Label'].str.startswith(prefix, na=False), 'Antibiotic_Gene'] = name
+    long = long.dropna(subset=['Antibiotic_Gene'])
+
+    pct = long['Raw_Value'].str.extract(spec['percent'], expand=False).astype('float64')
+    # Normalize to 100 max (OCR errors sometimes give >100)
+    long['Resistance_Percentage'] = pct.clip(upper=100.0)
+    long['Pathogen'] = spec['pathogen']
+    return long.dropna(subset=['Resistance_Percentage'])[
+        ['RC_Code', 'Pathogen', 'Antibiotic_Gene', 'Resistance_Percentage']]
+
+
+def process_extracted_data(report_year=REPORT_YEAR, store_path=STORE_PATH, out_path=OUT_PATH):
     print("Processing Extracted PDF Data...")
-    
-    # 1. Define RC Mapping (Assumed from Annexure I Order)
-    rc_map = {
-        'RC1': 'AIIMS New Delhi',
-        'RC2': 'CMC Vellore',
-        'RC3': 'JIPMER Puducherry',
-        'RC4': 'PGIMER Chandigarh',
-        'RC5': 'AFMC Pune',
-        'RC6': 'AIIMS Bhopal',
-        'RC7': 'AIIMS Jodhpur',
-        'RC8': 'Apollo Chennai',
-        'RC9': 'Assam Medical College',
-        'RC10': 'IPGMER Kolkata',
-        'RC11': 'JPN Apex Trauma Center',
-        'RC12': 'KGMU Lucknow',
-        'RC13': 'KMC Manipal',
-        'RC14': 'LTMMC Mumbai',
-        'RC15': 'MGIMS Wardha',
-        'RC16': 'NIMS Hyderabad',
-        'RC17': 'PD Hinduja Mumbai',
-        'RC18': 'RIMS Imphal',
-        'RC19': 'Sir Ganga Ram Delhi',
-        'RC20': 'Tata Medical Center',
-        'RC21': 'SKIMS Srinagar'
-    }
-    
-    # 2. Define Geocodes (Approximate)
-    geocodes = {
-        'AIIMS New Delhi': (28.5672, 77.2100),
-        'CMC Vellore': (12.9248, 79.1352),
-        'JIPMER Puducherry': (11.9546, 79.8000),
-        'PGIMER Chandigarh': (30.7628, 76.7774),
-        'AFMC Pune': (18.5020, 73.8800),
-        'AIIMS Bhopal': (23.2599, 77.4126),
-        'AIIMS Jodhpur': (26.2389, 73.0243),
-        'Apollo Chennai': (13.0645, 80.2565),
-        'Assam Medical College': (27.4728, 94.9120), # Dibrugarh
-        'IPGMER Kolkata': (22.5354, 88.3424),
-        'JPN Apex Trauma Center': (28.5680, 77.2000), # Delhi
-        'KGMU Lucknow': (26.8679, 80.9174),
-        'KMC Manipal': (13.3530, 74.7850),
-        'LTMMC Mumbai': (19.0305, 72.8590),
-        'MGIMS Wardha': (20.7280, 78.5800), # Sevagram
-        'NIMS Hyderabad': (17.4116, 78.4550), # Punjagutta
-        'PD Hinduja Mumbai': (19.0330, 72.8390),
-        'RIMS Imphal': (24.8170, 93.9360),
-        'Sir Ganga Ram Delhi': (28.6380, 77.1940),
-        'Tata Medical Center': (22.5690, 88.4720), # Kolkata New Town
-        'SKIMS Srinagar': (34.1370, 74.8090)
-    }
-
-    combined_data = []
-
-    # 3. Process MRSA (Phenotypic) - Page 149
-    # File: outputs/table_p149_0.csv (RC1-12) and table_p150_0.csv (RC13+)
-    # Format: RC/Antibiotics, Cefoxitin(n), Oxacillin, ...
-    # We want RC column and "Cefoxitin" (MRSA indicator) or "Oxacillin".
-    # The header is messy (split across lines). 
-    # Usually Col 0 is RC. Col 1 is Cefoxitin or Oxacillin.
-    # Note: Text dump showed Cefoxitin is Col 1.
-    
-    print("Processing MRSA Tables...")
-    for f in ['outputs/table_p149_0.csv', 'outputs/table_p150_0.csv']:
-        if os.path.exists(f):
-            try:
-                df = pd.read_csv(f, header=None)
-                # Find start of data (RC1, RC13)
-                start_idx = -1
-                for idx, row in df.iterrows():
-                    if str(row[0]).startswith('RC'):
-                        start_idx = idx
-                        break
-                
-                if start_idx != -1:
-                    data_rows = df.iloc[start_idx:]
-                    for _, row in data_rows.iterrows():
-                        rc_code = str(row[0]).strip()
-                        # Clean RC code (remove extra chars if any)
-                        if rc_code in rc_map:
-                            center = rc_map[rc_code]
-                            # Column 3 is Methicillin/Cefoxitin (based on CSV inspection)
-                            val_str = str(row[3]) 
-                            
-                            # Extract percentage (in brackets)
-                            match = re.search(r'\((\d+\.?\d*)\)', val_str)
-                            if match:
-                                pct = float(match.group(1))
-                                combined_data.append({
-                                    'RC_Code': rc_code,
-                                    'Center_Name': center,
-                                    'Pathogen': 'S. aureus',
-                                    'Antibiotic_Gene': 'MRSA (Phenotypic)',
-                                    'Resistance_Percentage': pct,
-                                    'Latitude': geocodes[center][0],
-                                    'Longitude': geocodes[center][1]
-                                })
-            except Exception as e:
-                print(f"Error processing {f}: {e}")
-
-    # 4. Process Genotypic (E. coli / Klebsiella) - Page 94/97
-    # Files: outputs/table_p94_0.csv (E. coli), outputs/table_p97_0.csv (Klebsiella)
-    # Header: RC, CTXM15, OXA48, TEM, NDM ...
-    # Rows: RC1 55% 30% ...
-    
-    gen_files = {
-        'E. coli': 'outputs/table_p94_0.csv',
-        'K. pneumoniae': 'outputs/table_p97_0.csv'
-    }
-    
-    for pathogen, fname in gen_files.items():
-        if os.path.exists(fname):
-            print(f"Processing {pathogen} Genotypic Table...")
-            try:
-                df = pd.read_csv(fname, header=None)
-                # Locate header row: "Regional Centers" or "RC1"
-                # Actually PDF header might be split.
-                # Find row with "RC1" and assume columns match report order.
-                # Report Order (from dump): CTXM15 OXA48 TEM NDM SHV OXA1 IMP VIM KPC CTXM1
-                genes = ['CTXM15', 'OXA48', 'TEM', 'NDM', 'SHV', 'OXA1', 'IMP', 'VIM', 'KPC', 'CTXM1']
-                
-                for _, row in df.iterrows():
-                    first_cell = str(row[0])
-                    if 'RC' in first_cell: # Data Row
-                        # Extract RC number
-                        rc_match = re.search(r'RC\d+', first_cell)
-                        if rc_match:
-                            rc_code = rc_match.group(0)
-                        else:
-                            continue
-                            
-                        if rc_code in rc_map:
-                            center = rc_map[rc_code]
-                            
-                            # Iterate columns
-                            for i, gene in enumerate(genes):
-                                col_idx = i + 1 # RC is col 0
-                                if col_idx < len(row):
-                                    val = str(row[col_idx])
-                                    # Extract number (remove %)
-                                    val_clean = re.sub(r'[^\d.]', '', val)
-                                    if val_clean:
-                                        try:
-                                            pct = float(val_clean)
-                                            # Normalize to 100 max (sometimes OCR error gives >100?)
-                                            pct = min(pct, 100.0) 
-                                            
-                                            combined_data.append({
-                                                'RC_Code': rc_code,
-                                                'Center_Name': center,
-                                                'Pathogen': pathogen,
-                                                'Antibiotic_Gene': gene,
-                                                'Resistance_Percentage': pct,
-                                                'Latitude': geocodes[center][0],
-                                                'Longitude': geocodes[center][1]
-                                            })
-                                        except:
-                                            pass
-            except Exception as e:
-                print(f"Error processing {fname}: {e}")
-
-    # 5. Save Combined
-    final_df = pd.DataFrame(combined_data)
-    out_path = 'data/processed/amr_data_real.csv'
+
+    # RC codes, center names and coordinates come from the offline gazetteer
+    # (data/gazetteer/india_gazetteer.csv, RC_Code column; order as in Annexure I)
+    centers = rc_places()
+
+    # The store is built from the report archive and the tracked 2022 page dumps
+    if not os.path.exists(store_path):
+        print(f"No RC table store at {store_path}; building it...")
+        build_table_store(out_path=store_path)
+    store = load_table_store(store_path)
+    store = store[store['Report_Year'] == report_year]
+    tables = table_catalog(store)
+
+    frames = []
+    for spec in TABLE_SPECS:
+        keys = select_tables(tables, spec)
+        print(f"Processing {spec['pathogen']} Tables: {len(keys)} found")
+        for key in keys.itertuples(index=False):
+            print(f"  {key.Report} p{key.Page} table {key.Table_Index}")
+            rows = store[(store['Report'] == key.Report) & (store['Page'] == key.Page)
+                         & (store['Table_Index'] == key.Table_Index)]
+            frames.append(normalize_rc_table(rows, spec))
+    if not frames:
+        print(f"No matching {report_year} tables in the store; {out_path} left unchanged.")
+        return
+
+    # Save Combined (inner join: codes missing from the gazetteer are dropped)
+    combined = pd.concat(frames, ignore_index=True)
+    final_df = combined.merge(centers, on='RC_Code', how='inner')[
+        ['RC_Code', 'Center_Name', 'Pathogen', 'Antibiotic_Gene', 'Resistance_Percentage', 'Latitude', 'Longitude']]
     final_df.to_csv(out_path, index=False)
     print(f"Saved Processed Real Data to {out_path}")
     print(final_df.head())
     print(f"Total Records: {len(final_df)}")
 
+
 if __name__ == "__main__":
-    process_extracted_data()
+    parser = argparse.ArgumentParser(description="Normalize RC tables of one report year into amr_data_real.csv.")
+    parser.add_argument('--year', type=int, default=REPORT_YEAR, help=f"Report year (default: {REPORT_YEAR})")
+    process_extracted_data(parser.parse_args().year)
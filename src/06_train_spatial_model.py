@@ -5,9 +5,59 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import LeaveOneGroupOut
 from sklearn.metrics import mean_squared_error, r2_score
 import joblib
+from joblib import Parallel, delayed
 import os
 import matplotlib.pyplot as plt
 import seaborn as sns
+from spatial_grid import make_grid_axes, predict_grid, predict_marker_grids, data_markers
+from figure_service import figure_job, render_figures
+
+# Prediction grid settings (50 = original 50x50 map; 1000+ for district-level surfaces)
+GRID_RESOLUTION = 50
+GRID_BATCH_SIZE = 250_000
+# Also write grids for every Pathogen/Antibiotic_Gene combination in the data
+PREDICT_ALL_MARKERS = False
+
+# LOCO CV fold workers (-1 = one per core, capped at number of folds)
+CV_N_JOBS = -1
+
+def fit_loco_fold(X, y, train_idx, test_idx, n_jobs=1):
+    """Fit and evaluate one leave-one-center-out fold."""
+    X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+    
+    # Train
+    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+    
+    # Predict
+    preds = model.predict(X_test)
+    
+    # Evaluate
+    rmse = np.sqrt(mean_squared_error(y_test, preds))
+    return rmse, y_test.tolist(), preds.tolist()
+
+def plot_feature_importance(importances, feature_cols, top=10):
+    """Horizontal bars of the model's largest feature importances."""
+    indices = np.argsort(importances)[-top:]
+    
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.set_title(f'Top {top} Feature Importances for AMR Prediction')
+    ax.barh(range(len(indices)), importances[indices], align='center')
+    ax.set_yticks(range(len(indices)))
+    ax.set_yticklabels([feature_cols[i] for i in indices])
+    fig.tight_layout()
+    return fig
+
+def plot_ndm_risk_map(grid_df):
+    """Heatmap of the predicted NDM % over the latitude/longitude grid."""
+    fig, ax = plt.subplots(figsize=(10, 10))
+    pivot = grid_df.pivot(index='Latitude', columns='Longitude', values='Predicted_Resistance')
+    # Use extent to map to coords
+    sns.heatmap(pivot, cmap='RdYlGn_r', alpha=0.9, cbar_kws={'label': 'Predicted NDM %'}, ax=ax)
+    ax.set_title('Predicted NDM-1 Hotspot Risk Map (K. pneumoniae)')
+    ax.invert_yaxis() # Latitude up
+    return fig
 
 def train_predictive_model():
     print("Training Spatial Random Forest Model...")
@@ -37,28 +87,26 @@ def train_predictive_model():
     
     # 3. Spatial Cross-Validation (LOCO)
     logo = LeaveOneGroupOut()
-    scores = []
+    folds = list(logo.split(X, y, groups))
+    
+    # Folds run across a process pool; cores left over go to the trees inside each fold
+    n_cores = os.cpu_count() or 1
+    n_workers = max(1, min(len(folds), n_cores if CV_N_JOBS == -1 else CV_N_JOBS))
+    trees_n_jobs = max(1, n_cores // n_workers)
     
-    print(f"Starting LOCO CV on {len(df)} samples...")
+    print(f"Starting LOCO CV on {len(df)} samples ({len(folds)} folds, {n_workers} workers x {trees_n_jobs} threads)...")
     
+    with Parallel(n_jobs=n_workers) as pool:
+        fold_results = pool(
+            delayed(fit_loco_fold)(X, y, train_idx, test_idx, trees_n_jobs)
+            for train_idx, test_idx in folds
+        )
+    
+    # Collect per-fold RMSE and pooled predictions (fold order preserved)
+    scores = [rmse for rmse, _, _ in fold_results]
     y_true_all = []
     y_pred_all = []
-    
-    for train_idx, test_idx in logo.split(X, y, groups):
-        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
-        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
-        
-        # Train
-        model = RandomForestRegressor(n_estimators=100, random_state=42)
-        model.fit(X_train, y_train)
-        
-        # Predict
-        preds = model.predict(X_test)
-        
-        # Evaluate
-        rmse = np.sqrt(mean_squared_error(y_test, preds))
-        scores.append(rmse)
-        
+    for _, y_test, preds in fold_results:
         y_true_all.extend(y_test)
         y_pred_all.extend(preds)
         
@@ -70,7 +118,7 @@ def train_predictive_model():
     print(f"Overall R2: {r2:.2f}")
     
     # 4. Final Training on All Data
-    final_model = RandomForestRegressor(n_estimators=200, random_state=42)
+    final_model = RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=-1)
     final_model.fit(X, y)
     
     # Save Model & Columns
@@ -79,60 +127,33 @@ def train_predictive_model():
     joblib.dump(feature_cols, 'models/model_features.pkl')
     print("Saved Model to models/amr_spatial_rf.pkl")
     
-    # 5. Feature Importance Plot
-    importances = final_model.feature_importances_
-    indices = np.argsort(importances)[-10:]
-    
-    plt.figure(figsize=(10, 6))
-    plt.title('Top 10 Feature Importances for AMR Prediction')
-    plt.barh(range(len(indices)), importances[indices], align='center')
-    plt.yticks(range(len(indices)), [feature_cols[i] for i in indices])
-    plt.tight_layout()
-    plt.savefig('outputs/figures/model_feature_importance.png')
-    
-    # 6. Generate Prediction Grid (Interpolation Map) for NDM
+    # 5. Generate Prediction Grid (Interpolation Map) for NDM
     # We want to predict NDM % for K. pneumo across a lat/long grid
     print("Generating Prediction Grid for NDM (K. pneumo)...")
     
     # Define Grid
-    lat_range = np.linspace(8, 37, 50)
-    lon_range = np.linspace(68, 97, 50)
-    
-    grid_preds = []
-    
-    # Prepare base feature vector
-    # We need to match X structure. set Latitude/Longitude. Set Pathogen_K..=1, others=0. Gene_NDM=1, others=0.
-    
-    base_row = {col: 0 for col in feature_cols}
-    # Set One-Hot specifics
-    if 'Pathogen_K. pneumoniae' in base_row: base_row['Pathogen_K. pneumoniae'] = 1
-    if 'Antibiotic_Gene_NDM' in base_row: base_row['Antibiotic_Gene_NDM'] = 1
-    
-    for lat in lat_range:
-        for lon in lon_range:
-            row = base_row.copy()
-            row['Latitude'] = lat
-            row['Longitude'] = lon
-            
-            # Predict
-            # Need DataFrame with correct order
-            row_df = pd.DataFrame([row], columns=feature_cols)
-            pred = final_model.predict(row_df)[0]
-            
-            grid_preds.append({'Latitude': lat, 'Longitude': lon, 'Predicted_Resistance': pred})
-            
-    grid_df = pd.DataFrame(grid_preds)
+    lat_range, lon_range = make_grid_axes(GRID_RESOLUTION)
+    
+    # Whole feature matrix is built per batch: Latitude/Longitude vary, Pathogen_K..=1, Gene_NDM=1, others=0.
+    grid_df = predict_grid(final_model, feature_cols, lat_range, lon_range,
+                           pathogen='K. pneumoniae', gene='NDM', batch_size=GRID_BATCH_SIZE)
     grid_df.to_csv('outputs/ndm_prediction_grid.csv', index=False)
     
-    # Plot Heatmap
-    plt.figure(figsize=(10, 10))
-    pivot = grid_df.pivot(index='Latitude', columns='Longitude', values='Predicted_Resistance')
-    # Use extent to map to coords
-    sns.heatmap(pivot, cmap='RdYlGn_r', alpha=0.9, cbar_kws={'label': 'Predicted NDM %'})
-    plt.title('Predicted NDM-1 Hotspot Risk Map (K. pneumoniae)')
-    plt.gca().invert_yaxis() # Latitude up
-    plt.savefig('outputs/figures/map_predicted_ndm_risk.png')
-    print("Saved Prediction Map to outputs/figures/map_predicted_ndm_risk.png")
+    # 6. Feature Importance Plot and Heatmap (rendered in parallel, unchanged ones come from the cache)
+    render_figures([
+        figure_job(plot_feature_importance, final_model.feature_importances_, feature_cols,
+                   outputs={'outputs/figures/model_feature_importance.png': {}}),
+        figure_job(plot_ndm_risk_map, grid_df, outputs={'outputs/figures/map_predicted_ndm_risk.png': {}}),
+    ])
+    
+    # 7. Optional: Prediction Grids for All Markers
+    if PREDICT_ALL_MARKERS:
+        markers = data_markers(df)
+        print(f"Generating Prediction Grids for {len(markers)} markers...")
+        all_grids = predict_marker_grids(final_model, feature_cols, markers, lat_range, lon_range,
+                                         batch_size=GRID_BATCH_SIZE)
+        all_grids.to_csv('outputs/marker_prediction_grids.csv', index=False)
+        print("Saved outputs/marker_prediction_grids.csv")
 
 if __name__ == "__main__":
     train_predictive_model()
@@ -1,47 +1,51 @@
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import re
-import os
+from resistance_parser import parse_resistance_strings
+from data_cache import load_source
+from figure_service import figure_job, render_figures
+
+def plot_overall_trends(trends):
+    """Mean resistance per pathogen and year across all antibiotics."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.lineplot(data=trends, x='Year', y='Resistance_Pct', hue='Pathogen', marker='o', ax=ax)
+    ax.set_title('Average Antibiotic Resistance Trends (2017-2024)')
+    ax.set_ylabel('Mean Resistance %')
+    ax.grid(True, alpha=0.3)
+    return fig
+
+def plot_carbapenem_trends(trends):
+    """Carbapenem resistance per pathogen and year (None without carbapenem rows)."""
+    carbapenem = trends[trends['Is_Carbapenem']]
+    if carbapenem.empty:
+        return None
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.lineplot(data=carbapenem, x='Year', y='Resistance_Pct', hue='Pathogen', marker='s', ax=ax)
+    ax.set_title('CRITICAL: Carbapenem Resistance Trends (2017-2024)')
+    ax.set_ylabel('Carbapenem Resistance %')
+    ax.set_ylim(0, 100)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+def plot_region_heatmap(pivot):
+    """Mean resistance per pathogen (rows) and region (columns)."""
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(pivot, cmap='Reds', annot=True, fmt='.1f', ax=ax)
+    ax.set_title('Resistance Heatmap by Region (Avg 2017-2024)')
+    return fig
 
 def analyze_epidemiology():
     print("Analyzing Epidemiology Data (Dataset 1)...")
     
     # 1. Load Data
-    df = pd.read_csv('data/raw/dataset_1_epidemiology.csv')
+    df = load_source('data/raw/dataset_1_epidemiology.csv')
     
     # 2. Parse Resistance/Susceptibility Column
     # Format examples: "35% Susceptible", "91.0% Resistant", "11.1% S (Imipenem)..."
     
-    def parse_resistance(val):
-        val = str(val).lower()
-        if 'not in source' in val:
-            return None, None
-            
-        # Try to find a percentage number
-        match = re.search(r'(\d+\.?\d*)', val)
-        if match:
-            num = float(match.group(1))
-            
-            # Determine if it represents Susceptibility (S) or Resistance (R)
-            is_susceptible = 'susceptible' in val or ' s ' in val or val.endswith(' s') or 'sensitive' in val
-            is_resistant = 'resistant' in val or ' r ' in val or val.endswith(' r')
-            
-            if is_susceptible:
-                return 100 - num, 'Calculated (100-S)'
-            elif is_resistant:
-                return num, 'Direct (R)'
-            else:
-                # Ambiguous, assume Resistance if high? No, usually text says distinctively.
-                # If just a number, check context? 
-                # For now return None if ambiguous
-                return None, 'Ambiguous'
-        return None, 'No Number'
-
-    df[['Resistance_Pct', 'Value_Type']] = df['Resistance/Susceptibility Percentage'].apply(
-        lambda x: pd.Series(parse_resistance(x))
-    )
+    parsed = parse_resistance_strings(df['Resistance/Susceptibility Percentage'])
+    df['Resistance_Pct'] = parsed['Resistance_Pct']
+    df['Value_Type'] = parsed['Value_Type']
     
     # Drop rows where Resistance could not be parsed
     df_clean = df.dropna(subset=['Resistance_Pct'])
@@ -72,27 +76,12 @@ def analyze_epidemiology():
     trends['Pathogen'] = trends['Organism (Species)'].apply(clean_pathogen)
     trends = trends[trends['Pathogen'].isin(top_pathogens)]
     
-    os.makedirs('outputs/figures', exist_ok=True)
-    
     # 4. Plot 1: Overall Resistance Trends (All Antibiotics)
-    plt.figure(figsize=(12, 6))
-    sns.lineplot(data=trends, x='Year', y='Resistance_Pct', hue='Pathogen', marker='o')
-    plt.title('Average Antibiotic Resistance Trends (2017-2024)')
-    plt.ylabel('Mean Resistance %')
-    plt.grid(True, alpha=0.3)
-    plt.savefig('outputs/figures/epi_trend_overall.png')
-    print("Saved outputs/figures/epi_trend_overall.png")
-    
     # 5. Plot 2: Carbapenem Resistance Only (Gram Negatives)
-    if not trends[trends['Is_Carbapenem']].empty:
-        plt.figure(figsize=(12, 6))
-        sns.lineplot(data=trends[trends['Is_Carbapenem']], x='Year', y='Resistance_Pct', hue='Pathogen', marker='s')
-        plt.title('CRITICAL: Carbapenem Resistance Trends (2017-2024)')
-        plt.ylabel('Carbapenem Resistance %')
-        plt.ylim(0, 100)
-        plt.grid(True, alpha=0.3)
-        plt.savefig('outputs/figures/epi_trend_carbapenem.png')
-        print("Saved outputs/figures/epi_trend_carbapenem.png")
+    figure_jobs = [
+        figure_job(plot_overall_trends, trends, outputs={'outputs/figures/epi_trend_overall.png': {}}),
+        figure_job(plot_carbapenem_trends, trends, outputs={'outputs/figures/epi_trend_carbapenem.png': {}}),
+    ]
     
     # 6. Regional Analysis (2023-2024 Snapshot if possible)
     # Check 'Region/State' coverage
@@ -102,15 +91,15 @@ def analyze_epidemiology():
     region_stats = df_clean.groupby(['Region/State', 'Organism (Species)'])['Resistance_Pct'].mean().reset_index()
     region_stats['Pathogen'] = region_stats['Organism (Species)'].apply(clean_pathogen)
     
-    try:
-        pivot = region_stats.pivot_table(index='Pathogen', columns='Region/State', values='Resistance_Pct')
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(pivot, cmap='Reds', annot=True, fmt='.1f')
-        plt.title('Resistance Heatmap by Region (Avg 2017-2024)')
-        plt.savefig('outputs/figures/epi_heatmap_region.png')
-        print("Saved outputs/figures/epi_heatmap_region.png")
-    except Exception as e:
-        print(f"Could not generate heatmap: {e}")
+    pivot = region_stats.pivot_table(index='Pathogen', columns='Region/State', values='Resistance_Pct')
+    if pivot.empty:
+        print("Could not generate heatmap: no regional data")
+    else:
+        figure_jobs.append(figure_job(plot_region_heatmap, pivot,
+                                      outputs={'outputs/figures/epi_heatmap_region.png': {}}))
+    
+    # Figures render in parallel; unchanged ones come from the cache
+    render_figures(figure_jobs)
 
 if __name__ == "__main__":
     analyze_epidemiology()
@@ -9,6 +9,8 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 import os
+from resistance_parser import parse_resistance_strings
+from data_cache import load_source
 
 def forecast_resistance():
     print("Forecasting Resistance (ML Model)...")
@@ -16,21 +18,10 @@ def forecast_resistance():
     # 1. Load Data
     # Reuse the logic to load and clean resistance stats from dataset 1
     # For speed, we'll re-implement the cleaning here
-    df = pd.read_csv('data/raw/dataset_1_epidemiology.csv')
+    df = load_source('data/raw/dataset_1_epidemiology.csv')
     
     # Parsing logic
-    def parse_resistance(val):
-        val = str(val).lower()
-        if 'not in source' in val: return None
-        import re
-        match = re.search(r'(\d+\.?\d*)', val)
-        if match:
-            num = float(match.group(1))
-            if 'susceptible' in val or ' s ' in val or val.endswith(' s'): return 100 - num
-            if 'resistant' in val or ' r ' in val or val.endswith(' r'): return num
-        return None
-
-    df['Resistance_Pct'] = df['Resistance/Susceptibility Percentage'].apply(parse_resistance)
+    df['Resistance_Pct'] = parse_resistance_strings(df['Resistance/Susceptibility Percentage'])['Resistance_Pct']
     df_clean = df.dropna(subset=['Resistance_Pct', 'Year'])
     
     # 2. Prepare Data for ML
@@ -65,6 +56,9 @@ def forecast_resistance():
     # Save Model
     os.makedirs('models', exist_ok=True)
     joblib.dump(rf, 'models/amr_forecast_rf.pkl')
+    # Every category level, including the ones drop_first left out, so unseen labels can be told apart
+    levels = {col: sorted(df_clean[col].dropna().unique()) for col in ['Organism (Species)', 'Region/State']}
+    joblib.dump(levels, 'models/amr_forecast_levels.pkl')
     
     # 4. Forecast 2025
     # Create synthetic rows for 2025 for each Organism/Region combo that appeared in 2024
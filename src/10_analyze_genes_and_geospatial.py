@@ -3,8 +3,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import geopandas as gpd
-import re
 import os
+from resistance_parser import parse_resistance_strings
+from data_cache import load_source
+from gene_matcher import gene_presence
+from gene_cube import weighted_prevalence
 
 def analyze_molecular_geospatial():
     print("Analyzing Molecular & Geospatial Risk (Dataset 2)...")
@@ -22,7 +25,7 @@ def analyze_molecular_geospatial():
     # Does Dataset 2 have location? Let's check the first few rows again or assume national aggregation if not specific.
     
     # Load Dataset 2
-    df2 = pd.read_csv('data/raw/dataset_2_molecular.csv')
+    df2 = load_source('data/raw/dataset_2_molecular.csv')
     
     # 2. Gene Analysis
     # Column: 'Resistance Mechanism/Gene Detected' (e.g., "blaOXA-23 (Predominant), blaNDM")
@@ -30,20 +33,14 @@ def analyze_molecular_geospatial():
     # Extract Genes
     target_genes = ['NDM', 'OXA-23', 'OXA-48', 'KPC', 'VIM', 'IMP', 'mecA', 'vanA']
     
-    gene_counts = {g: 0 for g in target_genes}
-    
-    for _, row in df2.iterrows():
-        val = str(row['Resistance Mechanism/Gene Detected']).upper()
-        count = row['Total Culture Positive Isolates'] # Weight by isolates if available
-        # If count is NaN or string, treat as 1 occurrence entry
-        try:
-            weight = float(count) if pd.notnull(count) else 1.0
-        except:
-            weight = 1.0
-            
-        for gene in target_genes:
-            if gene in val:
-                gene_counts[gene] += weight
+    # Weight by isolates if available; if count is NaN or string, treat as 1 occurrence entry
+    weights = pd.to_numeric(df2['Total Culture Positive Isolates'], errors='coerce').fillna(1.0)
+
+    # Genes (with synonyms, e.g. blaOXA-23 / OXA23) found in one pass per record
+    found = gene_presence(df2['Resistance Mechanism/Gene Detected'])
+    found = found[found['Gene'].isin(target_genes)]
+    gene_counts = (weights.loc[found['Row']].groupby(found['Gene'].astype(str).to_numpy()).sum()
+                   .reindex(target_genes, fill_value=0).to_dict())
 
     # Plot Gene Prevalence
     plt.figure(figsize=(10, 6))
@@ -52,10 +49,26 @@ def analyze_molecular_geospatial():
     plt.ylabel('Estimated Isolate Count')
     plt.savefig('outputs/figures/mol_gene_prevalence.png')
     print("Saved outputs/figures/mol_gene_prevalence.png")
+
+    # Isolate-weighted prevalence by organism and year, with denominators and Wilson CIs
+    rows = df2.loc[found['Row']]
+    detections = pd.DataFrame({
+        'Organism': rows['Organism'].to_numpy(),
+        'Year': rows['Report Year'].astype('string').str.extract(r'(\d{4})', expand=False).astype('Int64').to_numpy(),
+        'Gene': found['Gene'].astype(str).to_numpy(),
+        'Prevalence': found['Prevalence'].to_numpy(),
+        'Isolates': pd.to_numeric(rows['Total Culture Positive Isolates'], errors='coerce').to_numpy(),
+    })
+    prevalence = weighted_prevalence(detections, ['Organism', 'Year', 'Gene'])
+    prevalence = prevalence[['Detections', 'Isolates', 'Weighted_N', 'Positive_Isolates',
+                             'Weighted_Prevalence', 'CI_Lower', 'CI_Upper']].reset_index()
+    prevalence.to_csv('outputs/gene_prevalence_weighted.csv', index=False)
+    print("Saved outputs/gene_prevalence_weighted.csv")
+    print(prevalence.dropna(subset=['Weighted_Prevalence']).round(1).to_string(index=False))
     
     # 3. Geospatial Risk Map (using Dataset 1 for Location)
     # Dataset 1 has 'Region/State'. We can map Region -> Lat/Lon (Approx Centroid).
-    df1 = pd.read_csv('data/raw/dataset_1_epidemiology.csv')
+    df1 = load_source('data/raw/dataset_1_epidemiology.csv')
     
     # Standardize Regions
     # Map: 'North' -> (28, 77), 'South' -> (12, 79), 'West' -> (19, 72), 'National' -> Filter out or Show as India avg.
@@ -70,15 +83,8 @@ def analyze_molecular_geospatial():
     }
     
     # Aggregate Resistance by Region in Dataset 1
-    # Function to parse resistance (reuse)
-    def parse_res(v):
-        import re
-        m = re.search(r'(\d+\.?\d*)', str(v))
-        if m and ('resistant' in str(v).lower() or ' r ' in str(v).lower()): return float(m.group(1))
-        if m and ('susceptible' in str(v).lower() or ' s ' in str(v).lower()): return 100 - float(m.group(1))
-        return None
-
-    df1['Res_Pct'] = df1['Resistance/Susceptibility Percentage'].apply(parse_res)
+    # Resistant marker takes precedence over susceptible
+    df1['Res_Pct'] = parse_resistance_strings(df1['Resistance/Susceptibility Percentage'], priority='resistant')['Resistance_Pct']
     regional_risk = df1.groupby('Region/State')['Res_Pct'].mean().reset_index()
     
     # Map Coords
@@ -7,59 +7,24 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import r2_score
 import matplotlib.pyplot as plt
 import seaborn as sns
-import re
 import os
+from resistance_parser import extract_first_number, extract_drug_percentage, CARBAPENEMS
+from data_cache import load_source
 
 def advanced_modeling():
     print("Running Advanced Modeling on Granular Dataset 3...")
     
     # 1. Load Data
-    df = pd.read_csv('data/raw/dataset_3_granular.csv')
+    df = load_source('data/raw/dataset_3_granular.csv')
     print(f"Loaded {len(df)} rows.")
     
     # 2. Parsing Functions
     
-    def parse_mt(val):
-        # Mortality: "35% (fatal...)" or "36.6%"
-        if pd.isna(val) or 'Not in source' in str(val): return None
-        m = re.search(r'(\d+\.?\d*)', str(val))
-        if m: return float(m.group(1))
-        return None
-
-    def parse_los(val):
-        # LOS: "19 (Median...)"
-        if pd.isna(val) or 'Not in source' in str(val): return None
-        m = re.search(r'(\d+\.?\d*)', str(val))
-        if m: return float(m.group(1))
-        return None
-
-    def parse_res(val):
-        # Resistance: "37% (Imipenem)" or "20% Amikacin..."
-        if pd.isna(val) or 'Not in source' in str(val): return None
-        # Prioritize single percent if formatted like "37% (Drug)"
-        # If multiple, look for Imipenem/Carbapenem/Meropenem
-        val_str = str(val).lower()
-        
-        # Check for specific carbapenems first
-        for drug in ['imipenem', 'meropenem', 'ertapenem', 'carbapenem']:
-            if drug in val_str:
-                # Find number near this drug? Or is the whole string relating to it?
-                # Case: "14% (Imipenem)"
-                m = re.search(r'(\d+\.?\d*)%?\s*[\(-]?\s*' + drug, val_str)
-                if m: return float(m.group(1))
-                # Case: "25% Imipenem" inside a list
-                m2 = re.search(r'(\d+\.?\d*)%?\s*' + drug, val_str)
-                if m2: return float(m2.group(1))
-        
-        # If no specific drug found, and it looks like "37% (Imipenem)", take the first number
-        m = re.search(r'^(\d+\.?\d*)%', str(val))
-        if m: return float(m.group(1))
-        
-        return None
-
-    df['Mortality_Rate'] = df['Mortality_Rate_Percentage'].apply(parse_mt)
-    df['LOS'] = df['Length_of_Stay_Days'].apply(parse_los)
-    df['Resistance'] = df['Resistance_Percentage'].apply(parse_res)
+    # Mortality: "35% (fatal...)" or "36.6%"; LOS: "19 (Median...)"
+    df['Mortality_Rate'] = extract_first_number(df['Mortality_Rate_Percentage'])
+    df['LOS'] = extract_first_number(df['Length_of_Stay_Days'])
+    # Resistance: "37% (Imipenem)" or "20% Amikacin..." - carbapenem value first, else leading "NN%"
+    df['Resistance'] = extract_drug_percentage(df['Resistance_Percentage'], CARBAPENEMS)
     
     # 3. Model 1: Resistance Forecasting (Year, Pathogen -> Resistance)
     print("\n--- Model 1: Resistance Forecasting ---")
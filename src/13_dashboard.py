@@ -6,6 +6,8 @@ import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from dashboard_cube import ensure_cube, load_cube, load_trends, rollup
+from model_service import forecast_pairs
 
 # Set Page Config
 st.set_page_config(page_title="AMR Hotspot Dashboard", layout="wide")
@@ -18,29 +20,49 @@ st.sidebar.header("Filter Options")
 year_select = st.sidebar.slider("Select Year", 2017, 2024, 2022)
 
 # Load Data
+# The year x center x pathogen cube (src/dashboard_cube.py) is built once; each tab
+# reads only the slice it needs, and slices are cached per widget value.
+@st.cache_resource
+def cube_path():
+    return ensure_cube()
+
+@st.cache_data
+def year_cells(year):
+    return load_cube(cube_path(), Year=year)
+
+@st.cache_data
+def trend_cells():
+    cells = load_cube(cube_path(), columns=['Year', 'Center_Name', 'Pathogen', 'Resistance_N', 'Resistance_Sum'])
+    cells['Resistance'] = cells['Resistance_Sum'] / cells['Resistance_N'].where(cells['Resistance_N'] > 0)
+    return cells.dropna(subset=['Resistance'])
+
 @st.cache_data
-def load_data():
-    # Load standardized granular data
-    df = pd.read_csv('data/raw/dataset_3_granular.csv')
-    return df
+def pathogen_trends():
+    cube_path()
+    return load_trends()
+
+@st.cache_data
+def pair_history(pathogen, center):
+    return rollup(load_cube(cube_path(), Pathogen=pathogen, Center_Name=center), ['Year'])
+
+@st.cache_data
+def dimension_values():
+    cells = load_cube(cube_path(), columns=['Pathogen', 'Center_Name'])
+    return sorted(cells['Pathogen'].unique()), sorted(cells['Center_Name'].unique())
+
+@st.cache_data
+def forecast_table(year=2025):
+    # Every center x pathogen combination, scored in one batched call per model
+    pathogens, centers = dimension_values()
+    pairs = pd.MultiIndex.from_product([centers, pathogens], names=['Center_Name', 'Pathogen']).to_frame(index=False)
+    return forecast_pairs(pairs, year=year).set_index(['Center_Name', 'Pathogen'])
 
 try:
-    df = load_data()
+    cube_path()
 except Exception as e:
     st.error(f"Failed to load data: {e}")
     st.stop()
 
-# Parsing/Cleaning (Quick Logic for Dashboard)
-def parse_res(val):
-    import re
-    m = re.search(r'(\d+\.?\d*)', str(val))
-    if m and ('susceptible' in str(val).lower() or ' s ' in str(val).lower()): return 100 - float(m.group(1))
-    if m: return float(m.group(1))
-    return None
-
-if 'Resistance' not in df.columns:
-    df['Resistance'] = df['Resistance_Percentage'].apply(parse_res)
-
 # Tab Layout
 tab1, tab2, tab3 = st.tabs(["🚀 Executive Summary", "🗺️ Geospatial Risk", "📈 Future Forecasting"])
 
@@ -48,8 +70,9 @@ with tab1:
     st.header(f"Snapshot: Resistance Trends")
     
     # KPIs
-    avg_res = df[df['Year'] == year_select]['Resistance'].mean()
-    high_risk_centers = df[(df['Year'] == year_select) & (df['Resistance'] > 50)]['Center_Name'].nunique()
+    cells = year_cells(year_select)
+    avg_res = cells['Resistance_Sum'].sum() / cells['Resistance_N'].sum() if cells['Resistance_N'].sum() else np.nan
+    high_risk_centers = cells[cells['Resistance_Max'] > 50]['Center_Name'].nunique()
     
     col1, col2 = st.columns(2)
     col1.metric("Avg Carbapenem Resistance", f"{avg_res:.1f}%", delta_color="inverse")
@@ -58,9 +81,22 @@ with tab1:
     st.markdown("---")
     st.subheader("Resistance by Pathogen (Longitudinal)")
     
-    # Plotly Trend Line
-    fig_time = px.scatter(df, x='Year', y='Resistance', color='Pathogen', trendline='ols',
+    # One point per center x pathogen x year cell; OLS lines and 95% bands come precomputed from the cube build
+    cells = trend_cells()
+    palette = px.colors.qualitative.Plotly
+    colors = {p: palette[i % len(palette)] for i, p in enumerate(cells['Pathogen'].unique())}
+    fig_time = px.scatter(cells, x='Year', y='Resistance', color='Pathogen', color_discrete_map=colors,
                           title="Resistance Trajectory (All Centers)")
+    for pathogen, line in pathogen_trends().groupby('Pathogen', sort=False):
+        if pathogen not in colors:
+            continue
+        fig_time.add_trace(go.Scatter(x=np.concatenate([line['Year'], line['Year'][::-1]]),
+                                      y=np.concatenate([line['CI_Upper'], line['CI_Lower'][::-1]]),
+                                      fill='toself', fillcolor=colors[pathogen], opacity=0.15, line={'width': 0},
+                                      hoverinfo='skip', showlegend=False, legendgroup=pathogen))
+        fig_time.add_trace(go.Scatter(x=line['Year'], y=line['Fitted'], mode='lines',
+                                      line={'color': colors[pathogen]}, showlegend=False, legendgroup=pathogen,
+                                      name=f"{pathogen} trend (slope {line['Slope'].iloc[0]:+.2f}%/yr)"))
     st.plotly_chart(fig_time, use_container_width=True)
 
 with tab2:
@@ -69,7 +105,8 @@ with tab2:
     # We need Lat/Lon. Let's merge if possible, or just plot by Center Name
     # Simplified: Bar Chart by Center (Top Riskiest)
     
-    risk_by_center = df[df['Year'] == year_select].groupby('Center_Name')['Resistance'].mean().sort_values(ascending=False).reset_index()
+    risk_by_center = rollup(year_cells(year_select), ['Center_Name']).rename(columns={'Mean_Resistance': 'Resistance'})
+    risk_by_center = risk_by_center.dropna(subset=['Resistance']).sort_values('Resistance', ascending=False)
     
     fig_geo = px.bar(risk_by_center, x='Resistance', y='Center_Name', orientation='h', 
                      color='Resistance', color_continuous_scale='Reds',
@@ -88,23 +125,42 @@ with tab3:
     The Random Forest model uses historical trajectory per center to forecast future resistance.
     """)
     
+    try:
+        forecasts = forecast_table(2025)
+    except Exception as e:
+        st.error(f"Failed to load prediction models: {e}")
+        st.stop()
+    
     # Forecasting Tool
-    pathogen = st.selectbox("Select Pathogen", df['Pathogen'].unique())
-    center = st.selectbox("Select Center", df['Center_Name'].unique())
+    pathogens, centers = dimension_values()
+    pathogen = st.selectbox("Select Pathogen", pathogens)
+    center = st.selectbox("Select Center", centers)
     
     # Filter Data for Context
-    history = df[(df['Pathogen'] == pathogen) & (df['Center_Name'] == center)]
-    
-    if len(history) > 1:
-        # Simple local regression for demo
-        st.line_chart(history.set_index('Year')['Resistance'])
-        
-        last_val = history[history['Year'] == history['Year'].max()]['Resistance'].max()
-        if pd.notna(last_val):
-            proj_2025 = min(100, last_val * 1.05) # Simple heuristic for display if model not live-inference
-            st.metric("Predicted 2025 Resistance", f"{proj_2025:.1f}%", f"+5% risk")
+    history = pair_history(pathogen, center)
+    
+    pred = forecasts.loc[(center, pathogen)]
+    
+    if history['Records'].sum() > 1:
+        st.line_chart(history.set_index('Year')['Mean_Resistance'])
     else:
         st.warning("Insufficient specific history for this Center/Pathogen combo.")
+    
+    observed = history['Mean_Resistance'].dropna()
+    last_val = observed.iloc[-1] if len(observed) else np.nan
+    col1, col2 = st.columns(2)
+    scored = pd.notna(pred['Forecast'])
+    col1.metric("Predicted 2025 Resistance", f"{pred['Forecast']:.1f}%" if scored else "n/a",
+                f"{pred['Forecast'] - last_val:+.1f} pts vs last observed" if scored and pd.notna(last_val) else None,
+                delta_color="inverse")
+    col2.metric("Spatial Model Risk (center location)",
+                f"{pred['Spatial_Risk']:.1f}%" if pd.notna(pred['Spatial_Risk']) else "n/a")
+    st.caption(f"Forecast model region: {pred['Region']}" if scored else
+               "No forecast: the center could not be located or the pathogen/region is not in the model's training data.")
+    
+    with st.expander("2025 projections for all centers and pathogens"):
+        st.dataframe(forecasts.reset_index().style.format({'Forecast': '{:.1f}', 'Spatial_Risk': '{:.1f}'}, na_rep='n/a'),
+                     use_container_width=True)
 
 st.sidebar.markdown("---")
 st.sidebar.caption("Data Source: ICMR AMRSN 2022 & Dataset 3")
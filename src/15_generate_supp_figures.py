@@ -5,28 +5,17 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.model_selection import learning_curve
 from sklearn.ensemble import RandomForestRegressor
-import re
 import os
+from resistance_parser import extract_first_number
+from data_cache import load_source
 
 # Ensure output dir
 os.makedirs('outputs/figures', exist_ok=True)
 
-def parse_res(val):
-    if pd.isna(val): return None
-    m = re.search(r'(\d+\.?\d*)', str(val))
-    if m: 
-        val_float = float(m.group(1))
-        # Logic for "Susceptible" vs "Resistant"
-        # If text says "Susceptible" and value is 90%, Resistance might be 10%. 
-        # But for this dataset, we assume columns are "Resistance %" unless specified.
-        # Quick standardization for the supplementary plots
-        return val_float
-    return None
-
 def generate_supp_figures():
     print("Generating Supplementary Figures...")
-    df = pd.read_csv('data/raw/dataset_3_granular.csv')
-    df['Resistance'] = df['Resistance_Percentage'].apply(parse_res)
+    df = load_source('data/raw/dataset_3_granular.csv')
+    df['Resistance'] = extract_first_number(df['Resistance_Percentage'])
     df = df.dropna(subset=['Resistance', 'Year'])
     
     # 1. Learning Curve
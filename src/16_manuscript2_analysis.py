@@ -1,31 +1,25 @@
 
-import pandas as pd
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 import statsmodels.api as sm
-import re
 import os
+from resistance_parser import extract_first_number
+from data_cache import load_source
 
 # Ensure output dir
 os.makedirs('outputs/figures_manuscript2', exist_ok=True)
 
-def parse_val(val):
-    if pd.isna(val) or 'Not in source' in str(val): return None
-    m = re.search(r'(\d+\.?\d*)', str(val))
-    if m: return float(m.group(1))
-    return None
-
 def run_driver_analysis():
     print("Running Manuscript 2 Driver Analysis...")
-    df = pd.read_csv('data/raw/dataset_3_granular.csv')
+    df = load_source('data/raw/dataset_3_granular.csv')
     
     # 1. Clean Data
-    df['DDD'] = df['Antibiotic_Consumption_DDD'].apply(parse_val)
-    df['Resistance'] = df['Resistance_Percentage'].apply(parse_val)
-    df['Mortality'] = df['Mortality_Rate_Percentage'].apply(parse_val)
-    df['LOS'] = df['Length_of_Stay_Days'].apply(parse_val)
+    df['DDD'] = extract_first_number(df['Antibiotic_Consumption_DDD'])
+    df['Resistance'] = extract_first_number(df['Resistance_Percentage'])
+    df['Mortality'] = extract_first_number(df['Mortality_Rate_Percentage'])
+    df['LOS'] = extract_first_number(df['Length_of_Stay_Days'])
     
     # Filter for rows with at least DDD and Resistance, or Resistance and Mortality
     # To run a full chain, we need overlapping data.
@@ -3,25 +3,20 @@ import pandas as pd
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
-import re
 import os
+from resistance_parser import extract_first_number
+from data_cache import load_source
 
 # Ensure output dir
 os.makedirs('outputs/figures_manuscript2', exist_ok=True)
 
-def parse_val(val):
-    if pd.isna(val) or 'Not in source' in str(val): return None
-    m = re.search(r'(\d+\.?\d*)', str(val))
-    if m: return float(m.group(1))
-    return None
-
 def enhance_assets():
     print("Enhancing Manuscript 2 Assets...")
-    df = pd.read_csv('data/raw/dataset_3_granular.csv')
+    df = load_source('data/raw/dataset_3_granular.csv')
     
     # Clean Data
-    df['Resistance'] = df['Resistance_Percentage'].apply(parse_val)
-    df['Mortality'] = df['Mortality_Rate_Percentage'].apply(parse_val)
+    df['Resistance'] = extract_first_number(df['Resistance_Percentage'])
+    df['Mortality'] = extract_first_number(df['Mortality_Rate_Percentage'])
     
     # Filter valid
     df_clean = df.dropna(subset=['Resistance', 'Mortality'])
@@ -61,6 +61,7 @@ def generate_amr_scorecard(input_file, output_dir):
     print(results.head())
 
 if __name__ == "__main__":
-    base_path = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\data\processed\amr_data_real.csv"
-    out_dir = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\outputs\scorecard"
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    base_path = os.path.join(BASE_DIR, "data", "processed", "amr_data_real.csv")
+    out_dir = os.path.join(BASE_DIR, "outputs", "scorecard")
     generate_amr_scorecard(base_path, out_dir)
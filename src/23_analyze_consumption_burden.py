@@ -1,29 +1,19 @@
-import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 import os
-import re
+from resistance_parser import extract_first_number
+from data_cache import BASE_DIR, load_source
 from scipy.stats import pearsonr
 
-def clean_percentage(x):
-    if pd.isna(x) or str(x).lower().strip() in ['not in source', 'na', 'nan']:
-        return None
-    # Extract number before % or just number
-    match = re.search(r'(\d+\.?\d*)', str(x))
-    if match:
-        return float(match.group(1))
-    return None
-
 def analyze_vast_data(excel_path, output_dir):
     print("Loading Vast Data (Table 1)...")
-    xls = pd.ExcelFile(excel_path)
-    df = pd.read_excel(xls, 'Table 1')
+    df = load_source(excel_path, sheet_name='Table 1')
     
     print("Cleaning Data...")
     # Clean Columns
-    df['Resistance_Clean'] = df['Resistance_Percentage'].apply(clean_percentage)
-    df['Consumption_Clean'] = df['Antibiotic_Consumption_DDD'].apply(clean_percentage)
-    df['Mortality_Clean'] = df['Mortality_Rate_Percentage'].apply(clean_percentage)
+    df['Resistance_Clean'] = extract_first_number(df['Resistance_Percentage'])
+    df['Consumption_Clean'] = extract_first_number(df['Antibiotic_Consumption_DDD'])
+    df['Mortality_Clean'] = extract_first_number(df['Mortality_Rate_Percentage'])
     
     # Filter for valid data
     # We create two subsets because some hospitals might have Res+Cons but not Mortality
@@ -69,6 +59,6 @@ def analyze_vast_data(excel_path, output_dir):
     print("Vast Data Analysis Complete.")
 
 if __name__ == "__main__":
-    excel_path = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\data\raw\Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx"
-    out_dir = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\outputs\advanced_analytics"
+    excel_path = os.path.join(BASE_DIR, "data", "raw", "Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx")
+    out_dir = os.path.join(BASE_DIR, "outputs", "advanced_analytics")
     analyze_vast_data(excel_path, out_dir)
@@ -1,26 +1,18 @@
-import pandas as pd
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 import statsmodels.formula.api as smf
 import os
-import re
+from resistance_parser import extract_first_number
+from data_cache import BASE_DIR, load_source
+from its_engine import placebo_permutation_test
 
-def clean_percentage(x):
-    if pd.isna(x) or str(x).lower().strip() in ['not in source', 'na', 'nan']:
-        return None
-    match = re.search(r'(\d+\.?\d*)', str(x))
-    if match:
-        return float(match.group(1))
-    return None
-
-def analyze_policy_impact(excel_path, output_dir):
+def analyze_policy_impact(excel_path, output_dir, intervention_year=2019):
     print("Loading Data for ITS Analysis...")
-    xls = pd.ExcelFile(excel_path)
-    df = pd.read_excel(xls, 'Table 1')
+    df = load_source(excel_path, sheet_name='Table 1')
     
     # 1. Cleaning
-    df['Resistance_Clean'] = df['Resistance_Percentage'].apply(clean_percentage)
+    df['Resistance_Clean'] = extract_first_number(df['Resistance_Percentage'])
     df_ts = df.dropna(subset=['Year', 'Resistance_Clean']).copy()
     df_ts['Year'] = df_ts['Year'].astype(int)
     
@@ -30,8 +22,6 @@ def analyze_policy_impact(excel_path, output_dir):
     print(annual_trend)
     
     # 3. ITS Setup
-    # Intervention Year = 2019
-    intervention_year = 2019
     annual_trend['Time'] = np.arange(len(annual_trend))
     annual_trend['Intervention'] = (annual_trend['Year'] >= intervention_year).astype(int)
     annual_trend['Time_Since_Intervention'] = annual_trend['Time'] - annual_trend[annual_trend['Year'] == intervention_year]['Time'].values[0]
@@ -55,13 +45,13 @@ def analyze_policy_impact(excel_path, output_dir):
     post_data = annual_trend[annual_trend['Year'] >= intervention_year]
     
     # We plot the fitted regression lines
-    plt.plot(pre_data['Year'], pre_data['Predicted'], color='blue', linewidth=2, label='Pre-2019 Trend')
-    plt.plot(post_data['Year'], post_data['Predicted'], color='red', linewidth=2, label='Post-2019 Trend')
+    plt.plot(pre_data['Year'], pre_data['Predicted'], color='blue', linewidth=2, label=f'Pre-{intervention_year} Trend')
+    plt.plot(post_data['Year'], post_data['Predicted'], color='red', linewidth=2, label=f'Post-{intervention_year} Trend')
     
     # Vertical Red Line
-    plt.axvline(x=2019, color='red', linestyle='--', alpha=0.9, label='Red Line Campaign (2019)')
+    plt.axvline(x=intervention_year, color='red', linestyle='--', alpha=0.9, label=f'Red Line Campaign ({intervention_year})')
     
-    plt.title('Impact of 2019 "Red Line" Campaign on AMR Trends\n(Interrupted Time Series Analysis)')
+    plt.title(f'Impact of {intervention_year} "Red Line" Campaign on AMR Trends\n(Interrupted Time Series Analysis)')
     plt.xlabel('Year')
     plt.ylabel('Mean Resistance (%)')
     plt.legend()
@@ -78,11 +68,24 @@ def analyze_policy_impact(excel_path, output_dir):
     
     print(f"\nSlope Change Post-Intervention: {slope_change:.3f} (p={p_val:.3f})")
     if slope_change < 0:
-        print("Interpretation: The curve is flattening/decreasing after 2019.")
+        print(f"Interpretation: The curve is flattening/decreasing after {intervention_year}.")
     else:
         print("Interpretation: Resistance continues to rise or stayed same.")
+    
+    # 7. Placebo years and permutation null for the slope change
+    scan, null = placebo_permutation_test(annual_trend['Year'].to_numpy(), annual_trend['Resistance_Clean'].to_numpy(),
+                                          intervention_year=intervention_year)
+    actual = scan[scan['is_actual']].iloc[0]
+    if actual['supported']:
+        print(f"Permutation p-value ({len(null)} permutations): {actual['perm_pval']:.3f}; "
+              f"placebo-year rank p-value: {scan.attrs['placebo_pval']:.3f}")
+    else:
+        print(f"{intervention_year} lacks two observed years on one side; its slope change is not tested.")
+    scan_path = os.path.join(output_dir, 'red_line_placebo_scan.csv')
+    scan.to_csv(scan_path, index=False)
+    print(f"Placebo scan saved to: {scan_path}")
 
 if __name__ == "__main__":
-    excel_path = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\data\raw\Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx"
-    out_dir = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\outputs\advanced_analytics"
+    excel_path = os.path.join(BASE_DIR, "data", "raw", "Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx")
+    out_dir = os.path.join(BASE_DIR, "outputs", "advanced_analytics")
     analyze_policy_impact(excel_path, out_dir)
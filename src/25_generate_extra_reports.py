@@ -95,6 +95,7 @@ def generate_scorecard_report(output_dir):
     print(f"Scorecard Report saved: {out_path}")
 
 if __name__ == "__main__":
-    out_dir = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction\submission_rapid"
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out_dir = os.path.join(BASE_DIR, "submission_rapid")
     generate_policy_brief(out_dir)
     generate_scorecard_report(out_dir)
@@ -15,8 +15,11 @@ import statsmodels.formula.api as smf
 from statsmodels.stats.stattools import durbin_watson
 from scipy import stats
 import os
-import re
 import warnings
+from resistance_parser import extract_first_number
+from data_cache import BASE_DIR, iter_source
+from its_engine import MIN_SEGMENT_YEARS, fit_its_batch, fit_its_series, placebo_permutation_test
+from figure_service import figure_job, render_figures
 warnings.filterwarnings('ignore')
 
 # Set publication-quality defaults
@@ -27,7 +30,6 @@ plt.rcParams['savefig.dpi'] = 300
 plt.rcParams['axes.linewidth'] = 1.2
 
 # Paths
-BASE_DIR = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction"
 DATA_DIR = os.path.join(BASE_DIR, "data")
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs", "its_analysis")
 SUBMISSION_DIR = os.path.join(BASE_DIR, "submission_manuscript3")
@@ -36,15 +38,67 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(SUBMISSION_DIR, exist_ok=True)
 os.makedirs(os.path.join(DATA_DIR, "processed"), exist_ok=True)
 
-def clean_percentage(x):
-    """Extract numeric percentage from string."""
-    if pd.isna(x) or str(x).lower().strip() in ['not in source', 'na', 'nan', '']:
-        return None
-    # Match first number (including decimals)
-    match = re.search(r'(\d+\.?\d*)', str(x))
-    if match:
-        return float(match.group(1))
-    return None
+# Column mapping for each source: consolidated column -> source column.
+# A missing 'Antibiotic' entry means the source has no drug column ('Mixed').
+SOURCE_SCHEMAS = [
+    {
+        'name': 'Epidemiology', 'label': 'Dataset 1 (Epidemiology)',
+        'file': 'dataset_1_epidemiology.csv', 'sheet': None, 'required': True,
+        'columns': {'Year': 'Year', 'Pathogen': 'Organism (Species)',
+                    'Antibiotic': 'Antimicrobial Agent',
+                    'Resistance': 'Resistance/Susceptibility Percentage'}
+    },
+    {
+        'name': 'Granular', 'label': 'Dataset 3 (Granular)',
+        'file': 'dataset_3_granular.csv', 'sheet': None, 'required': True,
+        'columns': {'Year': 'Year', 'Pathogen': 'Pathogen', 'Resistance': 'Resistance_Percentage'}
+    },
+    {
+        'name': 'Excel', 'label': 'Excel Data',
+        'file': 'Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx',
+        'sheet': 'Table 1', 'required': False,
+        'columns': {'Year': 'Year', 'Pathogen': 'Pathogen', 'Resistance': 'Resistance_Percentage'}
+    },
+]
+
+CONSOLIDATED_COLUMNS = ['Year', 'Pathogen', 'Antibiotic', 'Resistance_Pct', 'Source']
+
+# Rows per chunk when streaming large exports (e.g. multi-year WHONET files)
+CONSOLIDATION_CHUNK_ROWS = 100_000
+
+# Autocorrelation-robust refits reported next to OLS (its_engine method -> label)
+ROBUST_METHODS = {'hac': 'Newey-West (HAC)', 'prais_winsten': 'Prais-Winsten AR(1)'}
+
+
+def standardize_chunk(chunk, schema):
+    """Map one chunk of a source onto the consolidated columns (rows with a resistance value only)."""
+    cols = schema['columns']
+    resistance = extract_first_number(chunk[cols['Resistance']])
+    keep = resistance.notna()
+    chunk = chunk[keep]
+    antibiotic_col = cols.get('Antibiotic')
+    return pd.DataFrame({
+        'Year': chunk[cols['Year']].astype(int),
+        'Pathogen': chunk[cols['Pathogen']],
+        'Antibiotic': chunk[antibiotic_col] if antibiotic_col in chunk.columns else 'Mixed',
+        'Resistance_Pct': resistance[keep],
+        'Source': schema['name']
+    }, columns=CONSOLIDATED_COLUMNS)
+
+
+def load_source_records(schema, chunksize=CONSOLIDATION_CHUNK_ROWS):
+    """Stream one source through its schema mapping and return the standardized rows."""
+    path = os.path.join(DATA_DIR, "raw", schema['file'])
+    wanted = list(schema['columns'].values())
+    parts, n_rows, years = [], 0, set()
+    for chunk in iter_source(path, schema['sheet'], chunksize=chunksize):
+        chunk = chunk[[c for c in wanted if c in chunk.columns]]
+        n_rows += len(chunk)
+        years.update(chunk[schema['columns']['Year']].dropna().unique())
+        parts.append(standardize_chunk(chunk, schema))
+    print(f"{schema['label']}: {n_rows} records, Years: {sorted(years)}")
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=CONSOLIDATED_COLUMNS)
+
 
 def load_and_consolidate_data():
     """Load all AMR data sources and consolidate for ITS analysis."""
@@ -52,68 +106,19 @@ def load_and_consolidate_data():
     print("PHASE 1: DATA CONSOLIDATION")
     print("=" * 60)
     
-    # Load Dataset 1: Epidemiology (2017-2024)
-    df1 = pd.read_csv(os.path.join(DATA_DIR, "raw", "dataset_1_epidemiology.csv"))
-    df1['Resistance_Clean'] = df1['Resistance/Susceptibility Percentage'].apply(clean_percentage)
-    df1['Source_Dataset'] = 'Epidemiology'
-    print(f"Dataset 1 (Epidemiology): {len(df1)} records, Years: {sorted(df1['Year'].unique())}")
-    
-    # Load Dataset 3: Granular (2016-2024)
-    df3 = pd.read_csv(os.path.join(DATA_DIR, "raw", "dataset_3_granular.csv"))
-    df3['Resistance_Clean'] = df3['Resistance_Percentage'].apply(clean_percentage)
-    df3['Source_Dataset'] = 'Granular'
-    print(f"Dataset 3 (Granular): {len(df3)} records, Years: {sorted(df3['Year'].unique())}")
-    
-    # Load Excel data
-    try:
-        xls = pd.ExcelFile(os.path.join(DATA_DIR, "raw", "Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx"))
-        df_excel = pd.read_excel(xls, 'Table 1')
-        df_excel['Resistance_Clean'] = df_excel['Resistance_Percentage'].apply(clean_percentage)
-        df_excel['Source_Dataset'] = 'Excel'
-        print(f"Excel Data: {len(df_excel)} records, Years: {sorted(df_excel['Year'].unique())}")
-    except Exception as e:
-        print(f"Excel loading error: {e}")
-        df_excel = pd.DataFrame()
-    
-    # Standardize columns for merging
-    records = []
-    
-    # From Dataset 1
-    for _, row in df1.iterrows():
-        if pd.notna(row['Resistance_Clean']):
-            records.append({
-                'Year': int(row['Year']),
-                'Pathogen': row['Organism (Species)'],
-                'Antibiotic': row.get('Antimicrobial Agent', 'Mixed'),
-                'Resistance_Pct': row['Resistance_Clean'],
-                'Source': row['Source_Dataset']
-            })
-    
-    # From Dataset 3
-    for _, row in df3.iterrows():
-        if pd.notna(row['Resistance_Clean']):
-            records.append({
-                'Year': int(row['Year']),
-                'Pathogen': row['Pathogen'],
-                'Antibiotic': 'Mixed',
-                'Resistance_Pct': row['Resistance_Clean'],
-                'Source': row['Source_Dataset']
-            })
-    
-    # From Excel
-    if not df_excel.empty:
-        for _, row in df_excel.iterrows():
-            if pd.notna(row.get('Resistance_Clean')):
-                records.append({
-                    'Year': int(row['Year']),
-                    'Pathogen': row['Pathogen'],
-                    'Antibiotic': 'Mixed',
-                    'Resistance_Pct': row['Resistance_Clean'],
-                    'Source': row['Source_Dataset']
-                })
+    # Each source is mapped column-wise onto the same schema and stacked in order
+    frames = []
+    for schema in SOURCE_SCHEMAS:
+        if schema['required']:
+            frames.append(load_source_records(schema))
+            continue
+        try:
+            frames.append(load_source_records(schema))
+        except Exception as e:
+            print(f"{schema['name']} loading error: {e}")
     
     # Create consolidated DataFrame
-    df_all = pd.DataFrame(records)
+    df_all = pd.concat(frames, ignore_index=True)
     
     # Standardize pathogen names
     pathogen_map = {
@@ -128,7 +133,7 @@ def load_and_consolidate_data():
         'Enterococcus faecium (VRE)': 'E. faecium (VRE)',
         'Candida auris': 'C. auris'
     }
-    df_all['Pathogen_Standard'] = df_all['Pathogen'].map(lambda x: pathogen_map.get(x, x))
+    df_all['Pathogen_Standard'] = df_all['Pathogen'].map(pathogen_map).fillna(df_all['Pathogen'])
     
     print(f"\nConsolidated: {len(df_all)} total records")
     print(f"Year range: {df_all['Year'].min()} - {df_all['Year'].max()}")
@@ -229,6 +234,12 @@ def run_its_analysis(annual_data, intervention_year=2016):
     results['level_change_ci'] = (conf.loc['Intervention', 0], conf.loc['Intervention', 1])
     results['slope_change_ci'] = (conf.loc['Time_After', 0], conf.loc['Time_After', 1])
     
+    # Autocorrelation-robust refits of the same model (batched engine)
+    results['robust'] = {}
+    for method in ROBUST_METHODS:
+        fit = fit_its_batch(df['Year'].to_numpy(), df['Mean_Resistance'].to_numpy(), intervention_year, method=method)
+        results['robust'][method] = {key: value[0] for key, value in fit.items()}
+    
     # Add predictions and counterfactual
     df['Predicted'] = model.predict(df)
     
@@ -246,6 +257,9 @@ def run_its_analysis(annual_data, intervention_year=2016):
     print(f"Slope change post-intervention: {results['slope_change']:.3f}%/year (95% CI: {results['slope_change_ci'][0]:.3f}, {results['slope_change_ci'][1]:.3f})")
     print(f"\nR-squared: {results['r_squared']:.4f}")
     print(f"Durbin-Watson: {results['durbin_watson']:.4f} (ideal: 2.0)")
+    for method, label in ROBUST_METHODS.items():
+        res = results['robust'][method]
+        print(f"{label}: slope change {res['slope_change']:.3f} (SE {res['slope_change_se']:.3f}, p = {res['slope_change_pval']:.4f})")
     
     return df, results, model
 
@@ -261,23 +275,32 @@ def run_sensitivity_analyses(df_all, intervention_year=2016):
     print("\n--- Pathogen-Specific Analysis ---")
     priority_pathogens = ['K. pneumoniae', 'E. coli', 'A. baumannii', 'S. aureus (MRSA)']
     
+    # All eligible pathogen series are fitted together by the batched engine
+    n_obs = df_all.groupby('Pathogen_Standard').size()
+    eligible = [p for p in priority_pathogens if n_obs.get(p, 0) >= 5]  # Need minimum observations
+    df_priority = df_all[df_all['Pathogen_Standard'].isin(eligible)]
+    annual = df_priority.groupby(['Pathogen_Standard', 'Year'])['Resistance_Pct'].mean().reset_index()
+    fits = fit_its_series(annual, 'Pathogen_Standard', value_col='Resistance_Pct',
+                          intervention_year=intervention_year, min_years=4).set_index('Pathogen_Standard')
+    robust_fits = {method: fit_its_series(annual, 'Pathogen_Standard', value_col='Resistance_Pct',
+                                          intervention_year=intervention_year, min_years=4,
+                                          method=method).set_index('Pathogen_Standard')
+                   for method in ROBUST_METHODS}
+    
     for pathogen in priority_pathogens:
-        df_pathogen = df_all[df_all['Pathogen_Standard'] == pathogen].copy()
-        if len(df_pathogen) >= 5:  # Need minimum observations
-            annual = df_pathogen.groupby('Year')['Resistance_Pct'].mean().reset_index()
-            annual.columns = ['Year', 'Mean_Resistance']
-            
-            if len(annual) >= 4:  # Minimum for ITS
-                try:
-                    _, res, _ = run_its_analysis(annual, intervention_year)
-                    sensitivity_results[pathogen] = {
-                        'slope_change': res['slope_change'],
-                        'slope_change_pval': res['slope_change_pval'],
-                        'n_years': len(annual)
-                    }
-                    print(f"{pathogen}: Slope change = {res['slope_change']:.3f}, p = {res['slope_change_pval']:.3f}")
-                except Exception as e:
-                    print(f"{pathogen}: Analysis failed - {e}")
+        if pathogen in fits.index:
+            res = fits.loc[pathogen]
+            sensitivity_results[pathogen] = {
+                'slope_change': res['slope_change'],
+                'slope_change_pval': res['slope_change_pval'],
+                'n_years': int(res['n_years'])
+            }
+            for method, robust in robust_fits.items():
+                sensitivity_results[pathogen][f'slope_change_{method}'] = robust.loc[pathogen, 'slope_change']
+                sensitivity_results[pathogen][f'slope_change_pval_{method}'] = robust.loc[pathogen, 'slope_change_pval']
+            print(f"{pathogen}: Slope change = {res['slope_change']:.3f}, p = {res['slope_change_pval']:.3f} "
+                  f"(HAC p = {sensitivity_results[pathogen]['slope_change_pval_hac']:.3f}, "
+                  f"Prais-Winsten p = {sensitivity_results[pathogen]['slope_change_pval_prais_winsten']:.3f})")
     
     # 2. Excluding COVID years (2020-2021)
     print("\n--- Excluding COVID Years (2020-2021) ---")
@@ -292,17 +315,67 @@ def run_sensitivity_analyses(df_all, intervention_year=2016):
             'slope_change_pval': res_covid['slope_change_pval'],
             'n_years': len(annual_no_covid)
         }
+        for method, robust in res_covid['robust'].items():
+            sensitivity_results['Excluding_COVID'][f'slope_change_{method}'] = robust['slope_change']
+            sensitivity_results['Excluding_COVID'][f'slope_change_pval_{method}'] = robust['slope_change_pval']
     except Exception as e:
         print(f"COVID exclusion analysis failed: {e}")
     
     return sensitivity_results
 
+def run_series_its(df_all, by=('Source', 'Pathogen_Standard', 'Antibiotic'), intervention_year=2016):
+    """Fit segmented regression for every series (e.g. center x pathogen x antibiotic) in one batch."""
+    print("\n--- Series-Level ITS (batched) ---")
+    annual = df_all.groupby(list(by) + ['Year'])['Resistance_Pct'].mean().reset_index()
+    series_results = fit_its_series(annual, list(by), value_col='Resistance_Pct',
+                                    intervention_year=intervention_year)
+    
+    output_path = os.path.join(OUTPUT_DIR, "its_series_coefficients.csv")
+    series_results.to_csv(output_path, index=False)
+    print(f"Fitted {len(series_results)} series with >= 4 years")
+    print(f"Saved to: {output_path}")
+    
+    return series_results
+
+def run_placebo_tests(annual_data, intervention_year=2016):
+    """Placebo-year scan and permutation null for the slope change of the overall series."""
+    print("\n--- Placebo-Year Scan and Permutation Test ---")
+    scan, null = placebo_permutation_test(annual_data['Year'].to_numpy(), annual_data['Mean_Resistance'].to_numpy(),
+                                          intervention_year=intervention_year)
+    
+    scan_path = os.path.join(OUTPUT_DIR, "its_placebo_scan.csv")
+    null_path = os.path.join(OUTPUT_DIR, "its_permutation_null.csv")
+    scan.to_csv(scan_path, index=False)
+    null.to_csv(null_path, index=False)
+    print(scan[['intervention_year', 'supported', 'slope_change', 'slope_change_pval', 'perm_pval']].to_string(index=False))
+    print(f"Saved to: {scan_path}")
+
+    actual = scan[scan['is_actual']].iloc[0]
+    skipped = scan.loc[~scan['supported'], 'intervention_year'].tolist()
+    results = {
+        'min_segment_years': MIN_SEGMENT_YEARS,
+        'actual_year_supported': bool(actual['supported']),
+        'skipped_years': skipped,
+        'n_permutations': len(null),
+        'candidate_years': scan.loc[scan['supported'], 'intervention_year'].tolist()
+    }
+    if actual['supported']:
+        print(f"{len(null)} permutations; placebo rank p-value for {intervention_year}: {scan.attrs['placebo_pval']:.3f}")
+        results.update({
+            'slope_change_perm_pval': actual['perm_pval'],
+            'null_slope_change_95': [actual['null_q_lower'], actual['null_q_upper']],
+            'placebo_pval': scan.attrs['placebo_pval'],
+        })
+    else:
+        note = (f"{intervention_year} has fewer than {MIN_SEGMENT_YEARS} observed years on one side, so its "
+                f"slope change is not identified; no permutation or placebo p-value is reported for it.")
+        print(f"Note: {note}")
+        results.update({'slope_change_perm_pval': None, 'null_slope_change_95': None, 'placebo_pval': None,
+                        'note': note})
+    return results
+
 def generate_its_figure(df_its, results, intervention_year=2016):
     """Generate main ITS plot with counterfactual."""
-    print("\n" + "=" * 60)
-    print("PHASE 5: FIGURE GENERATION")
-    print("=" * 60)
-    
     fig, ax = plt.subplots(figsize=(12, 7))
     
     # Plot observed data
@@ -354,14 +427,7 @@ def generate_its_figure(df_its, results, intervention_year=2016):
     
     plt.tight_layout()
     
-    # Save
-    fig_path = os.path.join(OUTPUT_DIR, 'fig2_its_main_plot.png')
-    plt.savefig(fig_path, dpi=300, bbox_inches='tight', facecolor='white')
-    plt.savefig(fig_path.replace('.png', '.pdf'), format='pdf', bbox_inches='tight')
-    print(f"Saved: {fig_path}")
-    
-    plt.close()
-    return fig_path
+    return fig
 
 def generate_pathogen_subgroup_figure(df_all, intervention_year=2016):
     """Generate pathogen-specific subgroup analysis figure."""
@@ -413,12 +479,7 @@ def generate_pathogen_subgroup_figure(df_all, intervention_year=2016):
                  fontsize=14, fontweight='bold', y=1.02)
     plt.tight_layout()
     
-    fig_path = os.path.join(OUTPUT_DIR, 'fig3_pathogen_subgroups.png')
-    plt.savefig(fig_path, dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"Saved: {fig_path}")
-    
-    plt.close()
-    return fig_path
+    return fig
 
 def generate_data_flow_figure():
     """Generate data flow/study design figure."""
@@ -476,12 +537,7 @@ def generate_data_flow_figure():
     
     plt.title('Study Design: Interrupted Time Series Analysis', fontsize=14, fontweight='bold', pad=20)
     
-    fig_path = os.path.join(OUTPUT_DIR, 'fig1_study_design.png')
-    plt.savefig(fig_path, dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"Saved: {fig_path}")
-    
-    plt.close()
-    return fig_path
+    return fig
 
 def generate_sensitivity_forest_plot(sensitivity_results):
     """Generate forest plot for sensitivity analyses."""
@@ -517,12 +573,7 @@ def generate_sensitivity_forest_plot(sensitivity_results):
     ax.grid(True, alpha=0.3, axis='x')
     plt.tight_layout()
     
-    fig_path = os.path.join(OUTPUT_DIR, 'fig4_sensitivity_forest.png')
-    plt.savefig(fig_path, dpi=300, bbox_inches='tight', facecolor='white')
-    print(f"Saved: {fig_path}")
-    
-    plt.close()
-    return fig_path
+    return fig
 
 def create_results_tables(annual_data, its_results, sensitivity_results):
     """Create formatted tables for manuscript."""
@@ -550,6 +601,16 @@ def create_results_tables(annual_data, its_results, sensitivity_results):
         'p-value': [f"{its_results['pre_slope_pval']:.4f}", f"{its_results['level_change_pval']:.4f}",
                     f"{its_results['slope_change_pval']:.4f}"]
     }
+    # Robust columns: Newey-West keeps the OLS estimate (SE/p change, normal p-values as in statsmodels);
+    # Prais-Winsten re-estimates
+    terms = ['pre_slope', 'level_change', 'slope_change']
+    hac, pw = its_results['robust']['hac'], its_results['robust']['prais_winsten']
+    table2_data['Newey-West SE'] = [f"{hac[f'{t}_se']:.3f}" for t in terms]
+    table2_data['Newey-West p-value'] = [f"{hac[f'{t}_pval']:.4f}" for t in terms]
+    table2_data['Prais-Winsten Estimate'] = [f"{pw[t]:.3f}" for t in terms]
+    table2_data['Prais-Winsten 95% CI Lower'] = [f"{pw[f'{t}_ci_lower']:.3f}" for t in terms]
+    table2_data['Prais-Winsten 95% CI Upper'] = [f"{pw[f'{t}_ci_upper']:.3f}" for t in terms]
+    table2_data['Prais-Winsten p-value'] = [f"{pw[f'{t}_pval']:.4f}" for t in terms]
     table2 = pd.DataFrame(table2_data)
     table2.to_csv(os.path.join(OUTPUT_DIR, 'table2_its_coefficients.csv'), index=False)
     print("Table 2: ITS Coefficients saved")
@@ -561,6 +622,9 @@ def create_results_tables(annual_data, its_results, sensitivity_results):
             'Analysis': analysis,
             'Slope Change (%/year)': f"{res['slope_change']:.3f}",
             'p-value': f"{res['slope_change_pval']:.4f}",
+            'Newey-West p-value': f"{res['slope_change_pval_hac']:.4f}",
+            'Prais-Winsten Slope Change': f"{res['slope_change_prais_winsten']:.3f}",
+            'Prais-Winsten p-value': f"{res['slope_change_pval_prais_winsten']:.4f}",
             'N (years)': res['n_years']
         })
     table3 = pd.DataFrame(table3_rows)
@@ -569,7 +633,7 @@ def create_results_tables(annual_data, its_results, sensitivity_results):
     
     return table1, table2, table3
 
-def save_analysis_summary(its_results, sensitivity_results):
+def save_analysis_summary(its_results, sensitivity_results, placebo_results=None):
     """Save comprehensive analysis summary."""
     summary = {
         'analysis_date': '2026-01-07',
@@ -583,7 +647,12 @@ def save_analysis_summary(its_results, sensitivity_results):
             'r_squared': its_results['r_squared'],
             'durbin_watson': its_results['durbin_watson']
         },
+        'robust_results': {method: {key: its_results['robust'][method][key]
+                                    for key in ('slope_change', 'slope_change_se', 'slope_change_pval', 'rho')
+                                    if key in its_results['robust'][method]}
+                           for method in ROBUST_METHODS},
         'sensitivity_results': sensitivity_results,
+        'placebo_results': placebo_results,
         'interpretation': 'Analysis pending - see output files'
     }
     
@@ -611,20 +680,32 @@ def main():
     
     # Phase 4: Sensitivity analyses
     sensitivity_results = run_sensitivity_analyses(df_all, intervention_year=2016)
+    run_series_its(df_all, intervention_year=2016)  # writes its_series_coefficients.csv
+    placebo_results = run_placebo_tests(annual_overall, intervention_year=2016)
     
-    # Phase 5: Figure generation
-    print("\n--- Generating Figures ---")
-    fig1_path = generate_data_flow_figure()
-    fig2_path = generate_its_figure(df_its, its_results, intervention_year=2016)
-    fig3_path = generate_pathogen_subgroup_figure(df_all, intervention_year=2016)
+    # Phase 5: Figure generation (independent figures render in parallel, unchanged ones come from the cache)
+    print("\n" + "=" * 60)
+    print("PHASE 5: FIGURE GENERATION")
+    print("=" * 60)
+    png = {'dpi': 300, 'bbox_inches': 'tight', 'facecolor': 'white'}
+    figure_jobs = [
+        figure_job(generate_data_flow_figure, outputs={os.path.join(OUTPUT_DIR, 'fig1_study_design.png'): png}),
+        figure_job(generate_its_figure, df_its, its_results, intervention_year=2016,
+                   outputs={os.path.join(OUTPUT_DIR, 'fig2_its_main_plot.png'): png,
+                            os.path.join(OUTPUT_DIR, 'fig2_its_main_plot.pdf'): {'bbox_inches': 'tight'}}),
+        figure_job(generate_pathogen_subgroup_figure, df_all, intervention_year=2016,
+                   outputs={os.path.join(OUTPUT_DIR, 'fig3_pathogen_subgroups.png'): png}),
+    ]
     if sensitivity_results:
-        fig4_path = generate_sensitivity_forest_plot(sensitivity_results)
+        figure_jobs.append(figure_job(generate_sensitivity_forest_plot, sensitivity_results,
+                                      outputs={os.path.join(OUTPUT_DIR, 'fig4_sensitivity_forest.png'): png}))
+    render_figures(figure_jobs)
     
     # Phase 6: Table generation
     tables = create_results_tables(annual_overall, its_results, sensitivity_results)
     
     # Save summary
-    save_analysis_summary(its_results, sensitivity_results)
+    save_analysis_summary(its_results, sensitivity_results, placebo_results)
     
     print("\n" + "=" * 70)
     print("PIPELINE COMPLETE!")
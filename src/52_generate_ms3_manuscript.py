@@ -18,7 +18,7 @@ from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 
 # Paths
-BASE_DIR = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs", "its_analysis")
 SUBMISSION_DIR = os.path.join(BASE_DIR, "submission_manuscript3")
 os.makedirs(SUBMISSION_DIR, exist_ok=True)
@@ -5,7 +5,6 @@ Analysis Pipeline for IJMR Research Brief
 
 import os
 import json
-import re
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -13,9 +12,12 @@ import seaborn as sns
 from docx import Document
 from docx.shared import Pt, Cm, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from resistance_parser import extract_first_number
+from data_cache import BASE_DIR, load_source
+from figure_service import figure_job, render_figures
+from bootstrap_engine import bootstrap_ci, CI_COLUMNS
 
 # Paths
-BASE_DIR = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction"
 DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs", "clinical_burden")
 SUBMISSION_DIR = os.path.join(BASE_DIR, "submission_manuscript4")
@@ -28,29 +30,22 @@ os.makedirs(SUBMISSION_DIR, exist_ok=True)
 plt.style.use('seaborn-v0_8-whitegrid')
 sns.set_palette("Set2")
 
-def extract_numeric(value):
-    """Extract numeric value from string."""
-    if pd.isna(value) or value == 'Not in source':
-        return np.nan
-    match = re.search(r'(\d+\.?\d*)', str(value))
-    return float(match.group(1)) if match else np.nan
-
 def load_and_process_data():
     """Load and process clinical burden data."""
     print("=" * 60)
     print("LOADING CLINICAL BURDEN DATA")
     print("=" * 60)
     
-    df = pd.read_csv(os.path.join(DATA_DIR, "dataset_3_granular.csv"))
+    df = load_source(os.path.join(DATA_DIR, "dataset_3_granular.csv"))
     
     # Filter for records with mortality data
     df['Has_Mortality'] = df['Mortality_Rate_Percentage'] != 'Not in source'
     df_clinical = df[df['Has_Mortality']].copy()
     
     # Extract numeric values
-    df_clinical['Mortality_Num'] = df_clinical['Mortality_Rate_Percentage'].apply(extract_numeric)
-    df_clinical['LOS_Num'] = df_clinical['Length_of_Stay_Days'].apply(extract_numeric)
-    df_clinical['Resistance_Num'] = df_clinical['Resistance_Percentage'].apply(extract_numeric)
+    df_clinical['Mortality_Num'] = extract_first_number(df_clinical['Mortality_Rate_Percentage'])
+    df_clinical['LOS_Num'] = extract_first_number(df_clinical['Length_of_Stay_Days'])
+    df_clinical['Resistance_Num'] = extract_first_number(df_clinical['Resistance_Percentage'])
     
     # Standardize pathogen names
     pathogen_map = {
@@ -113,10 +108,29 @@ def generate_summary_statistics(df):
     
     return stats, year_stats, pathogen_stats
 
-def generate_figure_1(df):
-    """Figure 1: Mortality by Pathogen."""
-    print("\nGenerating Figure 1: Mortality by Pathogen...")
+def bootstrap_intervals(df):
+    """Bootstrap 95% CIs (percentile and BCa) for mortality, LOS and resistance by pathogen and by year."""
+    print("\n" + "=" * 60)
+    print("BOOTSTRAP CONFIDENCE INTERVALS")
+    print("=" * 60)
     
+    df_named = df[df['Pathogen_Standard'] != 'Not specified']
+    frames = []
+    for metric, column in [('Mortality', 'Mortality_Num'), ('LOS', 'LOS_Num'), ('Resistance', 'Resistance_Num')]:
+        for grouping, data, by in [('Pathogen', df_named, 'Pathogen_Standard'), ('Year', df, 'Year')]:
+            ci = bootstrap_ci(data, column, by)
+            ci.index = ci.index.astype(str).rename('Group')
+            frames.append(ci.reset_index().assign(Metric=metric, Grouping=grouping))
+    
+    intervals = pd.concat(frames, ignore_index=True)
+    intervals = intervals[['Metric', 'Grouping', 'Group'] + CI_COLUMNS]
+    intervals.to_csv(os.path.join(OUTPUT_DIR, 'bootstrap_intervals.csv'), index=False)
+    print(intervals.round(1).to_string(index=False))
+    print("  Saved: bootstrap_intervals.csv")
+    return intervals
+
+def aggregate_pathogen_mortality(df, intervals):
+    """Mean mortality, SE, bootstrap BCa interval and resistance by pathogen (data behind Figure 1)."""
     # Filter valid pathogen data
     df_plot = df[df['Pathogen_Standard'] != 'Not specified'].copy()
     
@@ -127,8 +141,14 @@ def generate_figure_1(df):
     }).reset_index()
     pathogen_data.columns = ['Pathogen', 'Mortality', 'Mortality_SD', 'N', 'Resistance']
     pathogen_data['SE'] = pathogen_data['Mortality_SD'] / np.sqrt(pathogen_data['N'])
+    bca = intervals[(intervals['Metric'] == 'Mortality') & (intervals['Grouping'] == 'Pathogen')]
+    pathogen_data = pathogen_data.merge(bca[['Group', 'BCa_Lower', 'BCa_Upper']].rename(columns={'Group': 'Pathogen'}),
+                                        on='Pathogen', how='left')
     pathogen_data = pathogen_data.sort_values('Mortality', ascending=True)
-    
+    return pathogen_data
+
+def generate_figure_1(pathogen_data):
+    """Figure 1: Mortality by Pathogen."""
     fig, ax = plt.subplots(figsize=(10, 6))
     
     colors = ['#e74c3c' if m > 40 else '#f39c12' if m > 35 else '#3498db' 
@@ -137,9 +157,11 @@ def generate_figure_1(df):
     bars = ax.barh(pathogen_data['Pathogen'], pathogen_data['Mortality'], 
                    color=colors, edgecolor='black', linewidth=0.5)
     
-    # Add error bars
+    # Add error bars (95% bootstrap BCa interval; none for single-observation pathogens)
+    xerr = np.vstack([pathogen_data['Mortality'] - pathogen_data['BCa_Lower'],
+                      pathogen_data['BCa_Upper'] - pathogen_data['Mortality']])
     ax.errorbar(pathogen_data['Mortality'], pathogen_data['Pathogen'],
-                xerr=pathogen_data['SE'].fillna(0), fmt='none', color='black', capsize=3)
+                xerr=np.nan_to_num(xerr.clip(min=0)), fmt='none', color='black', capsize=3)
     
     # Add value labels
     for bar, mort, res in zip(bars, pathogen_data['Mortality'], pathogen_data['Resistance']):
@@ -158,17 +180,10 @@ def generate_figure_1(df):
     ax.legend(loc='lower right')
     
     plt.tight_layout()
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig1_mortality_by_pathogen.png'), dpi=300, bbox_inches='tight')
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig1_mortality_by_pathogen.pdf'), bbox_inches='tight')
-    plt.close()
-    
-    print("  Saved: fig1_mortality_by_pathogen.png")
-    return pathogen_data
+    return fig
 
 def generate_figure_2(df, year_stats):
     """Figure 2: Temporal Trends and Resistance-Mortality Correlation."""
-    print("\nGenerating Figure 2: Temporal Trends...")
-    
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
     
     # Panel A: Mortality trend by year
@@ -206,11 +221,7 @@ def generate_figure_2(df, year_stats):
     ax2.set_ylim(0, 70)
     
     plt.tight_layout()
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig2_temporal_trends.png'), dpi=300, bbox_inches='tight')
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig2_temporal_trends.pdf'), bbox_inches='tight')
-    plt.close()
-    
-    print("  Saved: fig2_temporal_trends.png")
+    return fig
 
 def create_table_1(pathogen_stats, df):
     """Table 1: Pathogen-Specific Clinical Outcomes."""
@@ -302,9 +313,20 @@ def main():
     # 2. Generate statistics
     stats, year_stats, pathogen_stats = generate_summary_statistics(df)
     
-    # 3. Generate figures
-    pathogen_data = generate_figure_1(df)
-    generate_figure_2(df, year_stats)
+    intervals = bootstrap_intervals(df)
+    
+    # 3. Generate figures (rendered in parallel, reused from the figure cache when unchanged)
+    print("\nGenerating Figures 1-2...")
+    pathogen_data = aggregate_pathogen_mortality(df, intervals)
+    png, pdf = {'dpi': 300, 'bbox_inches': 'tight'}, {'bbox_inches': 'tight'}
+    render_figures([
+        figure_job(generate_figure_1, pathogen_data,
+                   outputs={os.path.join(OUTPUT_DIR, 'fig1_mortality_by_pathogen.png'): png,
+                            os.path.join(OUTPUT_DIR, 'fig1_mortality_by_pathogen.pdf'): pdf}),
+        figure_job(generate_figure_2, df, year_stats,
+                   outputs={os.path.join(OUTPUT_DIR, 'fig2_temporal_trends.png'): png,
+                            os.path.join(OUTPUT_DIR, 'fig2_temporal_trends.pdf'): pdf}),
+    ])
     
     # 4. Create tables
     table1 = create_table_1(pathogen_stats, df)
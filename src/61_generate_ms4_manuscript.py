@@ -9,7 +9,7 @@ from docx import Document
 from docx.shared import Pt, Cm, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
-BASE_DIR = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs", "clinical_burden")
 SUBMISSION_DIR = os.path.join(BASE_DIR, "submission_manuscript4")
 
@@ -5,14 +5,17 @@ Analysis Pipeline for ICMR-AMRSN Molecular Surveillance Data (2017-2024)
 
 import os
 import json
-import re
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from data_cache import BASE_DIR, load_source, HAS_PARQUET
+from figure_service import figure_job, render_figures
+from gene_matcher import gene_presence
+from gene_cube import build_cube, rollup, save_cube, slice_cube
+from resistance_parser import extract_agent_values, RESERVE_AGENTS
 
 # Paths
-BASE_DIR = r"d:\research-automation\TB multiomics\AMR_Hotspots_Prediction"
 DATA_DIR = os.path.join(BASE_DIR, "data", "raw")
 OUTPUT_DIR = os.path.join(BASE_DIR, "outputs", "molecular_analysis")
 SUBMISSION_DIR = os.path.join(BASE_DIR, "submission_manuscript5")
@@ -28,7 +31,7 @@ def load_and_process_data():
     print("LOADING MOLECULAR SURVEILLANCE DATA")
     print("=" * 60)
     
-    df = pd.read_csv(os.path.join(DATA_DIR, "dataset_2_molecular.csv"))
+    df = load_source(os.path.join(DATA_DIR, "dataset_2_molecular.csv"))
     
     print(f"Total records: {len(df)}")
     print(f"Columns: {df.columns.tolist()}")
@@ -50,52 +53,21 @@ def extract_gene_prevalence(df):
     print("EXTRACTING RESISTANCE GENE PREVALENCE")
     print("=" * 60)
     
-    # Define key genes to track
-    genes_of_interest = {
-        'NDM': 'NDM|NDM-1',
-        'OXA-48': 'OXA-48|OXA48',
-        'OXA-23': 'OXA-23|OXA23|blaOXA-23',
-        'CTX-M-15': 'CTX-?M-?15|CTXM-15|CTXM15',
-        'TEM': r'\bTEM\b',
-        'SHV': r'\bSHV\b',
-        'VIM': r'\bVIM\b',
-        'IMP': r'\bIMP\b',
-        'KPC': r'\bKPC\b',
-        'mecA': 'mecA',
-        'vanA': 'vanA'
-    }
-    
-    gene_data = []
-    
-    for idx, row in df.iterrows():
-        mechanism_text = str(row['Resistance Mechanism/Gene Detected'])
-        organism = row['Organism']
-        year = row['Report Year']
-        
-        if mechanism_text == 'nan' or mechanism_text == 'Not in source':
-            continue
-        
-        for gene_name, pattern in genes_of_interest.items():
-            if re.search(pattern, mechanism_text, re.IGNORECASE):
-                # Try to extract prevalence percentage
-                # Fixed regex: handle operator precedence (?:pattern) and text inside brackets (?:[^)\d]*?)
-                try:
-                    regex = rf'(?:{pattern})[^,]*?[\(\[]\s*(?:[^)\d]*?)(\d+\.?\d*)\s*%'
-                    prev_match = re.search(regex, mechanism_text, re.IGNORECASE)
-                    prevalence = float(prev_match.group(1)) if prev_match else None
-                except (ValueError, TypeError, AttributeError):
-                    prevalence = None
-                
+    # Key genes and their synonyms come from gene_matcher.GENE_SYNONYMS; every
+    # record is scanned once for all genes, keeping the first prevalence per gene
+    found = gene_presence(df['Resistance Mechanism/Gene Detected'])
 
-                gene_data.append({
-                    'Organism': organism,
-                    'Year': year,
-                    'Gene': gene_name,
-                    'Prevalence': prevalence,
-                    'Source_Text': mechanism_text[:100]
-                })
-    
-    gene_df = pd.DataFrame(gene_data)
+    rows = df.loc[found['Row']]
+    gene_df = pd.DataFrame({
+        'Organism': rows['Organism'].to_numpy(),
+        'Year': rows['Report Year'].to_numpy(),
+        'Gene': found['Gene'].astype(str).to_numpy(),
+        'Prevalence': found['Prevalence'].to_numpy(),
+        'Source_Text': rows['Resistance Mechanism/Gene Detected'].astype(str).str[:100].to_numpy(),
+        'Specimen': rows['Specimen Type'].to_numpy(),
+        'Setting': rows['Clinical Setting (OPD/Ward/ICU)'].to_numpy(),
+        'Isolates': pd.to_numeric(rows['Total Culture Positive Isolates'], errors='coerce').to_numpy(),
+    })
     
     print(f"\nExtracted {len(gene_df)} gene-organism associations")
     print("\nGene counts:")
@@ -109,30 +81,18 @@ def extract_susceptibility_data(df):
     print("EXTRACTING SUSCEPTIBILITY DATA")
     print("=" * 60)
     
-    reserve_agents = ['Colistin', 'Tigecycline', 'Fosfomycin', 'Minocycline', 'Vancomycin', 'Linezolid']
-    
-    susc_data = []
-    
-    for idx, row in df.iterrows():
-        susc_text = str(row['Antibiotic Susceptibility (%)'])
-        organism = row['Organism']
-        year = row['Report Year']
-        
-        if susc_text == 'nan' or susc_text == 'Not in source':
-            continue
-        
-        for agent in reserve_agents:
-            pattern = rf'{agent}\s*[\(\[]?\s*~?\s*(\d+\.?\d*)'
-            match = re.search(pattern, susc_text, re.IGNORECASE)
-            if match:
-                susc_data.append({
-                    'Organism': organism,
-                    'Year': year,
-                    'Agent': agent,
-                    'Susceptibility_%': float(match.group(1))
-                })
-    
-    susc_df = pd.DataFrame(susc_data)
+    # One agent x value matrix for all rows, then long format (row order, then agent order)
+    values = extract_agent_values(df['Antibiotic Susceptibility (%)'], RESERVE_AGENTS)
+    values.columns.name = 'Agent'
+    long = values.stack().dropna().rename('Susceptibility_%').reset_index('Agent')
+    rows = df.loc[long.index]
+
+    susc_df = pd.DataFrame({
+        'Organism': rows['Organism'].to_numpy(),
+        'Year': rows['Report Year'].to_numpy(),
+        'Agent': long['Agent'].to_numpy(),
+        'Susceptibility_%': long['Susceptibility_%'].to_numpy(),
+    })
     
     print(f"\nExtracted {len(susc_df)} susceptibility data points")
     print("\nAgents documented:")
@@ -140,12 +100,10 @@ def extract_susceptibility_data(df):
     
     return susc_df
 
-def generate_figure_1_heatmap(gene_df):
+def generate_figure_1_heatmap(cube):
     """Figure 1: Resistance gene distribution heatmap."""
-    print("\nGenerating Figure 1: Gene Distribution Heatmap...")
-    
-    # Create pivot table of gene presence by organism
-    gene_organism = gene_df.groupby(['Organism', 'Gene']).size().unstack(fill_value=0)
+    # Gene presence by organism, rolled up from the cube
+    gene_organism = rollup(cube, ['Organism', 'Gene'])['Detections'].unstack(fill_value=0)
     
     # Normalize to percentages (presence count)
     gene_organism_norm = gene_organism.div(gene_organism.sum(axis=0), axis=1) * 100
@@ -180,28 +138,23 @@ def generate_figure_1_heatmap(gene_df):
     plt.xticks(rotation=45, ha='right')
     
     plt.tight_layout()
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig1_gene_heatmap.png'), dpi=300, bbox_inches='tight')
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig1_gene_heatmap.pdf'), bbox_inches='tight')
-    plt.close()
-    
-    print("  Saved: fig1_gene_heatmap.png")
-    return plot_data
+    return fig
 
-def generate_figure_2_temporal(gene_df):
+def generate_figure_2_temporal(cube):
     """Figure 2: Temporal trends in key genes with prevalence data."""
-    print("\nGenerating Figure 2: Temporal Trends...")
-    
-    # Filter for genes with prevalence data
-    prev_df = gene_df[gene_df['Prevalence'].notna()].copy()
-    
-    print(f"  Prevalence data points available: {len(prev_df)}")
-    if len(prev_df) > 0:
-        print(prev_df[['Year', 'Gene', 'Prevalence']])
+    # Year x gene roll-up; prevalence is the mean of the quoted values in each year
+    yearly = rollup(cube, ['Year', 'Gene'])
+    prev_df = yearly.loc[yearly['Prevalence_N'] > 0, ['Prevalence_N', 'Mean_Prevalence']].reset_index()
+    n_points = int(yearly['Prevalence_N'].sum())
+    
+    print(f"  Prevalence data points available: {n_points}")
+    if n_points > 0:
+        print(prev_df)
 
-    if len(prev_df) < 5:
+    if n_points < 5:
         print("  Insufficient prevalence data (<5 points). Creating detection count plot instead...")
         # Use detection counts by year
-        yearly_counts = gene_df.groupby(['Year', 'Gene']).size().unstack(fill_value=0)
+        yearly_counts = yearly['Detections'].unstack(fill_value=0)
         
         fig, ax = plt.subplots(figsize=(10, 6))
         
@@ -229,8 +182,8 @@ def generate_figure_2_temporal(gene_df):
         for gene in ['NDM', 'OXA-48', 'OXA-23', 'CTX-M-15', 'VIM']:
             gene_data = prev_df[prev_df['Gene'] == gene]
             if len(gene_data) > 0:
-                print(f"  Plotting prevalence for {gene}: {len(gene_data)} points")
-                ax.plot(gene_data['Year'], gene_data['Prevalence'], 'o-', label=gene, linewidth=2, markersize=8)
+                print(f"  Plotting prevalence for {gene}: {len(gene_data)} years")
+                ax.plot(gene_data['Year'], gene_data['Mean_Prevalence'], 'o-', label=gene, linewidth=2, markersize=8)
         
         ax.set_xlabel('Year', fontsize=12, fontweight='bold')
         ax.set_ylabel('Prevalence (%)', fontsize=12, fontweight='bold')
@@ -242,16 +195,10 @@ def generate_figure_2_temporal(gene_df):
 
     
     plt.tight_layout()
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig2_temporal_trends.png'), dpi=300, bbox_inches='tight')
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig2_temporal_trends.pdf'), bbox_inches='tight')
-    plt.close()
-    
-    print("  Saved: fig2_temporal_trends.png")
+    return fig
 
 def generate_figure_3_reserve_agents(susc_df):
     """Figure 3: Susceptibility to reserve agents."""
-    print("\nGenerating Figure 3: Reserve Agent Susceptibility...")
-    
     # Aggregate by organism and agent
     susc_agg = susc_df.groupby(['Organism', 'Agent'])['Susceptibility_%'].mean().reset_index()
     
@@ -263,7 +210,7 @@ def generate_figure_3_reserve_agents(susc_df):
     
     if len(plot_data) == 0:
         print("  Insufficient reserve agent data for key pathogens.")
-        return
+        return None
     
     fig, ax = plt.subplots(figsize=(10, 6))
     
@@ -281,41 +228,23 @@ def generate_figure_3_reserve_agents(susc_df):
     plt.xticks(rotation=0)
     
     plt.tight_layout()
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig3_reserve_agents.png'), dpi=300, bbox_inches='tight')
-    fig.savefig(os.path.join(OUTPUT_DIR, 'fig3_reserve_agents.pdf'), bbox_inches='tight')
-    plt.close()
-    
-    print("  Saved: fig3_reserve_agents.png")
+    return fig
 
-def create_table_1(gene_df):
+def create_table_1(cube):
     """Table 1: Resistance gene prevalence by pathogen."""
     print("\nCreating Table 1: Gene Prevalence by Pathogen...")
     
-    # Create comprehensive table
-    table_data = []
-    
     pathogens = ['Escherichia coli', 'Klebsiella pneumoniae', 'Acinetobacter baumannii', 
                  'Pseudomonas aeruginosa', 'Staphylococcus aureus  (MRSA)', 'Enterococcus faecium']
     genes = ['NDM', 'OXA-48', 'OXA-23', 'CTX-M-15', 'VIM', 'mecA', 'vanA']
     
-    for pathogen in pathogens:
-        row = {'Pathogen': pathogen.replace('  ', ' ')}
-        pathogen_data = gene_df[gene_df['Organism'] == pathogen]
-        
-        for gene in genes:
-            gene_data = pathogen_data[pathogen_data['Gene'] == gene]
-            if len(gene_data) > 0:
-                prev = gene_data['Prevalence'].dropna()
-                if len(prev) > 0:
-                    row[gene] = f"{prev.mean():.1f}%"
-                else:
-                    row[gene] = "Detected"
-            else:
-                row[gene] = "-"
-        
-        table_data.append(row)
-    
-    table1 = pd.DataFrame(table_data)
+    # Mean quoted prevalence per pathogen x gene; "Detected" when none was quoted, "-" when absent
+    summary = rollup(slice_cube(cube, Organism=pathogens, Gene=genes), ['Organism', 'Gene'])
+    cells = summary['Mean_Prevalence'].map('{:.1f}%'.format).where(summary['Prevalence_N'] > 0, 'Detected')
+    table1 = cells.unstack().reindex(index=pathogens, columns=genes).fillna('-')
+    table1.columns = table1.columns.astype(str)
+    table1 = table1.rename_axis(index='Pathogen', columns=None).reset_index()
+    table1['Pathogen'] = table1['Pathogen'].str.replace('  ', ' ')
     table1.to_csv(os.path.join(OUTPUT_DIR, 'table1_gene_prevalence.csv'), index=False)
     print("  Saved: table1_gene_prevalence.csv")
     
@@ -379,16 +308,27 @@ def main():
     # 3. Extract susceptibility data
     susc_df = extract_susceptibility_data(df)
     
-    # 4. Generate figures
-    generate_figure_1_heatmap(gene_df)
-    generate_figure_2_temporal(gene_df)
-    generate_figure_3_reserve_agents(susc_df)
-    
-    # 5. Create tables
-    table1 = create_table_1(gene_df)
+    # 4. Gene x organism x year x specimen x setting cube (figures and tables query it)
+    cube = build_cube(gene_df)
+    save_cube(cube, os.path.join(OUTPUT_DIR, 'gene_cube.parquet' if HAS_PARQUET else 'gene_cube.csv'))
+    print(f"\nGene cube: {len(cube)} non-empty cells")
+    
+    # 5. Generate figures (rendered in parallel, reused from the figure cache when unchanged)
+    print("\nGenerating Figures 1-3...")
+    png, pdf = {'dpi': 300, 'bbox_inches': 'tight'}, {'bbox_inches': 'tight'}
+    figure_jobs = []
+    for func, data, name in [(generate_figure_1_heatmap, cube, 'fig1_gene_heatmap'),
+                             (generate_figure_2_temporal, cube, 'fig2_temporal_trends'),
+                             (generate_figure_3_reserve_agents, susc_df, 'fig3_reserve_agents')]:
+        figure_jobs.append(figure_job(func, data, outputs={os.path.join(OUTPUT_DIR, f'{name}.png'): png,
+                                                           os.path.join(OUTPUT_DIR, f'{name}.pdf'): pdf}))
+    render_figures(figure_jobs)
+    
+    # 6. Create tables
+    table1 = create_table_1(cube)
     table2 = create_table_2(susc_df)
     
-    # 6. Save summary
+    # 7. Save summary
     summary = save_analysis_summary(gene_df, susc_df)
     
     print("\n" + "=" * 70)
@@ -0,0 +1,205 @@
+"""
+Precomputed Year x Center x Pathogen Cube for the Dashboard
+Parses the granular surveillance table once and aggregates it into one row per
+(year, center, pathogen) cell. The dashboard reads slices of this cube instead
+of re-parsing and re-grouping the raw records on every widget interaction.
+
+The cube is written to Parquet with one row group per year, so a year filter
+only reads that year's cells. Every measure is additive (or a max), so any
+roll-up is a groupby-sum of the slice.
+
+Measures per cell:
+- Records:                   source rows
+- Resistance_N/_Sum/_SumSq/_Max: rows with a parsed resistance %, their sum, sum of
+                             squares and maximum
+- Weight_Sum/Weighted_Sum:   isolates behind those rows, and sum(resistance x isolates)
+                             (each row weighs 1 when the source has no isolate counts)
+
+The build also fits one resistance-on-year OLS trend per pathogen from these
+sums (closed form, all pathogens at once; identical to a fit on the raw rows)
+and stores the fitted line with its confidence band for every year.
+
+Usage:
+    python src/dashboard_cube.py                # (re)build the cube and data/processed/dashboard_trends.parquet
+
+    from dashboard_cube import load_cube, rollup
+    rollup(load_cube(Year=2022), ['Center_Name'])
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from scipy import stats
+from data_cache import BASE_DIR, HAS_PARQUET, load_source, temp_path
+from resistance_parser import parse_resistance_strings
+
+SOURCE_PATH = os.path.join(BASE_DIR, "data", "raw", "dataset_3_granular.csv")
+CUBE_PATH = os.path.join(BASE_DIR, "data", "processed", "dashboard_cube.parquet" if HAS_PARQUET else "dashboard_cube.csv")
+TREND_PATH = os.path.join(BASE_DIR, "data", "processed", "dashboard_trends.parquet" if HAS_PARQUET else "dashboard_trends.csv")
+
+CUBE_DIMS = ['Year', 'Center_Name', 'Pathogen']
+CUBE_MEASURES = ['Records', 'Resistance_N', 'Resistance_Sum', 'Resistance_SumSq', 'Resistance_Max',
+                 'Weight_Sum', 'Weighted_Sum']
+
+TREND_COLUMNS = ['Pathogen', 'Year', 'N', 'Intercept', 'Slope', 'Slope_SE', 'Slope_PValue', 'R_Squared',
+                 'Fitted', 'CI_Lower', 'CI_Upper']
+
+# Isolate-count column used as the weight when the source has one
+WEIGHT_COLUMN = 'Total_Isolates'
+
+
+def cube_cells(df, weight=WEIGHT_COLUMN):
+    """Aggregate source records (Year, Center_Name, Pathogen, Resistance) into cube cells."""
+    d = df[CUBE_DIMS].copy()
+    res = pd.to_numeric(df['Resistance'], errors='coerce')
+    w = pd.to_numeric(df[weight], errors='coerce') if weight in df else pd.Series(1.0, index=d.index)
+    quoted = res.notna() & w.notna()
+    d['Records'] = 1
+    d['Resistance_N'] = res.notna().astype(int)
+    d['Resistance_Sum'] = res.fillna(0)
+    d['Resistance_SumSq'] = (res ** 2).fillna(0)
+    d['Resistance_Max'] = res
+    d['Weight_Sum'] = w.where(quoted, 0)
+    d['Weighted_Sum'] = (res * w).where(quoted, 0)
+
+    grouped = d.dropna(subset=CUBE_DIMS).groupby(CUBE_DIMS, sort=True)
+    cube = grouped[[m for m in CUBE_MEASURES if m != 'Resistance_Max']].sum()
+    cube['Resistance_Max'] = grouped['Resistance_Max'].max()
+    cube = cube[CUBE_MEASURES].reset_index()
+    cube['Year'] = cube['Year'].astype(int)
+    return cube
+
+
+def build_dashboard_cube(source=SOURCE_PATH, out_path=CUBE_PATH, weight=WEIGHT_COLUMN, trend_path=TREND_PATH):
+    """
+    Parse the source, aggregate it and write the cube (Parquet row group per year)
+    and the per-pathogen trend lines. Returns the cube.
+    """
+    df = load_source(source)
+    if 'Resistance' not in df.columns:
+        df['Resistance'] = parse_resistance_strings(df['Resistance_Percentage'], ambiguous='direct')['Resistance_Pct']
+    cube = cube_cells(df, weight)
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = temp_path(out_path)
+    if out_path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(cube, preserve_index=False)
+        with pq.ParquetWriter(tmp_path, table.schema) as writer:
+            for year in cube['Year'].unique():
+                writer.write_table(pa.Table.from_pandas(cube[cube['Year'] == year], schema=table.schema,
+                                                        preserve_index=False))
+    else:
+        cube.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, out_path)
+
+    trends = trend_lines(cube)
+    if trend_path.endswith('.parquet'):
+        trends.to_parquet(trend_path, index=False)
+    else:
+        trends.to_csv(trend_path, index=False)
+    print(f"Built dashboard cube ({len(df)} records -> {len(cube)} cells) -> {os.path.relpath(out_path, BASE_DIR)}")
+    return cube
+
+
+def ensure_cube(source=SOURCE_PATH, path=CUBE_PATH, trend_path=TREND_PATH):
+    """Build the cube and trend lines if missing or older than their source. Returns the cube path."""
+    stale = [p for p in (path, trend_path) if not os.path.exists(p) or os.path.getmtime(p) < os.path.getmtime(source)]
+    if stale:
+        build_dashboard_cube(source, path, trend_path=trend_path)
+    return path
+
+
+def load_cube(path=CUBE_PATH, columns=None, **filters):
+    """
+    Read the cube cells matching every filter, e.g. load_cube(Year=2022) or
+    load_cube(Pathogen='E. coli', Center_Name=['AIIMS']). With Parquet only the
+    row groups that can match a Year filter are read.
+    """
+    conditions = []
+    for dim, values in filters.items():
+        values = list(values) if isinstance(values, (list, tuple, set)) else [values]
+        conditions.append((dim, 'in', values))
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns, filters=conditions or None)
+    cube = pd.read_csv(path, usecols=columns)
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, _, values in conditions:
+        mask &= cube[dim].isin(values).to_numpy()
+    return cube[mask].reset_index(drop=True)
+
+
+def rollup(cube, by):
+    """
+    Sum cube cells over every dimension not in `by`. Adds Mean_Resistance and
+    Weighted_Resistance (NaN where no resistance was parsed).
+    """
+    grouped = cube.groupby(list(by), sort=True)
+    result = grouped[[m for m in CUBE_MEASURES if m != 'Resistance_Max']].sum()
+    result['Resistance_Max'] = grouped['Resistance_Max'].max()
+    result['Mean_Resistance'] = result['Resistance_Sum'] / result['Resistance_N'].where(result['Resistance_N'] > 0)
+    result['Weighted_Resistance'] = result['Weighted_Sum'] / result['Weight_Sum'].where(result['Weight_Sum'] > 0)
+    return result.reset_index()
+
+
+def trend_lines(cube, by='Pathogen', alpha=0.05):
+    """
+    OLS trend of resistance on year for every group of `by`, with a (1 - alpha)
+    confidence band for the mean, at each year in the group's observed range.
+
+    All rows in a cell share one year, so the fit on the raw rows only needs
+    each group's sums of N, x, x^2, y, xy and y^2. Every group is solved at
+    once from those sums. Groups with fewer than three values or a single year
+    are left out.
+    """
+    c = cube[cube['Resistance_N'] > 0]
+    # Years are shifted to start at 0 so the sums of squares do not lose precision
+    origin = c['Year'].min()
+    x = (c['Year'] - origin).astype('float64')
+    sums = pd.DataFrame({
+        by: c[by], 'N': c['Resistance_N'], 'Sx': x * c['Resistance_N'], 'Sxx': x ** 2 * c['Resistance_N'],
+        'Sy': c['Resistance_Sum'], 'Sxy': x * c['Resistance_Sum'], 'Syy': c['Resistance_SumSq'],
+        'Year_Min': c['Year'], 'Year_Max': c['Year'],
+    }).groupby(by, sort=True).agg({'N': 'sum', 'Sx': 'sum', 'Sxx': 'sum', 'Sy': 'sum', 'Sxy': 'sum', 'Syy': 'sum',
+                                   'Year_Min': 'min', 'Year_Max': 'max'})
+
+    n = sums['N'].to_numpy(dtype='float64')
+    x_mean = sums['Sx'].to_numpy() / n
+    y_mean = sums['Sy'].to_numpy() / n
+    sxx = sums['Sxx'].to_numpy() - n * x_mean ** 2
+    sxy = sums['Sxy'].to_numpy() - n * x_mean * y_mean
+    syy = sums['Syy'].to_numpy() - n * y_mean ** 2
+    df_resid = n - 2
+    valid = (df_resid > 0) & (sxx > 1e-9)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / sxx
+        intercept = y_mean - slope * (x_mean + origin)
+        sigma2 = np.clip(syy - slope * sxy, 0, None) / df_resid
+        slope_se = np.sqrt(sigma2 / sxx)
+        r_squared = np.where(syy > 0, slope * sxy / syy, np.nan)
+        pval = 2 * stats.t.sf(np.abs(slope / slope_se), df_resid)
+        t_crit = stats.t.ppf(1 - alpha / 2, df_resid)
+
+    # One row per fitted group and year in its range
+    counts = np.where(valid, (sums['Year_Max'] - sums['Year_Min'] + 1).to_numpy(), 0)
+    g = np.repeat(np.arange(len(sums)), counts)
+    starts = np.cumsum(counts) - counts
+    years = sums['Year_Min'].to_numpy()[g] + np.arange(len(g)) - starts[g]
+    dx = years - origin - x_mean[g]
+    fitted = y_mean[g] + slope[g] * dx
+    half = t_crit[g] * np.sqrt(sigma2[g] * (1 / n[g] + dx ** 2 / sxx[g]))
+    return pd.DataFrame({
+        by: sums.index.to_numpy()[g], 'Year': years.astype(int), 'N': n[g].astype(int),
+        'Intercept': intercept[g], 'Slope': slope[g], 'Slope_SE': slope_se[g], 'Slope_PValue': pval[g],
+        'R_Squared': r_squared[g], 'Fitted': fitted, 'CI_Lower': fitted - half, 'CI_Upper': fitted + half,
+    }, columns=[by] + TREND_COLUMNS[1:])
+
+
+def load_trends(path=TREND_PATH):
+    """Read the precomputed trend lines."""
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+if __name__ == "__main__":
+    build_dashboard_cube()
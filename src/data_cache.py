@@ -0,0 +1,203 @@
+"""
+Columnar Parquet Cache for Raw Inputs
+Converts each raw CSV/XLSX source once into a typed Parquet file keyed by the
+source file's content hash. Later reads load the Parquet copy; the cache is
+rebuilt only when the source file changes.
+
+Usage:
+    from data_cache import load_source
+    df = load_source('data/raw/dataset_3_granular.csv')
+    df_excel = load_source(excel_path, sheet_name='Table 1')
+
+Run directly to (re)build the cache for all raw inputs:
+    python src/data_cache.py
+"""
+
+import os
+import hashlib
+import re
+import tempfile
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache")
+
+# Bump when the conversion logic changes so stale caches are rebuilt
+CACHE_VERSION = 1
+
+# String columns with at most this share of distinct values are stored as categories
+CATEGORY_MAX_RATIO = 0.5
+
+# Rows per chunk when streaming a source with iter_source()
+STREAM_CHUNK_ROWS = 100_000
+
+# Raw inputs read by the analysis scripts: (file name, sheet name)
+RAW_SOURCES = [
+    ("dataset_1_epidemiology.csv", None),
+    ("dataset_2_molecular.csv", None),
+    ("dataset_3_granular.csv", None),
+    ("Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx", "Table 1"),
+]
+
+_hash_memo = {}
+_warned = False
+
+# Process umask, read once (os.umask can only be read by setting it)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents (memoized per path/size/mtime within a process)."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                h.update(chunk)
+        _hash_memo[key] = h.hexdigest()
+    return _hash_memo[key]
+
+
+def temp_path(out_path):
+    """
+    A new, unique temporary file next to out_path, to be moved over it with
+    os.replace. Processes writing the same output never share a temp file.
+    The file gets the usual umask permissions (mkstemp alone gives 0600).
+    """
+    fd, path = tempfile.mkstemp(dir=os.path.dirname(out_path), prefix=os.path.basename(out_path) + '.', suffix='.tmp')
+    os.close(fd)
+    os.chmod(path, 0o666 & ~_UMASK)
+    return path
+
+
+def _cache_stem(path, sheet_name=None):
+    """File-name prefix shared by all cache versions of one source (and sheet)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if sheet_name is not None:
+        stem = f"{stem}__{sheet_name}"
+    return re.sub(r'[^\w.-]+', '_', stem)
+
+
+def cache_path(path, sheet_name=None):
+    """Parquet path for the current contents of a source file."""
+    digest = file_hash(path)[:16]
+    return os.path.join(CACHE_DIR, f"{_cache_stem(path, sheet_name)}-v{CACHE_VERSION}-{digest}.parquet")
+
+
+def _read_raw(path, sheet_name=None, **read_kwargs):
+    """Read the source with the same pandas reader the scripts used."""
+    if path.lower().endswith(('.xlsx', '.xls')):
+        return pd.read_excel(path, sheet_name=sheet_name if sheet_name is not None else 0, **read_kwargs)
+    return pd.read_csv(path, **read_kwargs)
+
+
+def encode_types(df):
+    """Give columns compact Parquet-friendly types (categories for repeated strings)."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+            continue
+        values = df[col].dropna()
+        # Mixed str/number cells (common in Excel) are stored as text
+        if not values.map(lambda v: isinstance(v, str)).all():
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        n_unique = df[col].nunique(dropna=True)
+        if len(df) and n_unique <= max(1, CATEGORY_MAX_RATIO * len(df)):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def decode_categories(df):
+    """Turn categorical columns back into plain columns of their category type."""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+def _remove_stale(path, sheet_name, keep):
+    """Delete older cache files of the same source."""
+    prefix = _cache_stem(path, sheet_name) + "-v"
+    for fname in os.listdir(CACHE_DIR):
+        full = os.path.join(CACHE_DIR, fname)
+        if fname.startswith(prefix) and fname.endswith('.parquet') and full != keep:
+            os.remove(full)
+
+
+def build_cache(path, sheet_name=None, force=False):
+    """Convert one source to Parquet if its cache is missing or stale. Returns the cache path."""
+    out_path = cache_path(path, sheet_name)
+    if os.path.exists(out_path) and not force:
+        return out_path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df = encode_types(_read_raw(path, sheet_name))
+    tmp_path = temp_path(out_path)
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, out_path)
+    _remove_stale(path, sheet_name, keep=out_path)
+    print(f"Cached {os.path.basename(path)}{' [' + sheet_name + ']' if sheet_name else ''} -> {os.path.relpath(out_path, BASE_DIR)}")
+    return out_path
+
+
+def load_source(path, sheet_name=None, categorical=False, columns=None):
+    """
+    Load a raw CSV/XLSX source through the Parquet cache.
+
+    Returns the same frame pd.read_csv / pd.read_excel would. With
+    categorical=True, repeated string columns stay pandas categoricals.
+    Falls back to reading the source directly when pyarrow is not installed.
+    """
+    global _warned
+    if not HAS_PARQUET:
+        if not _warned:
+            print("Warning: pyarrow not installed, reading raw sources without the Parquet cache.")
+            _warned = True
+        df = _read_raw(path, sheet_name)
+        return df[columns] if columns is not None else df
+
+    df = pd.read_parquet(build_cache(path, sheet_name), columns=columns)
+    return df if categorical else decode_categories(df)
+
+
+def iter_source(path, sheet_name=None, chunksize=STREAM_CHUNK_ROWS, columns=None):
+    """
+    Yield a raw source in row chunks so large exports never sit in memory at once.
+
+    Reads Parquet row batches from the cache; without pyarrow, CSVs are read in
+    chunks and Excel sheets in one piece.
+    """
+    if HAS_PARQUET:
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(build_cache(path, sheet_name))
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield decode_categories(batch.to_pandas())
+    elif path.lower().endswith(('.xlsx', '.xls')):
+        yield load_source(path, sheet_name, columns=columns)
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def build_all(force=False):
+    """Build (or refresh) the cache for every raw input in RAW_SOURCES."""
+    for fname, sheet in RAW_SOURCES:
+        path = os.path.join(RAW_DIR, fname)
+        if os.path.exists(path):
+            build_cache(path, sheet, force=force)
+        else:
+            print(f"Warning: {fname} not found, skipped.")
+
+
+if __name__ == "__main__":
+    if not HAS_PARQUET:
+        print("pyarrow is required to build the Parquet cache.")
+    else:
+        build_all()
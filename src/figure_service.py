@@ -0,0 +1,181 @@
+"""
+Parallel Figure Rendering with a Content-Addressed Cache
+Figure jobs are plain functions that draw and return a matplotlib Figure
+(or None when there is nothing to draw).
+Each job is keyed by a hash of its plotting function, the source file that
+defines it (helpers, colour maps and labels it uses), the matplotlib version,
+input data, the caller's matplotlib style and the save options. Rendered files are stored
+once in data/cache/figures under that key. Later runs copy the cached file
+instead of drawing again. Jobs that need drawing run in a process pool.
+
+Usage:
+    from figure_service import figure_job, render_figures
+    jobs = [figure_job(plot_trends, df, outputs={'fig1.png': {'dpi': 300}, 'fig1.pdf': {}})]
+    render_figures(jobs)
+"""
+
+import os
+import hashlib
+import inspect
+import shutil
+import numpy as np
+import pandas as pd
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from joblib import Parallel, delayed
+from data_cache import temp_path
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIGURE_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "figures")
+
+# Bump when the key or save logic changes so old cache entries are ignored
+FIGURE_CACHE_VERSION = 2
+
+# rcParams that never affect the rendered output
+_IGNORED_RC = {'backend', 'backend_fallback', 'interactive', 'figure.max_open_warning'}
+
+_module_digests = {}
+
+
+def figure_job(func, *args, outputs, **kwargs):
+    """Describe one figure: func(*args, **kwargs) -> Figure, saved to {path: savefig kwargs}."""
+    return {'func': func, 'args': args, 'kwargs': kwargs, 'outputs': dict(outputs)}
+
+
+def current_style():
+    """rcParams the caller changed from the matplotlib defaults (style, fonts, DPI)."""
+    style = {}
+    for key, value in mpl.rcParams.items():
+        if key in _IGNORED_RC:
+            continue
+        try:
+            changed = value != mpl.rcParamsDefault[key]
+            changed = bool(np.all(changed))
+        except (KeyError, ValueError):
+            changed = True
+        if changed:
+            style[key] = value
+    return style
+
+
+def _update_hash(h, obj):
+    """Feed a stable representation of plotting inputs into the hash."""
+    if isinstance(obj, pd.DataFrame):
+        h.update(repr((list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        h.update(repr((obj.name, str(obj.dtype))).encode())
+        h.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b'{')
+        for key in sorted(obj, key=repr):
+            _update_hash(h, key)
+            _update_hash(h, obj[key])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'[')
+        for item in obj:
+            _update_hash(h, item)
+        h.update(b']')
+    else:
+        h.update(repr(obj).encode())
+
+
+def _function_source(func):
+    """Source text of the plotting function (bytecode when the source is unavailable)."""
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return repr(func.__code__.co_code)
+
+
+def _module_digest(func):
+    """SHA-256 of the file defining the plotting function ('' when it has no source file)."""
+    try:
+        path = inspect.getsourcefile(func)
+    except TypeError:
+        path = None
+    if not path or not os.path.exists(path):
+        return ''
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _module_digests:
+        with open(path, 'rb') as f:
+            _module_digests[key] = hashlib.sha256(f.read()).hexdigest()
+    return _module_digests[key]
+
+
+def job_key(job, style):
+    """Content hash identifying a job's rendered output."""
+    h = hashlib.sha256()
+    h.update(f"v{FIGURE_CACHE_VERSION}:{job['func'].__qualname__}:mpl{mpl.__version__}\n".encode())
+    h.update(_function_source(job['func']).encode())
+    h.update(_module_digest(job['func']).encode())
+    _update_hash(h, job['args'])
+    _update_hash(h, job['kwargs'])
+    _update_hash(h, style)
+    return h.hexdigest()
+
+
+def cached_files(job, key):
+    """Cache file for each output, keyed by the job hash plus that output's save options."""
+    files = {}
+    for path, save_kwargs in job['outputs'].items():
+        h = hashlib.sha256(key.encode())
+        ext = os.path.splitext(path)[1].lower()
+        _update_hash(h, (ext, save_kwargs))
+        files[path] = os.path.join(FIGURE_CACHE_DIR, h.hexdigest()[:32] + ext)
+    return files
+
+
+def _render(job, files, style):
+    """Draw one figure and save every requested format into the cache (False if nothing to draw)."""
+    with plt.rc_context(style):
+        fig = job['func'](*job['args'], **job['kwargs'])
+        if fig is None:
+            return False
+        for path, save_kwargs in job['outputs'].items():
+            tmp_path = temp_path(files[path])
+            fig.savefig(tmp_path, format=os.path.splitext(path)[1][1:], **save_kwargs)
+            os.replace(tmp_path, files[path])
+        plt.close(fig)
+    return True
+
+
+def render_figures(jobs, n_jobs=-1, force=False):
+    """
+    Render figure jobs, skipping any whose cached output is up to date.
+
+    Jobs that need drawing are rendered in parallel worker processes with the
+    caller's matplotlib style. A plotting function may return None when it has
+    nothing to draw. Returns 'cached', 'rendered' or 'skipped' for each job.
+    """
+    os.makedirs(FIGURE_CACHE_DIR, exist_ok=True)
+    style = current_style()
+    files = [cached_files(job, job_key(job, style)) for job in jobs]
+    todo = [i for i, f in enumerate(files) if force or not all(os.path.exists(p) for p in f.values())]
+
+    if len(todo) == 1:
+        drawn = [_render(jobs[todo[0]], files[todo[0]], style)]
+    elif todo:
+        drawn = Parallel(n_jobs=min(len(todo), os.cpu_count() if n_jobs == -1 else n_jobs))(
+            delayed(_render)(jobs[i], files[i], style) for i in todo
+        )
+    else:
+        drawn = []
+    skipped = {i for i, ok in zip(todo, drawn) if not ok}
+
+    statuses = []
+    for i, job in enumerate(jobs):
+        if i in skipped:
+            statuses.append('skipped')
+            continue
+        for path, cached in files[i].items():
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            shutil.copyfile(cached, path)
+            print(f"  Saved: {path}{'' if i in todo else ' (cached)'}")
+        statuses.append('rendered' if i in todo else 'cached')
+    return statuses
@@ -0,0 +1,220 @@
+"""
+Offline Gazetteer for Indian Hospitals, Cities and Districts
+Resolves free-text facility names such as "AIIMS (RC01)", "Nodal: PGIMER, Chandigarh"
+or "Regional Center 20" to a canonical place and its coordinates, without a
+network geocoder.
+
+The gazetteer table (data/gazetteer/india_gazetteer.csv) is compiled once into
+an on-disk index (data/cache) of normalized names, aliases, ICMR regional-center
+codes and character trigram postings. Lookups try, in order: an RC code, an
+exact normalized name or alias, trigram (Dice) similarity, and finally a city
+or district named inside the text. Results are memoized per input string.
+
+Usage:
+    from gazetteer import lookup, resolve
+    lookup('AIIMS (RC01)')            # -> Place(name='AIIMS New Delhi', ...)
+    resolve(df['Center_Name'])        # -> DataFrame with Latitude/Longitude per row
+"""
+
+import os
+import re
+import pickle
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from data_cache import CACHE_DIR, file_hash, temp_path
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAZETTEER_PATH = os.path.join(BASE_DIR, "data", "gazetteer", "india_gazetteer.csv")
+
+# Bump when normalization or the index layout changes
+INDEX_VERSION = 1
+
+# Minimum trigram Dice similarity for a fuzzy match
+MIN_SCORE = 0.7
+
+# Longest word run tried when falling back to a city/district named inside the text
+MAX_PHRASE_WORDS = 3
+
+# Preferred entry type when two entries score the same
+TYPE_PRIORITY = {'hospital': 0, 'city': 1, 'district': 2}
+
+# "RC01", "RC 1", "Regional Center 20", "Regional Centre 04"
+RC_PATTERN = re.compile(r'\b(?:rc|regional\s+cent(?:er|re))\s*[-#]?\s*0*(\d{1,3})\b', re.IGNORECASE)
+
+# Words that carry no location information
+STOPWORDS = {'the', 'of', 'and', 'nodal', 'center', 'centre'}
+
+Place = namedtuple('Place', ['name', 'type', 'city', 'state', 'latitude', 'longitude', 'score'])
+
+_index = None
+
+
+def normalize_name(name):
+    """Lower-case, drop bracketed notes, punctuation and stopwords."""
+    text = str(name).lower().replace('&', ' and ')
+    text = re.sub(r'\([^)]*\)', ' ', text)
+    text = re.sub(r'^\s*nodal\s*:', ' ', text)
+    text = re.sub(r"[^a-z0-9]+", ' ', text)
+    return ' '.join(w for w in text.split() if w not in STOPWORDS)
+
+
+def trigrams(text):
+    """Character trigrams of a normalized name (padded so short names still match)."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def rc_code(name):
+    """Return the canonical 'RC<n>' code mentioned in a name, or None."""
+    match = RC_PATTERN.search(str(name))
+    return f"RC{int(match.group(1))}" if match else None
+
+
+def _index_path():
+    return os.path.join(CACHE_DIR, f"gazetteer-v{INDEX_VERSION}-{file_hash(GAZETTEER_PATH)[:16]}.pkl")
+
+
+def build_index(force=False):
+    """Compile the gazetteer CSV into the on-disk lookup index. Returns the index path."""
+    out_path = _index_path()
+    if os.path.exists(out_path) and not force:
+        return out_path
+
+    places = pd.read_csv(GAZETTEER_PATH, dtype={'RC_Code': 'string', 'Aliases': 'string'})
+    places['Priority'] = places['Type'].map(TYPE_PRIORITY).fillna(len(TYPE_PRIORITY))
+
+    # Every name and alias becomes a key pointing at its place row
+    keys, key_place = [], []
+    for i, row in enumerate(places.itertuples(index=False)):
+        aliases = row.Aliases.split('|') if pd.notna(row.Aliases) else []
+        for label in [row.Name] + aliases:
+            key = normalize_name(label)
+            if key and key not in keys:
+                keys.append(key)
+                key_place.append(i)
+
+    postings = {}
+    for k, key in enumerate(keys):
+        for gram in trigrams(key):
+            postings.setdefault(gram, []).append(k)
+
+    index = {
+        'places': list(places[['Name', 'Type', 'City', 'State', 'Latitude', 'Longitude']].itertuples(index=False, name=None)),
+        'types': places['Type'].to_numpy(),
+        'priority': places['Priority'].to_numpy(),
+        'exact': {key: key_place[k] for k, key in enumerate(keys)},
+        'rc_codes': {code: i for i, code in enumerate(places['RC_Code']) if pd.notna(code)},
+        'key_place': np.array(key_place),
+        'key_sizes': np.array([len(trigrams(key)) for key in keys]),
+        'postings': {gram: np.array(ids) for gram, ids in postings.items()},
+    }
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = temp_path(out_path)
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f)
+    os.replace(tmp_path, out_path)
+    print(f"Built gazetteer index ({len(places)} places, {len(keys)} names) -> {os.path.relpath(out_path, BASE_DIR)}")
+    return out_path
+
+
+def load_index():
+    """Load (building if needed) the gazetteer index, once per process."""
+    global _index
+    if _index is None:
+        with open(build_index(), 'rb') as f:
+            _index = pickle.load(f)
+    return _index
+
+
+def _place(i, score):
+    name, kind, city, state, lat, lon = load_index()['places'][i]
+    return Place(name, kind, city, state, float(lat), float(lon), score)
+
+
+def _fuzzy(key, min_score):
+    """Best place by trigram Dice similarity, or None below min_score."""
+    index = load_index()
+    grams = trigrams(key)
+    hits = [index['postings'][g] for g in grams if g in index['postings']]
+    if not hits:
+        return None
+    overlap = np.bincount(np.concatenate(hits), minlength=len(index['key_sizes']))
+    scores = 2 * overlap / (len(grams) + index['key_sizes'])
+    best = scores.max()
+    if best < min_score:
+        return None
+    # Ties go to the higher-priority entry type (hospital before city before district)
+    tied = index['key_place'][np.flatnonzero(scores == best)]
+    priority = index['priority'][tied]
+    return _place(int(tied[np.argmin(priority)]), float(best))
+
+
+def _named_area(key):
+    """City or district named verbatim inside the text (e.g. "... hospital mumbai"), or None."""
+    index = load_index()
+    words = key.split()
+    for size in range(min(MAX_PHRASE_WORDS, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            phrase = ' '.join(words[start:start + size])
+            i = index['exact'].get(phrase)
+            if i is not None and index['types'][i] != 'hospital':
+                return _place(i, 2 * len(trigrams(phrase)) / (len(trigrams(key)) + len(trigrams(phrase))))
+    return None
+
+
+def lookup_rc(code):
+    """Place for an ICMR regional-center code such as 'RC1' or 'RC01', or None."""
+    index = load_index()
+    i = index['rc_codes'].get(rc_code(code))
+    return _place(i, 1.0) if i is not None else None
+
+
+def rc_places():
+    """All regional centers as a lookup table: RC_Code, Center_Name, Latitude, Longitude."""
+    index = load_index()
+    rows = [(code,) + tuple(index['places'][i][k] for k in (0, 4, 5)) for code, i in index['rc_codes'].items()]
+    return pd.DataFrame(rows, columns=['RC_Code', 'Center_Name', 'Latitude', 'Longitude'])
+
+
+@lru_cache(maxsize=None)
+def lookup(name, min_score=MIN_SCORE):
+    """Resolve one free-text place name to a Place, or None when nothing matches."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return None
+    index = load_index()
+
+    code = rc_code(name)
+    if code in index['rc_codes']:
+        return _place(index['rc_codes'][code], 1.0)
+
+    key = normalize_name(name)
+    if not key:
+        return None
+    if key in index['exact']:
+        return _place(index['exact'][key], 1.0)
+    return _fuzzy(key, min_score) or _named_area(key)
+
+
+def resolve(names, min_score=MIN_SCORE):
+    """
+    Resolve a column of names. Returns a DataFrame (same index) with
+    Gazetteer_Name, Place_Type, Latitude, Longitude and Match_Score (NaN if unmatched).
+    Each distinct name is looked up once.
+    """
+    codes, uniques = pd.factorize(pd.Series(names), use_na_sentinel=True)
+    rows = []
+    for name in uniques:
+        place = lookup(name, min_score)
+        rows.append((place.name, place.type, place.latitude, place.longitude, place.score)
+                    if place else (None, None, np.nan, np.nan, np.nan))
+    rows.append((None, None, np.nan, np.nan, np.nan))
+    table = pd.DataFrame(rows, columns=['Gazetteer_Name', 'Place_Type', 'Latitude', 'Longitude', 'Match_Score'])
+    result = table.iloc[np.where(codes == -1, len(uniques), codes)]
+    result.index = names.index if isinstance(names, pd.Series) else pd.RangeIndex(len(result))
+    return result
+
+
+if __name__ == "__main__":
+    build_index(force=True)
@@ -0,0 +1,117 @@
+"""
+Sparse Gene x Organism x Year Prevalence Cube
+Aggregates gene detections (one row per report x gene) once into a cube over
+gene, organism, year, specimen and clinical setting. Only observed cells are
+stored, in coordinate form (one row per non-empty cell, categorical dimension
+columns). Every measure is additive, so roll-ups to any subset of dimensions
+are a single groupby-sum. Mean and isolate-weighted prevalence are derived
+after the roll-up.
+
+Measures per cell:
+- Detections:        reports naming the gene
+- Isolates:          culture-positive isolates behind those reports
+- Prevalence_N/_Sum: reports quoting a prevalence, and the sum of those values
+- Weighted_N/_Sum:   isolates behind reports quoting a prevalence, and sum(prevalence x isolates)
+
+Usage:
+    from gene_cube import build_cube, rollup, slice_cube
+    cube = build_cube(gene_df)
+    rollup(slice_cube(cube, Gene=['NDM', 'OXA-48']), ['Year', 'Gene'])
+"""
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMS = ['Gene', 'Organism', 'Year', 'Specimen', 'Setting']
+CUBE_MEASURES = ['Detections', 'Isolates', 'Prevalence_N', 'Prevalence_Sum', 'Weighted_N', 'Weighted_Sum']
+
+# Label for a missing specimen / setting / organism
+UNKNOWN = 'Unknown'
+
+
+def build_cube(detections, dims=CUBE_DIMS, value='Prevalence', weight='Isolates'):
+    """Aggregate detection rows into the sparse cube (one row per observed cell)."""
+    d = detections[dims].copy()
+    for dim in dims:
+        if d[dim].dtype.kind not in 'iuf':
+            d[dim] = d[dim].astype('string').fillna(UNKNOWN)
+
+    prev = detections[value].astype('float64')
+    w = pd.to_numeric(detections[weight], errors='coerce') if weight in detections else pd.Series(np.nan, index=d.index)
+    quoted = prev.notna() & w.notna()
+    d['Detections'] = 1
+    d['Isolates'] = w.fillna(0)
+    d['Prevalence_N'] = prev.notna().astype(int)
+    d['Prevalence_Sum'] = prev.fillna(0)
+    d['Weighted_N'] = w.where(quoted, 0)
+    d['Weighted_Sum'] = (prev * w).where(quoted, 0)
+
+    cube = d.groupby(dims, sort=True)[CUBE_MEASURES].sum().reset_index()
+    for dim in dims:
+        if cube[dim].dtype.kind not in 'iuf':
+            cube[dim] = cube[dim].astype('category')
+    return cube
+
+
+def slice_cube(cube, **filters):
+    """Cells matching every filter, e.g. slice_cube(cube, Gene='NDM', Year=[2022, 2024])."""
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, values in filters.items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        mask &= cube[dim].isin(values).to_numpy()
+    return cube[mask]
+
+
+def rollup(cube, by):
+    """
+    Sum the cube over every dimension not in `by`. Adds Mean_Prevalence (mean of the
+    quoted prevalences) and Weighted_Prevalence (isolate-weighted), NaN where none was quoted.
+    """
+    result = cube.groupby(list(by), observed=True, sort=True)[CUBE_MEASURES].sum()
+    result['Mean_Prevalence'] = result['Prevalence_Sum'] / result['Prevalence_N'].where(result['Prevalence_N'] > 0)
+    result['Weighted_Prevalence'] = result['Weighted_Sum'] / result['Weighted_N'].where(result['Weighted_N'] > 0)
+    return result
+
+
+def wilson_interval(p, n, z=1.96):
+    """Wilson score interval for proportions p (0-1) out of n trials; NaN where n is 0."""
+    p = np.asarray(p, dtype='float64')
+    n = np.asarray(n, dtype='float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = 1 + z ** 2 / n
+        center = (p + z ** 2 / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def weighted_prevalence(detections, by, z=1.96):
+    """
+    Isolate-weighted gene prevalence per group of detection rows (e.g. organism x year x gene).
+    Weighted_N is the denominator (isolates behind reports quoting a prevalence),
+    Positive_Isolates the implied gene-positive isolates, and CI_Lower/CI_Upper a
+    Wilson interval in percent. Isolates are treated as independent (no allowance
+    for clustering within centers), so the intervals are a lower bound on the uncertainty.
+    """
+    result = rollup(build_cube(detections, dims=list(by)), by)
+    result['Positive_Isolates'] = result['Weighted_Sum'] / 100
+    lower, upper = wilson_interval(result['Weighted_Prevalence'] / 100, result['Weighted_N'], z)
+    result['CI_Lower'] = lower * 100
+    result['CI_Upper'] = upper * 100
+    return result
+
+
+def save_cube(cube, path):
+    """Write the cube to Parquet (or CSV when the path ends in .csv)."""
+    if path.endswith('.parquet'):
+        cube.to_parquet(path, index=False)
+    else:
+        cube.to_csv(path, index=False)
+
+
+def load_cube(path):
+    """Read a saved cube, restoring categorical dimensions."""
+    cube = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    for dim in CUBE_DIMS:
+        if dim in cube and cube[dim].dtype.kind not in 'iuf':
+            cube[dim] = cube[dim].astype('category')
+    return cube
@@ -0,0 +1,121 @@
+"""
+Resistance-Gene Mention Matcher
+Finds resistance genes named in free-text mechanism strings such as
+"CTXM-15 (34%), OXA-1 (28%), NDM-1 (19%)" or "blaOXA-23 (predominant), blaNDM".
+
+The gene synonym table is compiled once into a single case-insensitive
+alternation (one named group per gene), so each text is scanned in one pass
+instead of once per gene. Every mention is reported with the prevalence
+quoted after it (if any) and its character span. Column functions parse each
+distinct string only once.
+
+Usage:
+    from gene_matcher import find_genes, gene_presence
+    find_genes('TEM (29.58%), NDM-1 (14.47%)')
+    # -> [Mention(gene='TEM', prevalence=29.58, span=(0, 3)), Mention(gene='NDM', prevalence=14.47, span=(14, 17))]
+    gene_presence(df['Resistance Mechanism/Gene Detected'])   # one row per (row, gene)
+"""
+
+import re
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Canonical gene -> synonym patterns (regex, matched case-insensitively).
+# Order is the reporting order; a gene's patterns must not match another gene's text.
+GENE_SYNONYMS = {
+    'NDM': ['NDM', 'NDM-1'],
+    'OXA-48': ['OXA-48', 'OXA48'],
+    'OXA-23': ['OXA-23', 'OXA23', 'blaOXA-23'],
+    'CTX-M-15': ['CTX-?M-?15', 'CTXM-15', 'CTXM15'],
+    'TEM': [r'\bTEM\b'],
+    'SHV': [r'\bSHV\b'],
+    'VIM': [r'\bVIM\b'],
+    'IMP': [r'\bIMP\b'],
+    'KPC': [r'\bKPC\b'],
+    'mecA': ['mecA'],
+    'vanA': ['vanA'],
+}
+
+# Prevalence quoted after a mention, before the next comma: "NDM-1 (14.47%)", "OXA-23 [~76 %]"
+PREVALENCE_PATTERN = re.compile(r'[^,]*?[\(\[]\s*(?:[^)\d]*?)(\d+\.?\d*)\s*%', re.IGNORECASE)
+
+# Cell contents with nothing to match
+MISSING_VALUES = ['nan', 'Not in source']
+
+MENTION_COLUMNS = ['Row', 'Gene', 'Prevalence', 'Start', 'End']
+
+Mention = namedtuple('Mention', ['gene', 'prevalence', 'span'])
+
+_matchers = {}
+
+
+def _first_chars(patterns):
+    """Letters/digits every match must start with, or None if a pattern starts with other syntax."""
+    chars = set()
+    for pattern in patterns:
+        head = pattern[2:] if pattern.startswith(r'\b') else pattern
+        if not head or not head[0].isalnum():
+            return None
+        chars.add(head[0].lower())
+    return chars
+
+
+def build_matcher(synonyms=GENE_SYNONYMS):
+    """Compile a synonym table into (pattern, group name -> gene); memoized per table."""
+    key = tuple((gene, tuple(patterns)) for gene, patterns in synonyms.items())
+    if key not in _matchers:
+        groups = {f'g{i}': gene for i, gene in enumerate(synonyms)}
+        alternation = '|'.join(f"(?P<{name}>{'|'.join(synonyms[gene])})" for name, gene in groups.items())
+        # Cheap first-character check so the alternation is only tried where a gene can start
+        first = _first_chars([p for patterns in synonyms.values() for p in patterns])
+        if first:
+            alternation = f"(?=[{''.join(sorted(first))}])(?:{alternation})"
+        _matchers[key] = (re.compile(alternation, re.IGNORECASE), groups)
+    return _matchers[key]
+
+
+def find_genes(text, synonyms=GENE_SYNONYMS):
+    """All gene mentions in one text, in reading order, as Mention(gene, prevalence, span)."""
+    if text is None or (isinstance(text, float) and np.isnan(text)) or str(text) in MISSING_VALUES:
+        return []
+    text = str(text)
+    pattern, groups = build_matcher(synonyms)
+    mentions = []
+    for match in pattern.finditer(text):
+        prev = PREVALENCE_PATTERN.match(text, match.end())
+        mentions.append(Mention(groups[match.lastgroup], float(prev.group(1)) if prev else None, match.span()))
+    return mentions
+
+
+def match_genes(texts, synonyms=GENE_SYNONYMS):
+    """
+    Every gene mention in a column of texts, one row per mention:
+    Row (index label of the text), Gene, Prevalence (NaN if none quoted), Start, End.
+    Each distinct text is scanned once.
+    """
+    texts = pd.Series(texts)
+    codes, uniques = pd.factorize(texts, use_na_sentinel=True)
+    parsed = [find_genes(text, synonyms) for text in uniques]
+    counts = np.array([len(p) for p in parsed] + [0])
+    rows = np.repeat(np.arange(len(texts)), counts[np.where(codes == -1, len(uniques), codes)])
+    flat = [m for i in codes[codes != -1] for m in parsed[i]]
+    return pd.DataFrame({
+        'Row': texts.index[rows],
+        'Gene': pd.Categorical([m.gene for m in flat], categories=list(synonyms)),
+        'Prevalence': pd.Series([m.prevalence for m in flat], dtype='float64'),
+        'Start': pd.Series([m.span[0] for m in flat], dtype='int64'),
+        'End': pd.Series([m.span[1] for m in flat], dtype='int64'),
+    }, columns=MENTION_COLUMNS)
+
+
+def gene_presence(texts, synonyms=GENE_SYNONYMS):
+    """
+    One row per (text, gene detected), ordered by text then synonym-table order:
+    Row, Gene and Prevalence (first prevalence quoted for that gene, else NaN).
+    """
+    mentions = match_genes(texts, synonyms)
+    found = mentions.groupby(['Row', 'Gene'], observed=True, sort=False)['Prevalence'].first().reset_index()
+    # Rows come out in text order; sort genes within each row by table order
+    order = np.lexsort((found['Gene'].cat.codes, pd.factorize(found['Row'])[0]))
+    return found.iloc[order].reset_index(drop=True)
@@ -0,0 +1,335 @@
+"""
+Batched Segmented-Regression Engine for Interrupted Time Series
+Fits Y = b0 + b1*Time + b2*Intervention + b3*Time_After for many series at once.
+
+Series are pivoted onto a shared year axis and grouped by which years they
+observe. Each group shares one design matrix, so all of its series are solved
+together with a single pseudo-inverse (stacked least squares). Results match
+statsmodels OLS, including rank-deficient designs (e.g. no pre-intervention
+years), where the minimum-norm solution is used.
+
+Two autocorrelation-robust variants use the same batching: Newey-West (HAC)
+standard errors around the OLS fit, and an iterated Prais-Winsten AR(1) fit in
+which every series gets its own rho and the transformed designs are solved as
+one stacked pseudo-inverse.
+
+The same batched fit drives the placebo and permutation tests: one series is
+re-fitted for every candidate intervention year, and thousands of permuted
+copies of it (year order shuffled) give an empirical null distribution of the
+slope change for each candidate year.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from scipy import stats
+from joblib import Parallel, delayed
+
+# Coefficient names, in design-matrix column order
+ITS_TERMS = ['intercept', 'pre_slope', 'level_change', 'slope_change']
+
+# Fit-statistic columns of the results table, in order
+RESULT_COLUMNS = [f'{term}{suffix}' for term in ITS_TERMS
+                  for suffix in ('', '_se', '_pval', '_ci_lower', '_ci_upper')] + ['r_squared', 'durbin_watson']
+
+# Minimum number of years for a series to be fitted
+MIN_YEARS = 4
+
+# Estimators accepted by fit_its_batch / fit_its_series
+METHODS = ('ols', 'hac', 'prais_winsten')
+
+# Prais-Winsten iterations: stop when every rho moves less than AR1_TOL; |rho| is capped below 1
+AR1_MAX_ITER = 50
+AR1_TOL = 1e-8
+AR1_MAX_RHO = 0.99
+
+# Placebo scan: candidate intervention years need this many observed years on each side
+MIN_SEGMENT_YEARS = 2
+
+# Permutation test defaults; permuted series are fitted in chunks of this many columns
+N_PERMUTATIONS = 10_000
+PERMUTATION_SEED = 42
+PERMUTATION_CHUNK = 2_000
+
+
+def its_design(years, intervention_year=2016):
+    """
+    Build the ITS design matrix [1, Time, Intervention, Time_After] for sorted years.
+
+    Time counts observed periods (0, 1, 2, ...); Time_After is 0 before the
+    intervention and 0, 1, 2, ... from the first post-intervention period.
+    """
+    years = np.asarray(years)
+    n = len(years)
+    post = years >= intervention_year
+    time_after = np.zeros(n)
+    if post.any():
+        start = int(np.argmax(post))
+        time_after[start:] = np.arange(n - start)
+    return np.column_stack([np.ones(n), np.arange(n), post.astype(float), time_after])
+
+
+def newey_west_lags(n):
+    """Newey-West (1994) rule-of-thumb truncation lag for n observations."""
+    return int(np.floor(4 * (n / 100) ** (2 / 9)))
+
+
+def _hac_se(X, pinv, resid, maxlags):
+    """
+    Newey-West (Bartlett kernel) standard errors for every column of resid (k x n_series).
+    Same estimator as statsmodels cov_type='HAC' with use_correction=True; like
+    statsmodels, fit_its_batch takes their p-values and CIs from the normal distribution.
+    """
+    n, k = X.shape
+    # Per-observation scores x_t * u_t for every series: (n_series, n, k)
+    scores = resid.T[:, :, None] * X[None, :, :]
+    meat = np.einsum('mti,mtj->mij', scores, scores)
+    for lag in range(1, maxlags + 1):
+        gamma = np.einsum('mti,mtj->mij', scores[:, lag:], scores[:, :-lag])
+        meat += (1 - lag / (maxlags + 1)) * (gamma + gamma.transpose(0, 2, 1))
+    bread = pinv @ pinv.T
+    cov = bread[None] @ meat @ bread[None]
+    df_resid = n - np.linalg.matrix_rank(X)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov *= n / df_resid
+    return np.sqrt(np.clip(np.diagonal(cov, axis1=1, axis2=2), 0, None)).T
+
+
+def _prais_winsten(X, Y, max_iter=AR1_MAX_ITER, tol=AR1_TOL):
+    """
+    Iterated Prais-Winsten AR(1) fit of every column of Y on X.
+
+    Each series gets its own rho, so the transformed designs are stacked
+    (n_series x n x k) and solved together with a batched pseudo-inverse.
+    Returns beta (k x n_series), transformed residuals (n x n_series), the
+    stacked transformed-design pseudo-inverses and rho.
+    """
+    n, m = Y.shape
+    rho = np.zeros(m)
+    beta = np.linalg.pinv(X) @ Y
+    for _ in range(max_iter):
+        resid = Y - X @ beta
+        with np.errstate(divide='ignore', invalid='ignore'):
+            new_rho = (resid[1:] * resid[:-1]).sum(axis=0) / (resid[:-1] ** 2).sum(axis=0)
+        new_rho = np.clip(np.nan_to_num(new_rho), -AR1_MAX_RHO, AR1_MAX_RHO)
+        Xs, Ys = _ar1_transform(X, Y, new_rho)
+        pinvs = np.linalg.pinv(Xs)
+        beta = np.einsum('mkt,mt->km', pinvs, Ys)
+        converged = np.max(np.abs(new_rho - rho)) < tol
+        rho = new_rho
+        if converged:
+            break
+    resid_star = Ys.T - np.einsum('mtk,km->tm', Xs, beta)
+    return beta, resid_star, pinvs, rho
+
+
+def _ar1_transform(X, Y, rho):
+    """Prais-Winsten transform: (n_series x n x k) designs and (n_series x n) responses."""
+    Xs = np.repeat(X[None], len(rho), axis=0)
+    Ys = Y.T.copy()
+    r = rho[:, None]
+    Xs[:, 1:] -= r[:, :, None] * X[None, :-1]
+    Ys[:, 1:] -= r * Y.T[:, :-1]
+    scale = np.sqrt(1 - rho ** 2)
+    Xs[:, 0] *= scale[:, None]
+    Ys[:, 0] *= scale
+    return Xs, Ys
+
+
+def fit_its_batch(years, Y, intervention_year=2016, alpha=0.05, method='ols', maxlags=None):
+    """
+    Fit the ITS model to every column of Y (n_years x n_series) over the same years.
+
+    method: 'ols' (classical SEs), 'hac' (OLS with Newey-West SEs, maxlags defaults
+    to newey_west_lags; normal p-values and CIs, as statsmodels) or 'prais_winsten'
+    (feasible GLS with AR(1) errors; adds rho).
+    Returns a dict of arrays (one value per series): coefficients, SEs, p-values,
+    CI bounds, r_squared and durbin_watson (of the whitened residuals for Prais-Winsten).
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown ITS method '{method}', expected one of {METHODS}")
+    Y = np.asarray(Y, dtype=float)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    X = its_design(years, intervention_year)
+    n = X.shape[0]
+    df_resid = n - np.linalg.matrix_rank(X)
+
+    if method == 'prais_winsten':
+        beta, resid, pinvs, rho = _prais_winsten(X, Y)
+        ssr = (resid ** 2).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma2 = ssr / df_resid if df_resid > 0 else np.full(Y.shape[1], np.nan)
+            se = np.sqrt(np.einsum('mkt,mkt->km', pinvs, pinvs) * sigma2)
+        fitted_resid = Y - X @ beta
+    else:
+        pinv = np.linalg.pinv(X)
+        beta = pinv @ Y
+        resid = fitted_resid = Y - X @ beta
+        ssr = (resid ** 2).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma2 = ssr / df_resid if df_resid > 0 else np.full(Y.shape[1], np.nan)
+            if method == 'hac':
+                se = _hac_se(X, pinv, resid, newey_west_lags(n) if maxlags is None else maxlags)
+            else:
+                se = np.sqrt(np.outer(np.diag(pinv @ pinv.T), sigma2))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_vals = beta / se
+        centered = ((Y - Y.mean(axis=0)) ** 2).sum(axis=0)
+        r_squared = 1 - (fitted_resid ** 2).sum(axis=0) / centered
+        dw = (np.diff(resid, axis=0) ** 2).sum(axis=0) / ssr
+
+    if df_resid > 0 and method == 'hac':
+        pvals = 2 * stats.norm.sf(np.abs(t_vals))
+        t_crit = stats.norm.ppf(1 - alpha / 2)
+    elif df_resid > 0:
+        pvals = 2 * stats.t.sf(np.abs(t_vals), df_resid)
+        t_crit = stats.t.ppf(1 - alpha / 2, df_resid)
+    else:
+        pvals = np.full_like(beta, np.nan)
+        t_crit = np.nan
+
+    out = {'n_years': np.full(Y.shape[1], n), 'r_squared': r_squared, 'durbin_watson': dw}
+    for i, term in enumerate(ITS_TERMS):
+        out[term] = beta[i]
+        out[f'{term}_se'] = se[i]
+        out[f'{term}_pval'] = pvals[i]
+        out[f'{term}_ci_lower'] = beta[i] - t_crit * se[i]
+        out[f'{term}_ci_upper'] = beta[i] + t_crit * se[i]
+    if method == 'prais_winsten':
+        out['rho'] = rho
+    return out
+
+
+def fit_its_series(df, by, year_col='Year', value_col='Mean_Resistance',
+                   intervention_year=2016, min_years=MIN_YEARS, alpha=0.05, method='ols'):
+    """
+    Fit one ITS model per series in a long table of (by..., year, value) rows.
+
+    Duplicate (series, year) rows are averaged. Series with fewer than
+    min_years observed years are skipped. Returns one row per series with the
+    `by` columns followed by the fit statistics (and rho for Prais-Winsten).
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    wide = df.pivot_table(index=by, columns=year_col, values=value_col, aggfunc='mean')
+    wide = wide.sort_index(axis=1)
+    years = wide.columns.to_numpy()
+    values = wide.to_numpy(dtype=float)
+    observed = ~np.isnan(values)
+    keep = observed.sum(axis=1) >= min_years
+    wide, values, observed = wide[keep], values[keep], observed[keep]
+
+    # Series that observe the same years share one design matrix
+    patterns, group_ids = np.unique(observed, axis=0, return_inverse=True)
+    group_ids = np.ravel(group_ids)
+    frames = []
+    for g, pattern in enumerate(patterns):
+        rows = np.flatnonzero(group_ids == g)
+        fit = fit_its_batch(years[pattern], values[rows][:, pattern].T, intervention_year, alpha, method)
+        fit_df = pd.DataFrame(fit)
+        fit_df['_row'] = rows
+        frames.append(fit_df)
+
+    columns = by + ['n_years'] + RESULT_COLUMNS + (['rho'] if method == 'prais_winsten' else [])
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    fits = pd.concat(frames, ignore_index=True).sort_values('_row')
+    keys = wide.index.to_frame(index=False).iloc[fits['_row'].to_numpy()].reset_index(drop=True)
+    fits = fits.drop(columns='_row').reset_index(drop=True)
+    return pd.concat([keys, fits], axis=1)[columns]
+
+
+def candidate_years(years, min_segment=MIN_SEGMENT_YEARS):
+    """Intervention years leaving at least min_segment observed years before and from the break."""
+    years = np.sort(np.asarray(years))
+    return years[min_segment:len(years) - min_segment + 1]
+
+
+def segment_supported(years, interventions, min_segment=MIN_SEGMENT_YEARS):
+    """True for each intervention year with at least min_segment observed years before it and from it on."""
+    years = np.asarray(years)
+    interventions = np.asarray(interventions)
+    pre = (years[None, :] < interventions[:, None]).sum(axis=1)
+    return (pre >= min_segment) & (len(years) - pre >= min_segment)
+
+
+def _permuted_slope_changes(years, values, interventions, n, seed):
+    """Worker: slope change of n permuted copies of the series, for every intervention year."""
+    rng = np.random.default_rng(seed)
+    Y = rng.permuted(np.tile(values[:, None], (1, n)), axis=0)
+    return np.column_stack([fit_its_batch(years, Y, year)['slope_change'] for year in interventions])
+
+
+def permutation_null(years, values, interventions, n_permutations=N_PERMUTATIONS, seed=PERMUTATION_SEED,
+                     n_jobs=-1, chunk_size=PERMUTATION_CHUNK):
+    """
+    Empirical null of the slope change: n_permutations x len(interventions) array.
+
+    Permuted series are generated and fitted in chunks (one stacked fit per chunk
+    and intervention year). Chunks run in a process pool and each has its own
+    seed stream, so the draws do not depend on n_jobs.
+    """
+    order = np.argsort(years)
+    years, values = np.asarray(years)[order], np.asarray(values, dtype=float)[order]
+    sizes = [min(chunk_size, n_permutations - start) for start in range(0, n_permutations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if len(sizes) > 1 and n_jobs != 1:
+        workers = min(len(sizes), os.cpu_count() if n_jobs == -1 else n_jobs)
+        chunks = Parallel(n_jobs=workers)(
+            delayed(_permuted_slope_changes)(years, values, interventions, size, s) for size, s in zip(sizes, seeds)
+        )
+    else:
+        chunks = [_permuted_slope_changes(years, values, interventions, size, s) for size, s in zip(sizes, seeds)]
+    return np.vstack(chunks)
+
+
+def placebo_permutation_test(years, values, intervention_year=2016, candidates=None,
+                             n_permutations=N_PERMUTATIONS, seed=PERMUTATION_SEED, n_jobs=-1, alpha=0.05):
+    """
+    Placebo-year scan with permutation inference for one annual series.
+
+    Fits the ITS model at every candidate intervention year (default: candidate_years,
+    plus the actual year) and compares each observed slope change with the null from
+    the same permuted series. Returns (scan, null): scan has one row per candidate year
+    with the OLS fit, the two-sided permutation p-value and null quantiles; null is a
+    DataFrame of permuted slope changes (one column per supported candidate year).
+
+    A year without MIN_SEGMENT_YEARS observed years on each side has no identified
+    slope change (the segmented design is rank-deficient). Such years stay in the
+    scan with supported=False and NaN test results, and are left out of the placebo
+    rank. When the actual year is one of them, scan.attrs['placebo_pval'] is NaN.
+    """
+    order = np.argsort(years)
+    years, values = np.asarray(years)[order], np.asarray(values, dtype=float)[order]
+    if candidates is None:
+        candidates = candidate_years(years)
+    candidates = np.unique(np.append(candidates, intervention_year)).astype(int)
+
+    fits = [fit_its_batch(years, values, year, alpha) for year in candidates]
+    scan = pd.DataFrame({term: [f[term][0] for f in fits] for term in RESULT_COLUMNS})
+    scan.insert(0, 'intervention_year', candidates)
+    scan.insert(1, 'is_actual', candidates == intervention_year)
+    supported = segment_supported(years, candidates)
+    scan.insert(2, 'supported', supported)
+
+    tested = candidates[supported]
+    observed = scan.loc[supported, 'slope_change'].to_numpy()
+    null = np.empty((0, 0))
+    for col in ['perm_pval', 'null_q_lower', 'null_q_upper']:
+        scan[col] = np.nan
+    if len(tested):
+        null = permutation_null(years, values, tested, n_permutations, seed, n_jobs)
+        # Add-one estimator so the p-value is never exactly zero
+        exceed = (np.abs(null) >= np.abs(observed) - 1e-12).sum(axis=0)
+        scan.loc[supported, 'perm_pval'] = (exceed + 1) / (len(null) + 1)
+        scan.loc[supported, 'null_q_lower'] = np.quantile(null, alpha / 2, axis=0)
+        scan.loc[supported, 'null_q_upper'] = np.quantile(null, 1 - alpha / 2, axis=0)
+    # Placebo rank: share of supported candidate years with a slope change at least as large as the actual one
+    actual = scan['is_actual'] & scan['supported']
+    if actual.any():
+        reference = abs(scan.loc[actual, 'slope_change'].iloc[0])
+        scan.attrs['placebo_pval'] = float(np.mean(np.abs(observed) >= reference - 1e-12))
+    else:
+        scan.attrs['placebo_pval'] = np.nan
+    return scan, pd.DataFrame(null, columns=tested)
@@ -0,0 +1,189 @@
+"""
+Cached Model Serving for Dashboard Predictions
+Loads each trained joblib model once per process (reloaded only when the file
+on disk changes) together with its feature schema: model_features.pkl for the
+spatial model, the fitted column names otherwise. Requests arrive as a frame of
+raw values (numbers and category labels). They are one-hot encoded against
+the schema in one vectorized step and scored with a single predict call.
+Rows with a category label the model never saw are not scored (NaN): with
+drop_first encoding an all-zero row would silently mean the reference level.
+
+Models:
+- forecast: models/amr_forecast_rf.pkl (09) - Year, organism and region
+- spatial:  models/amr_spatial_rf.pkl (06)  - center coordinates, pathogen and marker
+
+Usage:
+    from model_service import forecast_pairs, predict
+    forecast_pairs(pairs, year=2025)   # pairs: Center_Name, Pathogen -> adds Forecast, Spatial_Risk
+    predict('forecast', requests)      # requests: columns named as in training
+"""
+
+import os
+import joblib
+import numpy as np
+import pandas as pd
+from data_cache import BASE_DIR
+from gazetteer import lookup
+
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+
+MODEL_FILES = {
+    'forecast': 'amr_forecast_rf.pkl',
+    'spatial': 'amr_spatial_rf.pkl',
+}
+
+# Saved feature lists (models without one use their fitted feature names)
+FEATURE_FILES = {
+    'spatial': 'model_features.pkl',
+}
+
+# Saved category levels per text column, including the level dropped by drop_first
+# (models without one take their levels from the one-hot feature names)
+LEVEL_FILES = {
+    'forecast': 'amr_forecast_levels.pkl',
+}
+
+# Region labels the forecast model was trained on, by state; other located states use NATIONAL_REGION
+REGION_BY_STATE = {
+    'Delhi': 'North India', 'Chandigarh': 'North India', 'Punjab': 'North India', 'Haryana': 'North India',
+    'Uttar Pradesh': 'North India', 'Uttarakhand': 'North India', 'Himachal Pradesh': 'North India',
+    'Jammu and Kashmir': 'North India',
+    'Tamil Nadu': 'South India', 'Puducherry': 'South India', 'Karnataka': 'South India', 'Kerala': 'South India',
+    'Andhra Pradesh': 'South India', 'Telangana': 'South India',
+    'Maharashtra': 'West India', 'Gujarat': 'West India', 'Rajasthan': 'West India', 'Goa': 'West India',
+}
+NATIONAL_REGION = 'National'
+
+# Dashboard pathogen -> (spatial-model pathogen label, marker column it is scored on)
+SPATIAL_MARKERS = {
+    'Escherichia coli': ('E. coli', 'NDM'),
+    'Klebsiella pneumoniae': ('K. pneumoniae', 'NDM'),
+    'Staphylococcus aureus': ('S. aureus', 'MRSA (Phenotypic)'),
+    'Staphylococcus aureus (MRSA)': ('S. aureus', 'MRSA (Phenotypic)'),
+}
+
+_models = {}
+
+
+def load_model(name):
+    """
+    (model, feature list, levels) for a named model, loaded once per process and
+    file version. levels maps text columns to the labels seen in training (empty
+    when the model has no level file).
+    """
+    path = os.path.join(MODEL_DIR, MODEL_FILES[name])
+    key = (name, os.path.getmtime(path))
+    if key not in _models:
+        model = joblib.load(path)
+        if name in FEATURE_FILES:
+            features = list(joblib.load(os.path.join(MODEL_DIR, FEATURE_FILES[name])))
+        else:
+            features = list(model.feature_names_in_)
+        level_path = os.path.join(MODEL_DIR, LEVEL_FILES.get(name, ''))
+        levels = joblib.load(level_path) if name in LEVEL_FILES and os.path.exists(level_path) else {}
+        for old in [k for k in _models if k[0] == name]:
+            del _models[old]
+        _models[key] = (model, features, levels)
+    return _models[key]
+
+
+def design_matrix(requests, features):
+    """
+    Encode raw request columns into the model's feature columns.
+    Numeric features are copied; a text column `col` sets the one-hot feature
+    '<col>_<value>'. A label absent from the model's features (the reference
+    level of a drop_first encoding) leaves every indicator at 0.
+    """
+    X = np.zeros((len(requests), len(features)))
+    positions = pd.Index(features)
+    for col in requests.columns:
+        values = requests[col]
+        if col in positions and pd.api.types.is_numeric_dtype(values):
+            X[:, positions.get_loc(col)] = values.to_numpy(dtype=float)
+            continue
+        # One lookup per distinct label, then one scatter of the indicators
+        codes, uniques = pd.factorize(values)
+        if not len(uniques):
+            continue
+        targets = positions.get_indexer([f"{col}_{u}" for u in uniques])
+        cols = np.where(codes >= 0, targets[codes], -1)
+        rows = np.flatnonzero(cols >= 0)
+        X[rows, cols[rows]] = 1.0
+    return pd.DataFrame(X, columns=features, index=requests.index)
+
+
+def known_rows(requests, features, levels):
+    """
+    Boolean mask of request rows whose every text label is a level the model was
+    trained on. Columns without saved levels only know the labels of their
+    one-hot features '<col>_<level>'.
+    """
+    known = np.ones(len(requests), dtype=bool)
+    for col in requests.columns:
+        if col in features and pd.api.types.is_numeric_dtype(requests[col]):
+            continue
+        values = levels.get(col)
+        if values is None:
+            values = [f[len(col) + 1:] for f in features if f.startswith(f"{col}_")]
+        known &= requests[col].isin(list(values)).to_numpy()
+    return known
+
+
+def predict(name, requests):
+    """
+    Predictions of a named model for every request row, in one predict call.
+    Rows with an unseen category label get NaN.
+    """
+    model, features, levels = load_model(name)
+    result = np.full(len(requests), np.nan)
+    known = known_rows(requests, features, levels)
+    if known.any():
+        result[known] = model.predict(design_matrix(requests[known], features))
+    return result
+
+
+def center_places(centers):
+    """
+    Region label, latitude and longitude per center name (gazetteer lookup per
+    distinct name). Centers the gazetteer cannot locate get NaN throughout.
+    """
+    codes, uniques = pd.factorize(pd.Series(centers))
+    rows = []
+    for name in uniques:
+        place = lookup(name)
+        if place:
+            rows.append((REGION_BY_STATE.get(place.state, NATIONAL_REGION), place.latitude, place.longitude))
+        else:
+            rows.append((np.nan, np.nan, np.nan))
+    table = pd.DataFrame(rows + [(np.nan, np.nan, np.nan)], columns=['Region', 'Latitude', 'Longitude'])
+    return table.iloc[np.where(codes == -1, len(uniques), codes)].reset_index(drop=True)
+
+
+def forecast_pairs(pairs, year=2025):
+    """
+    Score every (Center_Name, Pathogen) pair with both models in one batch each.
+    Adds Forecast (forecast model at `year`, clipped to 0-100; NaN when the
+    pathogen or region was not in its training data, or the center cannot be
+    located) and Spatial_Risk (spatial
+    model for the pathogen's marker at the center's coordinates; NaN when the
+    center cannot be located or the pathogen has no marker).
+    """
+    pairs = pairs[['Center_Name', 'Pathogen']].reset_index(drop=True)
+    places = center_places(pairs['Center_Name'])
+
+    requests = pd.DataFrame({'Year': float(year), 'Organism (Species)': pairs['Pathogen'],
+                             'Region/State': places['Region']})
+    result = pairs.copy()
+    result['Region'] = places['Region']
+    result['Forecast'] = np.clip(predict('forecast', requests), 0, 100)
+
+    markers = pairs['Pathogen'].map(SPATIAL_MARKERS)
+    scorable = markers.notna() & places['Latitude'].notna()
+    result['Spatial_Risk'] = np.nan
+    if scorable.any():
+        spatial = pd.DataFrame({
+            'Latitude': places.loc[scorable, 'Latitude'], 'Longitude': places.loc[scorable, 'Longitude'],
+            'Pathogen': markers[scorable].str[0], 'Antibiotic_Gene': markers[scorable].str[1],
+        })
+        result.loc[scorable, 'Spatial_Risk'] = predict('spatial', spatial)
+    return result
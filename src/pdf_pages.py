@@ -0,0 +1,148 @@
+"""
+Cached, Parallel Page Extraction for ICMR Report PDFs
+Extracts page text (and optionally pdfplumber tables) across worker processes
+and stores one JSON file per page under data/cache/pdf_pages, keyed by the PDF
+content hash, extraction engine and page index. Later scans, dumps and table
+pulls read pages from the cache instead of reopening the PDF.
+
+Engines:
+- 'pdfplumber': text via page.extract_text(), tables via page.extract_tables()
+- 'pypdf':      text via PdfReader.pages[i].extract_text() (faster, text only)
+
+Usage:
+    from pdf_pages import extract_pages, page_text
+    pages = extract_pages(pdf_path, [85, 86], tables=True)
+    pages[85]['text'], pages[85]['tables']
+"""
+
+import os
+import json
+from joblib import Parallel, delayed
+from data_cache import CACHE_DIR, file_hash, temp_path
+
+PDF_CACHE_DIR = os.path.join(CACHE_DIR, "pdf_pages")
+
+# Bump when the stored page format changes
+PDF_CACHE_VERSION = 1
+
+# Below this many uncached pages, extraction runs in-process (no pool start-up cost)
+MIN_PARALLEL_PAGES = 8
+
+ENGINES = ('pdfplumber', 'pypdf')
+
+_page_counts = {}
+
+
+def _page_dir(pdf_path, engine):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(PDF_CACHE_DIR, f"{stem}-{file_hash(pdf_path)[:16]}", f"{engine}-v{PDF_CACHE_VERSION}")
+
+
+def _page_file(pdf_path, engine, page):
+    return os.path.join(_page_dir(pdf_path, engine), f"p{page:04d}.json")
+
+
+def page_count(pdf_path):
+    """Number of pages in the PDF (memoized per file contents)."""
+    key = file_hash(pdf_path)
+    if key not in _page_counts:
+        import pypdf
+        _page_counts[key] = len(pypdf.PdfReader(pdf_path).pages)
+    return _page_counts[key]
+
+
+def _read_cached(path, tables):
+    """Cached page record, or None if missing (or tables are needed but were not extracted)."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        record = json.load(f)
+    if tables and record.get('tables') is None:
+        return None
+    return record
+
+
+def _extract_chunk(pdf_path, engine, pages, tables, page_dir):
+    """Worker: open the PDF once, extract a run of pages and write them to the cache."""
+    os.makedirs(page_dir, exist_ok=True)
+    records = {}
+    if engine == 'pypdf':
+        import pypdf
+        reader = pypdf.PdfReader(pdf_path)
+        doc_pages, doc = reader.pages, None
+    else:
+        import pdfplumber
+        doc = pdfplumber.open(pdf_path)
+        doc_pages = doc.pages
+    try:
+        for i in pages:
+            try:
+                page = doc_pages[i]
+                record = {'page': i, 'text': page.extract_text(), 'tables': None}
+                if tables and engine == 'pdfplumber':
+                    record['tables'] = page.extract_tables()
+            except Exception as e:
+                # Failed pages are reported but not cached, so they are retried next time
+                records[i] = {'page': i, 'text': None, 'tables': None, 'error': str(e)}
+                continue
+            out_path = os.path.join(page_dir, f"p{i:04d}.json")
+            tmp_path = temp_path(out_path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f)
+            os.replace(tmp_path, out_path)
+            records[i] = record
+    finally:
+        if doc is not None:
+            doc.close()
+    return records
+
+
+def extract_pages(pdf_path, pages=None, engine='pdfplumber', tables=False, n_jobs=-1):
+    """
+    Return {page_index: {'text', 'tables'[, 'error']}} for the requested 0-based pages
+    (all pages by default). Pages outside the document are left out.
+
+    Cached pages are read from disk; the rest are split into contiguous runs
+    and extracted in parallel worker processes.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+    if tables and engine != 'pdfplumber':
+        raise ValueError("table extraction needs engine='pdfplumber'")
+
+    n_pages = page_count(pdf_path)
+    pages = range(n_pages) if pages is None else [p for p in pages if 0 <= p < n_pages]
+
+    results, todo = {}, []
+    for i in pages:
+        record = _read_cached(_page_file(pdf_path, engine, i), tables)
+        if record is None:
+            todo.append(i)
+        else:
+            results[i] = record
+
+    if todo:
+        page_dir = _page_dir(pdf_path, engine)
+        n_workers = 1 if len(todo) < MIN_PARALLEL_PAGES else min(os.cpu_count() if n_jobs == -1 else n_jobs, len(todo))
+        chunk = -(-len(todo) // n_workers)
+        runs = [todo[k:k + chunk] for k in range(0, len(todo), chunk)]
+        if n_workers == 1:
+            extracted = [_extract_chunk(pdf_path, engine, run, tables, page_dir) for run in runs]
+        else:
+            extracted = Parallel(n_jobs=n_workers)(
+                delayed(_extract_chunk)(pdf_path, engine, run, tables, page_dir) for run in runs
+            )
+        for records in extracted:
+            results.update(records)
+
+    return {i: results[i] for i in pages if i in results}
+
+
+def page_text(pdf_path, page, engine='pdfplumber'):
+    """Text of one 0-based page (IndexError if the page does not exist)."""
+    record = extract_pages(pdf_path, [page], engine=engine).get(page)
+    if record is None:
+        raise IndexError(f"page index {page} out of range")
+    if 'error' in record:
+        raise RuntimeError(record['error'])
+    return record['text']
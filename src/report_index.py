@@ -0,0 +1,273 @@
+"""
+Inverted Full-Text Index over ICMR Report Pages
+Builds a persistent token -> {page: positions} index once per report (from the
+cached page text in pdf_pages) and answers boolean and proximity queries
+across the whole report archive.
+
+Query syntax (case-insensitive):
+    Table AND (Centre OR Site)      boolean operators, parentheses
+    Table Centre                    implicit AND
+    NOT Annexure                    negation
+    "regional centres"              phrase (adjacent tokens)
+    Table NEAR/5 (Centre OR Site)   tokens within 5 positions of each other
+    centr*                          prefix match
+
+Usage:
+    from report_index import search
+    search('Annexure AND participating NEAR/3 cent*')   # -> [(report, page), ...] (0-based pages)
+
+Run directly to query from the shell:
+    python src/report_index.py "Table AND (Centre OR Site)"
+"""
+
+import os
+import re
+import sys
+import bisect
+import pickle
+import numpy as np
+from data_cache import BASE_DIR, CACHE_DIR, file_hash, temp_path
+from pdf_pages import extract_pages
+
+REPORTS_DIR = os.path.join(BASE_DIR, "data", "raw", "ICMR reports")
+INDEX_DIR = os.path.join(CACHE_DIR, "report_index")
+
+# Bump when tokenization or the index layout changes
+INDEX_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+QUERY_PATTERN = re.compile(r'\(|\)|"[^"]*"|NEAR/\d+|[^\s()"]+')
+
+_loaded = {}
+
+
+def tokenize(text):
+    """Lower-case alphanumeric tokens of a page, in reading order."""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def _index_path(pdf_path):
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    return os.path.join(INDEX_DIR, f"{stem}-v{INDEX_VERSION}-{file_hash(pdf_path)[:16]}.pkl")
+
+
+def _build_index(pdf_path):
+    """
+    Index one report's pages. Returns (index path, index); the path is None when
+    pages failed extraction, and the index (without those pages) is not saved,
+    so a later run retries them.
+    """
+    pages = extract_pages(pdf_path, engine='pypdf')
+    failed = sorted(page for page, record in pages.items() if record.get('error'))
+    pages = {page: record for page, record in pages.items() if not record.get('error')}
+    postings = {}
+    for page, record in pages.items():
+        tokens = tokenize(record['text'])
+        positions = {}
+        for pos, token in enumerate(tokens):
+            positions.setdefault(token, []).append(pos)
+        for token, pos_list in positions.items():
+            postings.setdefault(token, {})[page] = np.array(pos_list, dtype=np.int32)
+
+    index = {
+        'report': os.path.basename(pdf_path),
+        'pages': sorted(pages),
+        'postings': postings,
+        'vocabulary': sorted(postings),
+    }
+    if failed:
+        print(f"Index of {index['report']} not saved: {len(failed)} page(s) failed extraction "
+              f"({', '.join(str(p + 1) for p in failed[:5])}{'...' if len(failed) > 5 else ''}); retried next run")
+        return None, index
+
+    out_path = _index_path(pdf_path)
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = temp_path(out_path)
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f)
+    os.replace(tmp_path, out_path)
+    print(f"Indexed {index['report']}: {len(pages)} pages, {len(postings)} terms")
+    return out_path, index
+
+
+def build_report_index(pdf_path, force=False):
+    """
+    Index every page of one report (text via the pypdf page cache). Returns the index
+    path, or None when pages failed extraction (the index is then not saved).
+    """
+    out_path = _index_path(pdf_path)
+    if os.path.exists(out_path) and not force:
+        return out_path
+    return _build_index(pdf_path)[0]
+
+
+def load_report_index(pdf_path):
+    """Load (building if needed) one report's index, once per process while it is complete."""
+    path = _index_path(pdf_path)
+    if path not in _loaded:
+        if not os.path.exists(path):
+            saved, index = _build_index(pdf_path)
+            if saved is None:
+                return index
+            _loaded[path] = index
+        else:
+            with open(path, 'rb') as f:
+                _loaded[path] = pickle.load(f)
+    return _loaded[path]
+
+
+def report_paths(reports_dir=REPORTS_DIR):
+    """All PDF reports in the archive directory."""
+    if not os.path.exists(reports_dir):
+        return []
+    return [os.path.join(reports_dir, f) for f in sorted(os.listdir(reports_dir)) if f.lower().endswith('.pdf')]
+
+
+# --- Query evaluation -------------------------------------------------------
+# A result maps page -> sorted token positions (positional results) or None
+# (boolean results, where only the page set is meaningful).
+
+def _term(index, term):
+    """Pages and positions of a single term (trailing * = prefix match)."""
+    if term.endswith('*'):
+        prefix = term[:-1]
+        vocab = index['vocabulary']
+        start = bisect.bisect_left(vocab, prefix)
+        result = {}
+        for token in vocab[start:]:
+            if not token.startswith(prefix):
+                break
+            for page, pos in index['postings'][token].items():
+                result[page] = np.union1d(result[page], pos) if page in result else pos
+        return result
+    return dict(index['postings'].get(term, {}))
+
+
+def _phrase(index, words):
+    """Pages where the words occur consecutively; positions are the phrase starts."""
+    result = _term(index, words[0])
+    for offset, word in enumerate(words[1:], start=1):
+        nxt = _term(index, word)
+        matched = {}
+        for page, starts in result.items():
+            if page in nxt:
+                hits = starts[np.isin(starts + offset, nxt[page])]
+                if len(hits):
+                    matched[page] = hits
+        result = matched
+    return result
+
+
+def _near(left, right, distance):
+    """Pages where some left and right positions are within `distance` tokens."""
+    result = {}
+    for page in left.keys() & right.keys():
+        a, b = left[page], right[page]
+        if a is None or b is None:
+            raise ValueError("NEAR needs terms, phrases or OR-groups of them on both sides")
+        # Distance from each left position to its nearest right position
+        idx = np.clip(np.searchsorted(b, a), 1, len(b)) - 1
+        nearest = np.minimum(np.abs(a - b[idx]), np.abs(a - b[np.minimum(idx + 1, len(b) - 1)]))
+        if (nearest <= distance).any():
+            result[page] = np.union1d(a[nearest <= distance], b)
+    return result
+
+
+def _or(left, right):
+    result = dict(left)
+    for page, pos in right.items():
+        if page in result and result[page] is not None and pos is not None:
+            result[page] = np.union1d(result[page], pos)
+        else:
+            result[page] = pos if page not in result else None
+    return result
+
+
+class _Parser:
+    """Recursive-descent parser: OR < AND < NOT < NEAR < atom."""
+
+    def __init__(self, index, query):
+        self.index = index
+        self.tokens = QUERY_PATTERN.findall(query)
+        self.i = 0
+
+    def peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def take(self):
+        self.i += 1
+        return self.tokens[self.i - 1]
+
+    def parse(self):
+        result = self.or_expr()
+        if self.peek() is not None:
+            raise ValueError(f"unexpected {self.peek()!r} in query")
+        return result
+
+    def or_expr(self):
+        result = self.and_expr()
+        while self.peek() == 'OR':
+            self.take()
+            result = _or(result, self.and_expr())
+        return result
+
+    def and_expr(self):
+        result = self.not_expr()
+        while self.peek() not in (None, 'OR', ')'):
+            if self.peek() == 'AND':
+                self.take()
+            right = self.not_expr()
+            result = {page: None for page in result.keys() & right.keys()}
+        return result
+
+    def not_expr(self):
+        if self.peek() == 'NOT':
+            self.take()
+            excluded = self.not_expr()
+            return {page: None for page in self.index['pages'] if page not in excluded}
+        return self.near_expr()
+
+    def near_expr(self):
+        result = self.atom()
+        while self.peek() and self.peek().startswith('NEAR/'):
+            distance = int(self.take().split('/')[1])
+            result = _near(result, self.atom(), distance)
+        return result
+
+    def atom(self):
+        token = self.peek()
+        if token is None or token in ('AND', 'OR', ')'):
+            raise ValueError(f"query ends or has {token!r} where a term was expected")
+        self.take()
+        if token == '(':
+            result = self.or_expr()
+            if self.peek() != ')':
+                raise ValueError("missing ')' in query")
+            self.take()
+            return result
+        if token.startswith('"'):
+            words = tokenize(token.strip('"'))
+            return _phrase(self.index, words) if words else {}
+        words = tokenize(token) if not token.endswith('*') else [token.lower()]
+        return _phrase(self.index, words) if len(words) > 1 else _term(self.index, words[0]) if words else {}
+
+
+def search_report(pdf_path, query):
+    """0-based pages of one report matching the query, in page order."""
+    return sorted(_Parser(load_report_index(pdf_path), query).parse())
+
+
+def search(query, reports=None):
+    """Search every report in the archive (or the given PDF paths). Returns [(report, page), ...]."""
+    hits = []
+    for pdf_path in (reports if reports is not None else report_paths()):
+        hits.extend((os.path.basename(pdf_path), page) for page in search_report(pdf_path, query))
+    return hits
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+    else:
+        for report, page in search(' '.join(sys.argv[1:])):
+            print(f"{report}: page {page + 1}")
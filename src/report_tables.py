@@ -0,0 +1,221 @@
+"""
+Batch Extraction of RC-Keyed Tables from AMRSN Annual Reports
+Finds regional-center (RC1, RC2, ...) tables by content instead of page number:
+candidate pages come from the report's inverted index, pdfplumber tables on
+those pages are kept when their first column holds RC codes. All reports are
+processed in parallel and the tables are written to one long, typed store with
+provenance (report, page, table index, row, column). Each value cell carries
+the label of its column header, so consumers (05_process_extracted_data.py)
+pick tables by caption and column labels rather than by page.
+
+The 2022 report is not in the archive; its RC tables come from the tracked
+pdfplumber page dumps (outputs/table_p<page>_<index>.csv) instead, so the
+store, and amr_data_real.csv built from it, can be rebuilt from the repository.
+
+Usage:
+    python src/report_tables.py            # (re)build data/processed/rc_table_store.parquet
+
+    from report_tables import load_table_store, table_frame
+    store = load_table_store()
+    df = table_frame(store, 'AMRSN_Annual_Report_2022.pdf', page=149, table_index=0)
+"""
+
+import os
+import re
+import glob
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from data_cache import BASE_DIR, HAS_PARQUET
+from pdf_pages import extract_pages
+from report_index import search_report, report_paths
+
+STORE_PATH = os.path.join(BASE_DIR, "data", "processed", "rc_table_store.parquet" if HAS_PARQUET else "rc_table_store.csv")
+
+# Tracked page dumps of a report missing from the archive, and the captions printed above
+# their tables (the dumps keep cells only). Page 150 continues the table of page 149.
+DUMP_PATTERN = os.path.join(BASE_DIR, "outputs", "table_p*_*.csv")
+DUMP_REPORT = 'AMRSN_Annual_Report_2022.pdf'
+DUMP_CAPTIONS = {
+    94: 'Table 3.15: Percentage positivity of AMR associated genetic determinants in E. coli',
+    97: 'Table 3.16: Percentage positivity of AMR associated genetic determinants in K. pneumoniae',
+    149: 'Centerwise antimicrobial susceptibility of Staphylococcus aureus (MRSA)',
+}
+
+# Pages mentioning any of RC1..RC30 in the forms RC_CELL_PATTERN accepts: "RC1"/"RC01" are
+# one token, "RC 01"/"RC-12" are the phrase "rc 01"/"rc 12"
+RC_NUMBERS = [str(i) for i in range(1, 31)] + [f'{i:02d}' for i in range(1, 10)]
+RC_QUERY = ' OR '.join([f'rc{n}' for n in RC_NUMBERS] + [f'"rc {n}"' for n in RC_NUMBERS])
+
+# Leading cell of a data row: "RC1", "RC 01", "RC-12"
+RC_CELL_PATTERN = r'^\s*RC\s*-?\s*0*(\d{1,2})\b'
+
+# A table needs at least this many RC rows to count as RC-keyed
+MIN_RC_ROWS = 3
+
+CAPTION_PATTERN = re.compile(r'Table\s+\d+(?:\.\d+)*\s*:?[^\n]*')
+YEAR_PATTERN = re.compile(r'(?<!\d)(20[1-3]\d)(?!\d)')
+
+STORE_COLUMNS = ['Report', 'Report_Year', 'Page', 'Table_Index', 'Caption', 'Row_Index', 'RC_Code',
+                 'Column_Index', 'Column_Label', 'Raw_Value', 'Number', 'Percentage']
+
+
+def report_year(pdf_path):
+    """Report year from the file name (first 20xx), or None."""
+    match = YEAR_PATTERN.search(os.path.basename(pdf_path))
+    return int(match.group(1)) if match else None
+
+
+def table_cells(table):
+    """A pdfplumber table (list of rows) as a rectangular frame of stripped strings (<NA> when empty)."""
+    width = max(len(row) for row in table)
+    cells = pd.DataFrame([list(row) + [None] * (width - len(row)) for row in table], dtype='object')
+    return cells.astype('string').apply(lambda s: s.str.strip()).replace('', pd.NA)
+
+
+def rc_codes(cells):
+    """RC number per row (pdfplumber sometimes shifts the code into the second column), <NA> elsewhere."""
+    codes = cells.iloc[:, :2].apply(lambda s: s.str.extract(RC_CELL_PATTERN, flags=re.IGNORECASE, expand=False))
+    return codes.bfill(axis=1).iloc[:, 0]
+
+
+def rc_rows(table):
+    """Boolean mask of table rows holding an RC code in their first or second cell."""
+    return rc_codes(table_cells(table)).notna().to_numpy(dtype=bool)
+
+
+def is_rc_table(table, min_rows=MIN_RC_ROWS):
+    """True when at least min_rows rows of the table start with an RC code."""
+    return bool(table) and rc_rows(table).sum() >= min_rows
+
+
+def column_labels(cells, first_data_row):
+    """
+    Header label per column. The header is the row above the data with the most
+    distinct labels (this skips "n(%)" unit rows) and each label is its first line.
+    Spanned header cells sit a column or two off their values, so every column
+    takes the nearest label.
+    """
+    above = cells.iloc[:first_data_row, 1:]
+    if above.empty or above.notna().sum().sum() == 0:
+        return {}
+    header = above.loc[above.nunique(axis=1).idxmax()].dropna()
+    labels = header.str.split('\n').str[0].str.strip()
+    columns = cells.columns.to_numpy(dtype=int)
+    nearest = np.abs(columns[:, None] - labels.index.to_numpy(dtype=int)[None, :]).argmin(axis=1)
+    return dict(zip(columns, labels.to_numpy()[nearest]))
+
+
+def table_to_long(table, report, page, table_index, caption=None):
+    """Melt one RC table into store rows (one per non-empty data cell) with typed values."""
+    cells = table_cells(table)
+    codes = rc_codes(cells)
+    is_rc = codes.notna().to_numpy()
+    is_code = cells.apply(lambda s: s.str.match(RC_CELL_PATTERN, case=False)).fillna(False).astype(bool)
+
+    data = cells[is_rc].mask(is_code[is_rc])
+    long = data.reset_index(names='Row_Index').melt(
+        id_vars='Row_Index', var_name='Column_Index', value_name='Raw_Value').dropna(subset=['Raw_Value'])
+    long['RC_Code'] = 'RC' + long['Row_Index'].map(codes[is_rc].astype(int).astype(str))
+    long['Column_Label'] = long['Column_Index'].map(column_labels(cells, int(np.argmax(is_rc))))
+
+    raw = long['Raw_Value'].str.replace('\n', ' ', regex=False)
+    long['Raw_Value'] = raw
+    long['Number'] = raw.str.extract(r'(\d+\.?\d*)', expand=False).astype('float64')
+    # "12 (34.5)" -> 34.5 and "55%" -> 55; bare numbers are left to the caller
+    bracket = raw.str.extract(r'\((\d+\.?\d*)\s*%?\)', expand=False).astype('float64')
+    percent = raw.str.extract(r'(\d+\.?\d*)\s*%', expand=False).astype('float64')
+    long['Percentage'] = bracket.fillna(percent)
+
+    long['Report'] = report
+    long['Page'] = page
+    long['Table_Index'] = table_index
+    long['Caption'] = caption
+    return long.sort_values(['Row_Index', 'Column_Index'], kind='stable')
+
+
+def extract_report_tables(pdf_path):
+    """All RC-keyed tables of one report as store rows (pages are 1-based)."""
+    report = os.path.basename(pdf_path)
+    pages = extract_pages(pdf_path, search_report(pdf_path, RC_QUERY), tables=True, n_jobs=1)
+    frames = []
+    for i, record in pages.items():
+        # Captions and tables are paired in reading order; extra tables take the page's last caption
+        captions = [c.strip() for c in CAPTION_PATTERN.findall(record['text'] or '')]
+        for idx, table in enumerate(record['tables'] or []):
+            if is_rc_table(table):
+                caption = captions[min(idx, len(captions) - 1)] if captions else None
+                frames.append(table_to_long(table, report, i + 1, idx, caption))
+    if not frames:
+        return pd.DataFrame(columns=STORE_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df['Report_Year'] = report_year(pdf_path)
+    return df[STORE_COLUMNS]
+
+
+def dump_report_tables(pattern=DUMP_PATTERN, report=DUMP_REPORT):
+    """RC-keyed tables of the page dumps matching pattern (table_p<page>_<index>.csv) as store rows."""
+    frames = []
+    for path in sorted(glob.glob(pattern)):
+        match = re.search(r'table_p(\d+)_(\d+)\.csv$', path)
+        if not match:
+            continue
+        table = pd.read_csv(path, header=None, dtype=str, keep_default_na=False).values.tolist()
+        if is_rc_table(table):
+            page, idx = int(match.group(1)), int(match.group(2))
+            frames.append(table_to_long(table, report, page, idx, DUMP_CAPTIONS.get(page)))
+    if not frames:
+        return pd.DataFrame(columns=STORE_COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df['Report_Year'] = report_year(report)
+    return df[STORE_COLUMNS]
+
+
+def build_table_store(reports=None, n_jobs=-1, out_path=STORE_PATH, dumps=DUMP_PATTERN):
+    """
+    Extract RC tables from every report in parallel and save the consolidated store.
+    Tables of DUMP_REPORT come from the page dumps matching dumps, unless its PDF is
+    among the reports (dumps=None skips them).
+    """
+    reports = report_paths() if reports is None else reports
+    print(f"Extracting RC tables from {len(reports)} reports...")
+    frames = Parallel(n_jobs=min(len(reports), os.cpu_count() if n_jobs == -1 else n_jobs) or 1)(
+        delayed(extract_report_tables)(path) for path in reports
+    )
+    if dumps and DUMP_REPORT not in {os.path.basename(path) for path in reports}:
+        frames.append(dump_report_tables(dumps))
+    store = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=STORE_COLUMNS)
+    store = store.astype({'Page': 'int64', 'Table_Index': 'int64', 'Row_Index': 'int64', 'Column_Index': 'int64',
+                          'Report_Year': 'Int64', 'Number': 'float64', 'Percentage': 'float64'})
+    for col in ['Report', 'Caption', 'RC_Code', 'Column_Label']:
+        store[col] = store[col].astype('category')
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    if out_path.endswith('.parquet'):
+        store.to_parquet(out_path, index=False)
+    else:
+        store.to_csv(out_path, index=False)
+    n_tables = store[['Report', 'Page', 'Table_Index']].drop_duplicates().shape[0]
+    print(f"Saved {n_tables} RC tables ({len(store)} cells) to {os.path.relpath(out_path, BASE_DIR)}")
+    for (report, page), group in store.groupby(['Report', 'Page'], observed=True):
+        print(f"  {report} p{page}: {group['Table_Index'].nunique()} table(s) - {group['Caption'].iloc[0]}")
+    return store
+
+
+def load_table_store(path=STORE_PATH):
+    """Load the consolidated RC table store."""
+    return pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+
+
+def table_frame(store, report, page, table_index):
+    """One stored table back in wide form: RC_Code rows x column labels (raw cell text)."""
+    t = store[(store['Report'] == report) & (store['Page'] == page) & (store['Table_Index'] == table_index)]
+    wide = t.pivot_table(index=['Row_Index', 'RC_Code'], columns='Column_Index', values='Raw_Value',
+                         aggfunc='first', observed=True)
+    labels = t.drop_duplicates('Column_Index').set_index('Column_Index')['Column_Label']
+    wide.columns = [labels.get(c) or c for c in wide.columns]
+    return wide.reset_index(level='Row_Index', drop=True)
+
+
+if __name__ == "__main__":
+    build_table_store()
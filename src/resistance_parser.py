@@ -0,0 +1,202 @@
+"""
+Vectorized Resistance-String Parser
+Shared by the analysis scripts to turn free-text AST results such as
+"35% Susceptible", "91.0% Resistant" or "37% (Imipenem)" into typed columns.
+
+All functions work on whole pandas columns (str.extract / str.contains),
+so there is no per-row Python call. Surveillance exports repeat the same
+result strings many times, so each distinct string is parsed only once.
+"""
+
+import re
+import numpy as np
+import pandas as pd
+
+# First number in the cell (including decimals)
+NUMBER_PATTERN = r'(\d+\.?\d*)'
+
+# Cell contents treated as missing
+MISSING_VALUES = ['not in source', 'na', 'nan', '']
+
+# Susceptible / resistant markers in the text
+SUSCEPTIBLE_PATTERN = r'susceptible|sensitive| s |\ss$'
+RESISTANT_PATTERN = r'resistant| r |\sr$'
+
+# Value types
+DIRECT_R = 'Direct (R)'
+CALCULATED_S = 'Calculated (100-S)'
+AMBIGUOUS = 'Ambiguous'
+NO_NUMBER = 'No Number'
+VALUE_TYPES = [DIRECT_R, CALCULATED_S, AMBIGUOUS, NO_NUMBER]
+
+# Drugs recognised as context in result strings (extend as needed)
+DRUG_NAMES = [
+    'Imipenem', 'Meropenem', 'Ertapenem', 'Carbapenem', 'Amikacin', 'Gentamicin',
+    'Ceftriaxone', 'Cefotaxime', 'Ceftazidime', 'Cefepime', 'Cefoxitin', 'Oxacillin',
+    'Ciprofloxacin', 'Levofloxacin', 'Piperacillin-tazobactam', 'Colistin',
+    'Tigecycline', 'Vancomycin', 'Linezolid', 'Fosfomycin', 'Minocycline'
+]
+
+CARBAPENEMS = ['imipenem', 'meropenem', 'ertapenem', 'carbapenem']
+
+# Reserve (last-line) agents tracked in the molecular manuscript
+RESERVE_AGENTS = ['Colistin', 'Tigecycline', 'Fosfomycin', 'Minocycline', 'Vancomycin', 'Linezolid']
+
+# Agents of the CLSI M100 / M60 reporting panels seen in AMRSN susceptibility tables
+CLSI_PANEL = [
+    'Ampicillin', 'Ampicillin-sulbactam', 'Piperacillin-tazobactam', 'Cefoperazone-sulbactam',
+    'Cefazolin', 'Cefuroxime', 'Cefoxitin', 'Cefotaxime', 'Ceftriaxone', 'Ceftazidime',
+    'Ceftazidime-avibactam', 'Cefepime', 'Cefixime', 'Aztreonam', 'Ertapenem', 'Imipenem',
+    'Meropenem', 'Amikacin', 'Gentamicin', 'Ciprofloxacin', 'Levofloxacin', 'Azithromycin',
+    'Erythromycin', 'Clindamycin', 'Oxacillin', 'Penicillin', 'Vancomycin', 'Teicoplanin',
+    'Linezolid', 'Daptomycin', 'Tetracycline', 'Doxycycline', 'Minocycline', 'Tigecycline',
+    'Chloramphenicol', 'Trimethoprim-sulfamethoxazole', 'Nitrofurantoin', 'Fosfomycin',
+    'Colistin', 'Polymyxin B', 'Fluconazole', 'Voriconazole', 'Caspofungin', 'Micafungin',
+    'Anidulafungin'
+]
+
+# Value quoted after an agent name: "Colistin (99.8)", "Minocycline (~70)", "Vancomycin 100"
+AGENT_VALUE_PATTERN = r'\s*[\(\[]?\s*~?\s*' + NUMBER_PATTERN
+
+
+def _on_uniques(func, series):
+    """Apply a column parser to the distinct values only and broadcast back."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # Slot for missing cells sits after the distinct values
+    parsed = func(pd.Series(list(uniques) + [np.nan], dtype='object'))
+    codes = np.where(codes == -1, len(uniques), codes)
+    result = parsed.iloc[codes]
+    result.index = series.index
+    return result
+
+
+def _as_text(series):
+    """Return the column as a nullable string column plus its lower-cased form."""
+    text = series.astype('string')
+    return text, text.str.lower()
+
+
+def _missing_mask(series):
+    _, lower = _as_text(series)
+    stripped = lower.str.strip()
+    mask = lower.isna() | stripped.isin(MISSING_VALUES) | lower.str.contains('not in source', regex=False)
+    return mask.fillna(True).astype(bool)
+
+
+def _first_number(series):
+    text, _ = _as_text(series)
+    values = text.str.extract(NUMBER_PATTERN, expand=False).astype('float64')
+    return values.mask(_missing_mask(series), np.nan)
+
+
+def _drug_context(series, drugs):
+    _, lower = _as_text(series)
+    pattern = '(' + '|'.join(d.lower() for d in drugs) + ')'
+    found = lower.str.extract(pattern, expand=False)
+    canonical = {d.lower(): d for d in drugs}
+    return found.map(canonical).astype(pd.CategoricalDtype(drugs))
+
+
+def _resistance_strings(series, priority, ambiguous, drugs):
+    _, lower = _as_text(series)
+    missing = _missing_mask(series)
+    num = _first_number(series)
+
+    is_s = lower.str.contains(SUSCEPTIBLE_PATTERN, regex=True).fillna(False).astype(bool)
+    is_r = lower.str.contains(RESISTANT_PATTERN, regex=True).fillna(False).astype(bool)
+    if priority == 'susceptible':
+        use_s, use_r = is_s, is_r & ~is_s
+    else:
+        use_s, use_r = is_s & ~is_r, is_r
+
+    has_num = num.notna()
+    conditions = [has_num & use_s, has_num & use_r, has_num]
+    value_type = np.select(conditions, [CALCULATED_S, DIRECT_R, AMBIGUOUS], default=NO_NUMBER)
+
+    resistance = np.select(
+        [has_num & use_s, has_num & use_r],
+        [100 - num, num],
+        default=num if ambiguous == 'direct' else np.nan
+    )
+
+    value_type = pd.Series(value_type, index=series.index).where(~missing)
+    return pd.DataFrame({
+        'Resistance_Pct': pd.Series(resistance, index=series.index, dtype='float64').where(~missing),
+        'Value_Type': value_type.astype(pd.CategoricalDtype(VALUE_TYPES)),
+        'Drug_Context': _drug_context(series, drugs)
+    }, index=series.index)
+
+
+def _drug_percentage(series, drugs):
+    text, lower = _as_text(series)
+    result = pd.Series(np.nan, index=series.index, dtype='float64')
+    for drug in drugs:
+        near = lower.str.extract(NUMBER_PATTERN + r'%?\s*[\(-]?\s*' + drug, expand=False).astype('float64')
+        result = result.fillna(near)
+    leading = text.str.extract(r'^' + NUMBER_PATTERN + '%', expand=False).astype('float64')
+    result = result.fillna(leading)
+    return result.mask(_missing_mask(series), np.nan)
+
+
+def _agent_values(series, agents):
+    text, _ = _as_text(series)
+    # Longest names first so "Ampicillin-sulbactam" is not read as "Ampicillin"
+    names = sorted(agents, key=len, reverse=True)
+    pattern = '(' + '|'.join(re.escape(a) for a in names) + ')' + AGENT_VALUE_PATTERN
+    found = text.str.extractall(pattern, flags=re.IGNORECASE)
+    canonical = {a.lower(): a for a in agents}
+    agent = found[0].str.lower().map(canonical).to_numpy()
+    values = found[1].astype('float64').groupby([found.index.get_level_values(0), agent]).first()
+    wide = values.unstack() if len(values) else pd.DataFrame(dtype='float64')
+    return wide.reindex(index=series.index, columns=agents).astype('float64')
+
+
+def missing_mask(series):
+    """True where the cell is empty or says 'Not in source'."""
+    return _on_uniques(_missing_mask, series)
+
+
+def extract_first_number(series):
+    """Extract the first number in each cell as float (NaN when missing)."""
+    return _on_uniques(_first_number, series)
+
+
+def extract_drug_context(series, drugs=DRUG_NAMES):
+    """Return the first drug named in each cell as a categorical column."""
+    return _on_uniques(lambda s: _drug_context(s, drugs), series)
+
+
+def parse_resistance_strings(series, priority='susceptible', ambiguous='drop', drugs=DRUG_NAMES):
+    """
+    Parse a column of resistance/susceptibility strings.
+
+    Returns a DataFrame (same index) with:
+    - Resistance_Pct: resistance %, using 100 - S where the value is a susceptibility
+    - Value_Type: Direct (R) / Calculated (100-S) / Ambiguous / No Number
+    - Drug_Context: first drug named in the string
+
+    priority decides which marker wins when both S and R appear ('susceptible' or
+    'resistant'). ambiguous='direct' takes unlabelled numbers as resistance,
+    'drop' leaves them NaN.
+    """
+    return _on_uniques(lambda s: _resistance_strings(s, priority, ambiguous, drugs), series)
+
+
+def extract_drug_percentage(series, drugs=CARBAPENEMS):
+    """
+    Extract the percentage quoted for the first matching drug, e.g. "14% (Imipenem)".
+
+    Drugs are tried in order; cells without a drug-adjacent number fall back to a
+    leading "NN%".
+    """
+    return _on_uniques(lambda s: _drug_percentage(s, drugs), series)
+
+
+def extract_agent_values(series, agents=CLSI_PANEL):
+    """
+    Wide agent x value matrix from susceptibility panel strings such as
+    "Colistin (99.8), Minocycline (~70)": one float column per agent (first value
+    quoted for it), NaN where the agent is not reported. One combined pattern is
+    matched over the whole column with str.extractall.
+    """
+    return _on_uniques(lambda s: _agent_values(s, agents), series)
@@ -0,0 +1,359 @@
+"""
+Pipeline Runner for the Numbered src/ Scripts
+Declares each stage's inputs and outputs, runs independent stages in parallel
+and skips a stage when the hashes of its code and inputs are unchanged.
+
+Usage (from the repository root):
+    python src/run_pipeline.py                  # run everything that is out of date
+    python src/run_pipeline.py 06 50            # only these stages (and nothing else)
+    python src/run_pipeline.py --force 50       # re-run even if unchanged
+    python src/run_pipeline.py --list           # show stages and dependencies
+
+Paths are relative to the repository root; an input may be a glob pattern
+(e.g. every PDF in the report archive), which stands for all files it matches.
+Stages whose declared inputs are missing are reported and left alone;
+downstream stages still run from the outputs already on disk.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import glob
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from data_cache import file_hash, temp_path
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+STATE_PATH = os.path.join(BASE_DIR, "outputs", ".pipeline_state.json")
+LOG_DIR = os.path.join(BASE_DIR, "outputs", "pipeline_logs")
+
+EXCEL_HOSPITAL = "data/raw/Hospital-Level AMR Resistance, Consumption, and Clinical Burden Metrics.xlsx"
+GAZETTEER = "data/gazetteer/india_gazetteer.csv"
+REPORT_PDFS = "data/raw/ICMR reports/*.pdf"
+REPORT_DUMPS = "outputs/table_p*_*.csv"
+
+STAGES = [
+    # Synthetic data & geocoding
+    {'script': '00_generate_synthetic_data.py',
+     'inputs': [],
+     'outputs': ['data/raw/synthetic_icmr_amr_data.csv']},
+    {'script': '01_geocoding.py',
+     'inputs': ['data/raw/synthetic_icmr_amr_data.csv', GAZETTEER],
+     'outputs': ['data/processed/amr_data_geocoded.csv', 'data/processed/hospital_locations.csv']},
+    {'script': '03_analyze_real_trends.py',
+     'inputs': ['data/raw/real_amr_national.csv'],
+     'outputs': ['outputs/figures/real_amr_trends.png', 'outputs/real_amr_projections.csv']},
+
+    # ICMR report tables (every report in the archive) -> real center-level data
+    {'script': 'report_tables.py',
+     'inputs': [REPORT_PDFS, REPORT_DUMPS],
+     'outputs': ['data/processed/rc_table_store.parquet']},
+    {'script': '05_process_extracted_data.py',
+     'inputs': ['data/processed/rc_table_store.parquet', GAZETTEER],
+     'outputs': ['data/processed/amr_data_real.csv']},
+    {'script': '02_spatial_analysis.py',
+     'inputs': ['data/processed/amr_data_real.csv'],
+     'outputs': ['outputs/figures/map_MRSA_Hotspots_2022.png',
+                 'outputs/figures/map_NDM_Carbapenemase_Hotspots_K_pneumo.png']},
+    {'script': '06_train_spatial_model.py',
+     'inputs': ['data/processed/amr_data_real.csv'],
+     'outputs': ['models/amr_spatial_rf.pkl', 'models/model_features.pkl',
+                 'outputs/ndm_prediction_grid.csv', 'outputs/figures/model_feature_importance.png',
+                 'outputs/figures/map_predicted_ndm_risk.png']},
+    {'script': '22_amr_scorecard.py',
+     'inputs': ['data/processed/amr_data_real.csv'],
+     'outputs': ['outputs/scorecard/hospital_amr_scorecard.csv', 'outputs/scorecard/amr_scorecard_plot.png']},
+
+    # Dataset 1-3 analyses
+    {'script': '08_epidemiology_analysis.py',
+     'inputs': ['data/raw/dataset_1_epidemiology.csv'],
+     'outputs': ['outputs/figures/epi_trend_overall.png', 'outputs/figures/epi_trend_carbapenem.png',
+                 'outputs/figures/epi_heatmap_region.png']},
+    {'script': '09_ml_prediction_new.py',
+     'inputs': ['data/raw/dataset_1_epidemiology.csv'],
+     'outputs': ['models/amr_forecast_rf.pkl', 'models/amr_forecast_levels.pkl',
+                 'outputs/figures/ml_validation_scatter.png']},
+    {'script': '10_analyze_genes_and_geospatial.py',
+     'inputs': ['data/raw/dataset_1_epidemiology.csv', 'data/raw/dataset_2_molecular.csv'],
+     'outputs': ['outputs/figures/mol_gene_prevalence.png', 'outputs/gene_prevalence_weighted.csv',
+                 'outputs/figures/spatial_risk_map_new.png']},
+    {'script': 'dashboard_cube.py',
+     'inputs': ['data/raw/dataset_3_granular.csv'],
+     'outputs': ['data/processed/dashboard_cube.parquet', 'data/processed/dashboard_trends.parquet']},
+    {'script': '12_advanced_modeling.py',
+     'inputs': ['data/raw/dataset_3_granular.csv'],
+     'outputs': ['outputs/figures/granular_resistance_trend.png', 'outputs/figures/mortality_impact.png']},
+    {'script': '15_generate_supp_figures.py',
+     'inputs': ['data/raw/dataset_3_granular.csv'],
+     'outputs': ['outputs/figures/supplementary_learning_curve.png', 'outputs/figures/supplementary_corr_matrix.png']},
+    {'script': '16_manuscript2_analysis.py',
+     'inputs': ['data/raw/dataset_3_granular.csv'],
+     'outputs': ['outputs/figures_manuscript2/fig2_mortality_outcome.png']},
+    {'script': '18_enhance_manuscript2_assets.py',
+     'inputs': ['data/raw/dataset_3_granular.csv'],
+     'outputs': ['outputs/figures_manuscript2/fig1_distribution.png',
+                 'outputs/figures_manuscript2/fig2_mortality_outcome_enhanced.png']},
+    {'script': '23_analyze_consumption_burden.py',
+     'inputs': [EXCEL_HOSPITAL],
+     'outputs': ['outputs/advanced_analytics/resistance_vs_mortality.png']},
+    {'script': '24_policy_impact_analysis.py',
+     'inputs': [EXCEL_HOSPITAL],
+     'outputs': ['outputs/advanced_analytics/red_line_impact_its.png',
+                 'outputs/advanced_analytics/red_line_placebo_scan.csv']},
+    {'script': '25_generate_extra_reports.py',
+     'inputs': ['outputs/scorecard/hospital_amr_scorecard.csv', 'outputs/scorecard/amr_scorecard_plot.png',
+                'outputs/advanced_analytics/red_line_impact_its.png'],
+     'outputs': ['submission_rapid/Policy_Brief_Red_Line_Campaign.docx',
+                 'submission_rapid/Report_Hospital_Scorecard.docx']},
+
+    # Manuscript 3: ITS
+    {'script': '50_its_analysis_pipeline.py',
+     'inputs': ['data/raw/dataset_1_epidemiology.csv', 'data/raw/dataset_3_granular.csv', EXCEL_HOSPITAL],
+     'outputs': ['data/processed/consolidated_amr_its_data.csv',
+                 'outputs/its_analysis/table1_annual_trends.csv', 'outputs/its_analysis/table2_its_coefficients.csv',
+                 'outputs/its_analysis/table3_sensitivity.csv', 'outputs/its_analysis/analysis_summary.json',
+                 'outputs/its_analysis/its_series_coefficients.csv',
+                 'outputs/its_analysis/its_placebo_scan.csv', 'outputs/its_analysis/its_permutation_null.csv',
+                 'outputs/its_analysis/fig1_study_design.png', 'outputs/its_analysis/fig2_its_main_plot.png',
+                 'outputs/its_analysis/fig3_pathogen_subgroups.png', 'outputs/its_analysis/fig4_sensitivity_forest.png']},
+    {'script': '52_generate_ms3_manuscript.py',
+     'inputs': ['outputs/its_analysis/table1_annual_trends.csv', 'outputs/its_analysis/table2_its_coefficients.csv',
+                'outputs/its_analysis/table3_sensitivity.csv', 'outputs/its_analysis/analysis_summary.json',
+                'outputs/its_analysis/fig1_study_design.png', 'outputs/its_analysis/fig2_its_main_plot.png',
+                'outputs/its_analysis/fig3_pathogen_subgroups.png', 'outputs/its_analysis/fig4_sensitivity_forest.png'],
+     'outputs': ['submission_manuscript3/Manuscript_3_IJP_Main.docx', 'submission_manuscript3/Manuscript_3_IJP_Tables.docx',
+                 'submission_manuscript3/Manuscript_3_IJP_Figures.docx',
+                 'submission_manuscript3/Manuscript_3_IJP_Supplementary.docx',
+                 'submission_manuscript3/Cover_Letter_IJP.docx']},
+
+    # Manuscript 4: clinical burden
+    {'script': '60_clinical_burden_analysis.py',
+     'inputs': ['data/raw/dataset_3_granular.csv'],
+     'outputs': ['outputs/clinical_burden/table1_pathogen_outcomes.csv',
+                 'outputs/clinical_burden/table2_temporal_trends.csv', 'outputs/clinical_burden/analysis_summary.json',
+                 'outputs/clinical_burden/bootstrap_intervals.csv',
+                 'outputs/clinical_burden/fig1_mortality_by_pathogen.png',
+                 'outputs/clinical_burden/fig2_temporal_trends.png']},
+    {'script': '61_generate_ms4_manuscript.py',
+     'inputs': ['outputs/clinical_burden/table1_pathogen_outcomes.csv',
+                'outputs/clinical_burden/table2_temporal_trends.csv', 'outputs/clinical_burden/analysis_summary.json',
+                'outputs/clinical_burden/fig1_mortality_by_pathogen.png',
+                'outputs/clinical_burden/fig2_temporal_trends.png'],
+     'outputs': ['submission_manuscript4/Manuscript_4_IJMR_Research_Brief.docx',
+                 'submission_manuscript4/Manuscript_4_IJMR_Tables.docx',
+                 'submission_manuscript4/Manuscript_4_IJMR_Figures.docx',
+                 'submission_manuscript4/Cover_Letter_IJMR_MS4.docx']},
+
+    # Manuscript 5: molecular
+    {'script': '70_molecular_analysis.py',
+     'inputs': ['data/raw/dataset_2_molecular.csv'],
+     'outputs': ['outputs/molecular_analysis/table1_gene_prevalence.csv',
+                 'outputs/molecular_analysis/table2_reserve_susceptibility.csv',
+                 'outputs/molecular_analysis/analysis_summary.json',
+                 'outputs/molecular_analysis/gene_cube.parquet',
+                 'outputs/molecular_analysis/fig1_gene_heatmap.png',
+                 'outputs/molecular_analysis/fig2_temporal_trends.png',
+                 'outputs/molecular_analysis/fig3_reserve_agents.png']},
+    {'script': '71_generate_ms5_manuscript.py',
+     'inputs': ['outputs/molecular_analysis/table1_gene_prevalence.csv',
+                'outputs/molecular_analysis/table2_reserve_susceptibility.csv',
+                'outputs/molecular_analysis/analysis_summary.json',
+                'outputs/molecular_analysis/fig1_gene_heatmap.png',
+                'outputs/molecular_analysis/fig2_temporal_trends.png',
+                'outputs/molecular_analysis/fig3_reserve_agents.png'],
+     'outputs': ['submission_manuscript5/Manuscript_5_Molecular_IJMM_v2.docx',
+                 'submission_manuscript5/Manuscript_5_Molecular_Tables_v2.docx',
+                 'submission_manuscript5/Manuscript_5_Molecular_Figures_v2.docx',
+                 'submission_manuscript5/Cover_Letter_IJMM_MS5_v2.docx']},
+]
+
+for _stage in STAGES:
+    _stage.setdefault('name', os.path.splitext(_stage['script'])[0])
+
+
+def resolve_dependencies(stages):
+    """Map each stage name to the names of the stages producing its inputs."""
+    producers = {}
+    for stage in stages:
+        for out in stage['outputs']:
+            producers[out] = stage['name']
+    return {
+        stage['name']: sorted({producers[i] for i in stage['inputs'] if i in producers and producers[i] != stage['name']})
+        for stage in stages
+    }
+
+
+def local_modules(script, seen=None):
+    """Shared src/ modules imported by a script (recursively), e.g. resistance_parser."""
+    seen = set() if seen is None else seen
+    with open(os.path.join(SRC_DIR, script), encoding='utf-8') as f:
+        source = f.read()
+    for name in re.findall(r'^\s*(?:from|import)\s+(\w+)', source, re.M):
+        fname = f"{name}.py"
+        if fname not in seen and os.path.exists(os.path.join(SRC_DIR, fname)):
+            seen.add(fname)
+            local_modules(fname, seen)
+    return sorted(seen)
+
+
+def input_files(pattern):
+    """Files an input stands for: the path itself, or every match of a glob pattern (sorted)."""
+    if glob.has_magic(pattern):
+        return sorted(os.path.relpath(p, BASE_DIR) for p in glob.glob(os.path.join(BASE_DIR, pattern)))
+    return [pattern]
+
+
+def stage_hash(stage):
+    """Hash of the stage's script, the shared modules it imports and its input files."""
+    h = hashlib.sha256()
+    for code in [stage['script']] + local_modules(stage['script']):
+        h.update(code.encode())
+        h.update(file_hash(os.path.join(SRC_DIR, code)).encode())
+    for pattern in stage['inputs']:
+        for path in input_files(pattern):
+            h.update(path.encode())
+            h.update(file_hash(os.path.join(BASE_DIR, path)).encode())
+    return h.hexdigest()
+
+
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp_path = temp_path(STATE_PATH)
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def run_stage(stage, state, force=False, dry_run=False):
+    """Run one stage unless it is up to date. Returns (status, seconds, hash)."""
+    missing = [p for p in stage['inputs']
+               if not input_files(p) or not all(os.path.exists(os.path.join(BASE_DIR, f)) for f in input_files(p))]
+    if missing:
+        print(f"  {stage['name']}: input not found: {missing[0]}")
+        return "missing input", 0.0, None
+
+    digest = stage_hash(stage)
+    outputs_present = all(os.path.exists(os.path.join(BASE_DIR, p)) for p in stage['outputs'])
+    if not force and outputs_present and state.get(stage['name']) == digest:
+        return "unchanged", 0.0, digest
+    if dry_run:
+        return "would run", 0.0, None
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    env = dict(os.environ, MPLBACKEND='Agg')
+    start = time.perf_counter()
+    with open(os.path.join(LOG_DIR, f"{stage['name']}.log"), 'w') as log:
+        proc = subprocess.run([sys.executable, os.path.join('src', stage['script'])],
+                              cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT, env=env)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        return f"failed (exit {proc.returncode})", elapsed, None
+    # Outputs may have been rewritten; inputs are unchanged so the hash still holds
+    return "ran", elapsed, digest
+
+
+def select_stages(stages, patterns):
+    """Stages whose name starts with any of the given prefixes (all if none given)."""
+    if not patterns:
+        return stages
+    chosen = [s for s in stages if any(s['name'].startswith(p) for p in patterns)]
+    if not chosen:
+        raise SystemExit(f"No stage matches: {', '.join(patterns)}")
+    return chosen
+
+
+def run_pipeline(patterns=None, force=False, jobs=None, dry_run=False):
+    """Run the selected stages in dependency order, independent stages in parallel."""
+    stages = select_stages(STAGES, patterns)
+    by_name = {s['name']: s for s in stages}
+    deps = {name: [d for d in ds if d in by_name] for name, ds in resolve_dependencies(stages).items()}
+
+    state = load_state()
+    results = {}
+    pending = dict(deps)
+    running = {}
+    failed = set()
+
+    print(f"Running {len(stages)} stages (jobs={jobs or os.cpu_count()})...")
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        while pending or running:
+            # Block stages downstream of a failure
+            for name in [n for n, ds in pending.items() if any(d in failed for d in ds)]:
+                results[name] = ("blocked (upstream failed)", 0.0)
+                failed.add(name)
+                del pending[name]
+            # Launch every stage whose upstream stages are done
+            for name in [n for n, ds in pending.items() if all(d in results for d in ds)]:
+                running[pool.submit(run_stage, by_name[name], state, force, dry_run)] = name
+                del pending[name]
+            if not running:
+                if pending:
+                    raise SystemExit(f"Dependency cycle among: {', '.join(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                status, elapsed, digest = future.result()
+                results[name] = (status, elapsed)
+                print(f"  {name}: {status}" + (f" ({elapsed:.1f}s)" if elapsed else ""))
+                if status.startswith("failed"):
+                    failed.add(name)
+                elif digest and not dry_run:
+                    state[name] = digest
+                    save_state(state)
+
+    print_timing_table(stages, results)
+    return results
+
+
+def print_timing_table(stages, results):
+    """Print a per-stage status and wall-clock table."""
+    width = max(len(s['name']) for s in stages) + 2
+    print("\n" + "=" * (width + 40))
+    print(f"{'Stage':<{width}}{'Status':<30}{'Time (s)':>10}")
+    print("-" * (width + 40))
+    total = 0.0
+    for stage in stages:
+        status, elapsed = results.get(stage['name'], ("not run", 0.0))
+        total += elapsed
+        print(f"{stage['name']:<{width}}{status:<30}{elapsed:>10.1f}")
+    print("-" * (width + 40))
+    print(f"{'Total (sum of stages)':<{width}}{'':<30}{total:>10.1f}")
+
+
+def list_stages():
+    deps = resolve_dependencies(STAGES)
+    for stage in STAGES:
+        after = ', '.join(deps[stage['name']]) or '-'
+        print(f"{stage['name']:<40} after: {after}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the AMR analysis pipeline.")
+    parser.add_argument('stages', nargs='*', help="Stage name prefixes to run (default: all)")
+    parser.add_argument('--force', action='store_true', help="Re-run stages even if unchanged")
+    parser.add_argument('--jobs', type=int, default=None, help="Parallel stages (default: CPU count)")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would run without running it")
+    parser.add_argument('--list', action='store_true', help="List stages and their dependencies")
+    args = parser.parse_args()
+
+    if args.list:
+        list_stages()
+    else:
+        results = run_pipeline(args.stages, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+        if any(status.startswith(("failed", "blocked")) for status, _ in results.values()):
+            sys.exit(1)
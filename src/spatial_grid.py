@@ -0,0 +1,94 @@
+"""
+Grid Inference Engine for Spatial AMR Risk Surfaces
+Builds the lat/lon feature matrix for a marker in one shot and predicts in batches.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Bounding box used for all-India risk surfaces (Lat, Lon)
+INDIA_LAT_RANGE = (8, 37)
+INDIA_LON_RANGE = (68, 97)
+
+DEFAULT_BATCH_SIZE = 250_000
+
+
+def make_grid_axes(n_lat=50, n_lon=None, lat_range=INDIA_LAT_RANGE, lon_range=INDIA_LON_RANGE):
+    """Return evenly spaced latitude and longitude axes for the prediction grid."""
+    if n_lon is None:
+        n_lon = n_lat
+    return np.linspace(lat_range[0], lat_range[1], n_lat), np.linspace(lon_range[0], lon_range[1], n_lon)
+
+
+def marker_columns(feature_cols, pathogen=None, gene=None):
+    """Return the one-hot feature columns switched on for a pathogen/gene marker."""
+    active = []
+    for col in (f'Pathogen_{pathogen}', f'Antibiotic_Gene_{gene}'):
+        if col in feature_cols:
+            active.append(col)
+    return active
+
+
+def build_grid_features(feature_cols, lats, lons, active_cols=()):
+    """Build the feature matrix for a batch of grid points (all other features zero)."""
+    X = np.zeros((len(lats), len(feature_cols)), dtype=np.float64)
+    col_idx = {c: i for i, c in enumerate(feature_cols)}
+    X[:, col_idx['Latitude']] = lats
+    X[:, col_idx['Longitude']] = lons
+    for col in active_cols:
+        X[:, col_idx[col]] = 1
+    return pd.DataFrame(X, columns=feature_cols)
+
+
+def predict_grid(model, feature_cols, lat_range, lon_range, pathogen=None, gene=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Predict resistance over a lat x lon grid for one pathogen/gene marker.
+
+    Points are ordered latitude-major (same order as the original nested loop).
+    Only one batch of features is materialized at a time, so memory stays bounded
+    for 1000x1000 and finer grids.
+    """
+    lat_range = np.asarray(lat_range, dtype=float)
+    lon_range = np.asarray(lon_range, dtype=float)
+    n_lon = len(lon_range)
+    n_points = len(lat_range) * n_lon
+    active_cols = marker_columns(feature_cols, pathogen, gene)
+
+    preds = np.empty(n_points, dtype=np.float64)
+    for start in range(0, n_points, batch_size):
+        flat_idx = np.arange(start, min(start + batch_size, n_points))
+        lats = lat_range[flat_idx // n_lon]
+        lons = lon_range[flat_idx % n_lon]
+        X_batch = build_grid_features(feature_cols, lats, lons, active_cols)
+        preds[start:start + len(flat_idx)] = model.predict(X_batch)
+
+    return pd.DataFrame({
+        'Latitude': np.repeat(lat_range, n_lon),
+        'Longitude': np.tile(lon_range, len(lat_range)),
+        'Predicted_Resistance': preds
+    })
+
+
+def predict_marker_grids(model, feature_cols, markers, lat_range, lon_range,
+                         batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Predict grids for several (pathogen, gene) markers, e.g. every combination
+    in amr_data_real.csv. Returns one long DataFrame tagged by marker.
+    """
+    frames = []
+    for pathogen, gene in markers:
+        grid_df = predict_grid(model, feature_cols, lat_range, lon_range,
+                               pathogen=pathogen, gene=gene, batch_size=batch_size)
+        grid_df.insert(0, 'Antibiotic_Gene', gene)
+        grid_df.insert(0, 'Pathogen', pathogen)
+        frames.append(grid_df)
+    if not frames:
+        return pd.DataFrame(columns=['Pathogen', 'Antibiotic_Gene', 'Latitude', 'Longitude', 'Predicted_Resistance'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def data_markers(df):
+    """List the (Pathogen, Antibiotic_Gene) combinations present in the data."""
+    pairs = df[['Pathogen', 'Antibiotic_Gene']].drop_duplicates()
+    return list(pairs.itertuples(index=False, name=None))
@@ -0,0 +1,68 @@
+"""Bootstrap intervals against scipy.stats.bootstrap, and the jackknife against leave-one-out loops."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+import bootstrap_engine
+from bootstrap_engine import bootstrap_ci, bootstrap_distribution, group_ci, jackknife
+
+
+@pytest.fixture
+def sample():
+    return np.random.default_rng(1).gamma(2.0, 10.0, size=60)
+
+
+@pytest.mark.parametrize('statistic', ['mean', 'median'])
+def test_intervals_match_scipy_bootstrap(sample, statistic):
+    n, estimate, se, pct_lo, pct_hi, bca_lo, bca_hi = group_ci(sample, n_boot=20_000, statistic=statistic, n_jobs=1)
+    func = getattr(np, statistic)
+    kwargs = dict(n_resamples=20_000, random_state=np.random.default_rng(7), vectorized=True)
+    ref_pct = stats.bootstrap((sample,), func, method='percentile', **kwargs)
+    # Different random draws: agreement is up to Monte Carlo error
+    tol = 0.1 * ref_pct.standard_error
+    assert n == len(sample) and estimate == pytest.approx(func(sample))
+    assert se == pytest.approx(ref_pct.standard_error, rel=0.05)
+    np.testing.assert_allclose([pct_lo, pct_hi], ref_pct.confidence_interval, atol=tol)
+    # scipy's bias correction ignores ties with the estimate, which are common for the median;
+    # group_ci counts them half, so only the mean's BCa bounds are comparable
+    if statistic == 'mean':
+        ref_bca = stats.bootstrap((sample,), func, method='BCa', **kwargs)
+        np.testing.assert_allclose([bca_lo, bca_hi], ref_bca.confidence_interval, atol=tol)
+
+
+@pytest.mark.parametrize('statistic', ['mean', 'median', np.std])
+def test_jackknife_matches_leave_one_out_loop(sample, statistic):
+    func = bootstrap_engine._statistic(statistic)
+    expected = [func(np.delete(sample, i)) for i in range(len(sample))]
+    np.testing.assert_allclose(jackknife(sample, statistic), expected)
+
+
+def test_jackknife_chunks_bound_memory(sample, monkeypatch):
+    monkeypatch.setattr(bootstrap_engine, 'MAX_CELLS', 100)
+    expected = [np.std(np.delete(sample, i)) for i in range(len(sample))]
+    np.testing.assert_allclose(jackknife(sample, np.std), expected)
+
+
+def test_replicates_do_not_depend_on_workers(sample, monkeypatch):
+    monkeypatch.setattr(bootstrap_engine, 'MAX_CELLS', 60 * 250)
+    monkeypatch.setattr(bootstrap_engine, 'MIN_PARALLEL_CELLS', 0)
+    serial = bootstrap_distribution(sample, n_boot=1_000, n_jobs=1)
+    pooled = bootstrap_distribution(sample, n_boot=1_000, n_jobs=2)
+    np.testing.assert_array_equal(serial, pooled)
+
+
+def test_group_intervals_do_not_depend_on_other_groups(sample):
+    df = pd.DataFrame({'Group': np.repeat(['a', 'b', 'c'], 20), 'Value': sample})
+    df.loc[0, 'Value'] = np.nan
+    full = bootstrap_ci(df, 'Value', by='Group', n_boot=500, n_jobs=1)
+    without_b = bootstrap_ci(df[df['Group'] != 'b'], 'Value', by='Group', n_boot=500, n_jobs=1)
+    pd.testing.assert_frame_equal(full.loc[['a', 'c']], without_b)
+    assert full.loc['a', 'N'] == 19
+
+
+def test_small_groups_and_multiple_keys():
+    df = pd.DataFrame({'A': ['x', 'x', 'y'], 'B': [1, 1, 2], 'Value': [1.0, 3.0, 5.0]})
+    out = bootstrap_ci(df, 'Value', by=['A', 'B'], n_boot=200, n_jobs=1)
+    assert out.index.names == ['A', 'B']
+    assert out.loc[('y', 2), 'Estimate'] == 5.0 and out.loc[('y', 2), ['Pct_Lower', 'BCa_Upper']].isna().all()
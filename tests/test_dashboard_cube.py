@@ -0,0 +1,103 @@
+"""The dashboard cube against groupby on the parsed source rows."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import dashboard_cube
+import data_cache
+from dashboard_cube import build_dashboard_cube, cube_cells, load_cube, rollup, trend_lines
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Sources written by the tests are cached outside the repository
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def records():
+    rng = np.random.default_rng(0)
+    n = 300
+    resistance = rng.uniform(0, 100, n)
+    resistance[rng.random(n) < 0.2] = np.nan
+    isolates = rng.integers(10, 400, n).astype(float)
+    isolates[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Year': rng.integers(2016, 2023, n),
+        'Center_Name': rng.choice(['AIIMS', 'CMC', 'JIPMER'], n),
+        'Pathogen': rng.choice(['E. coli', 'K. pneumoniae'], n),
+        'Resistance': resistance,
+        'Total_Isolates': isolates,
+    })
+
+
+@pytest.mark.parametrize('by', [['Year'], ['Center_Name', 'Pathogen'], ['Year', 'Center_Name', 'Pathogen']])
+def test_rollup_matches_groupby_on_rows(records, by):
+    result = rollup(cube_cells(records), by).set_index(by)
+    grouped = records.groupby(by)
+    np.testing.assert_array_equal(result['Records'], grouped.size())
+    np.testing.assert_allclose(result['Mean_Resistance'], grouped['Resistance'].mean())
+    np.testing.assert_allclose(result['Resistance_Max'], grouped['Resistance'].max())
+    quoted = records.dropna(subset=['Resistance', 'Total_Isolates'])
+    weighted = quoted.groupby(by).apply(lambda g: np.average(g['Resistance'], weights=g['Total_Isolates']),
+                                        include_groups=False)
+    np.testing.assert_allclose(result['Weighted_Resistance'].loc[weighted.index], weighted)
+
+
+def test_rows_weigh_one_without_isolate_counts(records):
+    cube = cube_cells(records.drop(columns='Total_Isolates'))
+    np.testing.assert_allclose(cube['Weight_Sum'], cube['Resistance_N'])
+
+
+@pytest.mark.parametrize('ext', ['parquet', 'csv'])
+def test_built_cube_filters_on_load(records, tmp_path, ext):
+    if ext == 'parquet' and not dashboard_cube.HAS_PARQUET:
+        pytest.skip("pyarrow not installed")
+    source = tmp_path / 'source.csv'
+    records.to_csv(source, index=False)
+    path = str(tmp_path / f'cube.{ext}')
+    cube = build_dashboard_cube(str(source), path, trend_path=str(tmp_path / f'trends.{ext}'))
+    part = load_cube(path, Year=[2018, 2019], Pathogen='E. coli')
+    expected = cube[cube['Year'].isin([2018, 2019]) & (cube['Pathogen'] == 'E. coli')]
+    pd.testing.assert_frame_equal(part.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+    if ext == 'parquet':
+        import pyarrow.parquet as pq
+        assert pq.ParquetFile(path).num_row_groups == cube['Year'].nunique()
+
+
+def test_ensure_cube_rebuilds_when_source_is_newer(records, tmp_path):
+    source = tmp_path / 'source.csv'
+    records.to_csv(source, index=False)
+    path, trends = str(tmp_path / 'cube.csv'), str(tmp_path / 'trends.csv')
+    dashboard_cube.ensure_cube(str(source), path, trends)
+    records.iloc[:10].to_csv(source, index=False)
+    later = os.path.getmtime(path) + 10
+    os.utime(source, (later, later))
+    dashboard_cube.ensure_cube(str(source), path, trends)
+    assert load_cube(path)['Records'].sum() == 10
+
+
+def test_trend_lines_match_statsmodels_on_rows(records):
+    import statsmodels.api as sm
+    trends = trend_lines(cube_cells(records))
+    for pathogen, rows in records.dropna(subset=['Resistance']).groupby('Pathogen'):
+        ols = sm.OLS(rows['Resistance'].to_numpy(), sm.add_constant(rows['Year'].to_numpy(dtype=float))).fit()
+        line = trends[trends['Pathogen'] == pathogen]
+        assert line['Year'].tolist() == list(range(rows['Year'].min(), rows['Year'].max() + 1))
+        first = line.iloc[0]
+        assert (first['Intercept'], first['Slope']) == pytest.approx(tuple(ols.params), rel=1e-6)
+        assert first['Slope_SE'] == pytest.approx(ols.bse[1], rel=1e-6)
+        assert first['Slope_PValue'] == pytest.approx(ols.pvalues[1], rel=1e-6)
+        assert first['R_Squared'] == pytest.approx(ols.rsquared, rel=1e-6)
+        band = ols.get_prediction(sm.add_constant(line['Year'].to_numpy(dtype=float))).summary_frame(alpha=0.05)
+        np.testing.assert_allclose(line['Fitted'], band['mean'], rtol=1e-8)
+        np.testing.assert_allclose(line['CI_Lower'], band['mean_ci_lower'], rtol=1e-8)
+        np.testing.assert_allclose(line['CI_Upper'], band['mean_ci_upper'], rtol=1e-8)
+
+
+def test_trend_lines_skip_unfittable_groups(records):
+    one_year = records.assign(Pathogen='Single year', Year=2020).iloc[:5]
+    two_rows = records.assign(Pathogen='Two rows').iloc[:2].assign(Year=[2019, 2020])
+    trends = trend_lines(cube_cells(pd.concat([records, one_year, two_rows])))
+    assert set(trends['Pathogen']) == {'E. coli', 'K. pneumoniae'}
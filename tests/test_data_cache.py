@@ -0,0 +1,57 @@
+"""The Parquet cache returns what pandas reads from the source, and follows source changes."""
+
+import os
+import pandas as pd
+import pytest
+import data_cache
+
+pytestmark = pytest.mark.skipif(not data_cache.HAS_PARQUET, reason="pyarrow not installed")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.mark.parametrize('fname', ['dataset_1_epidemiology.csv', 'dataset_3_granular.csv'])
+def test_load_source_matches_read_csv(fname):
+    path = os.path.join(data_cache.RAW_DIR, fname)
+    if not os.path.exists(path):
+        pytest.skip(f"{fname} not bundled")
+    pd.testing.assert_frame_equal(data_cache.load_source(path), pd.read_csv(path), check_dtype=False)
+    # Second read comes from the cache file
+    pd.testing.assert_frame_equal(data_cache.load_source(path), pd.read_csv(path), check_dtype=False)
+
+
+def test_cache_follows_source_changes(tmp_path, cache_dir):
+    source = tmp_path / 'source.csv'
+    source.write_text("Center,Value\nA,1\nA,2\nB,3\n")
+    first = data_cache.build_cache(str(source))
+    source.write_text("Center,Value\nA,1\nC,5\n")
+    second = data_cache.build_cache(str(source))
+    assert first != second
+    assert os.listdir(cache_dir) == [os.path.basename(second)]
+    assert data_cache.load_source(str(source))['Center'].tolist() == ['A', 'C']
+
+
+def test_categorical_option_and_streaming(tmp_path):
+    source = tmp_path / 'source.csv'
+    source.write_text("Center,Value\n" + "".join(f"{'AB'[i % 2]},{i}\n" for i in range(10)))
+    assert isinstance(data_cache.load_source(str(source), categorical=True)['Center'].dtype, pd.CategoricalDtype)
+    chunks = list(data_cache.iter_source(str(source), chunksize=4))
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.read_csv(source), check_dtype=False)
+
+
+def test_temp_paths_are_unique(tmp_path):
+    out = str(tmp_path / 'table.parquet')
+    first, second = data_cache.temp_path(out), data_cache.temp_path(out)
+    assert first != second and os.path.dirname(first) == str(tmp_path)
+
+
+def test_temp_files_get_umask_permissions(tmp_path):
+    out = str(tmp_path / 'table.parquet')
+    pd.DataFrame({'a': [1]}).to_csv(tmp_path / 'plain.csv')
+    os.replace(data_cache.temp_path(out), out)
+    assert os.stat(out).st_mode & 0o777 == os.stat(tmp_path / 'plain.csv').st_mode & 0o777
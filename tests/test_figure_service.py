@@ -0,0 +1,98 @@
+"""Figure cache: jobs render once, and re-render when data, style or options change."""
+
+import importlib
+import os
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+import figure_service
+
+matplotlib.use('Agg')
+
+
+def plot_line(df, title='Trend'):
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    ax.plot(df['Year'], df['Value'])
+    ax.set_title(title)
+    return fig
+
+
+def plot_nothing(df):
+    return None
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(figure_service, 'FIGURE_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({'Year': [2016, 2017, 2018], 'Value': [10.0, 12.5, 11.0]})
+
+
+def test_second_run_is_served_from_cache(tmp_path, data):
+    out = str(tmp_path / 'out' / 'trend.png')
+    job = figure_service.figure_job(plot_line, data, outputs={out: {'dpi': 50}})
+    assert figure_service.render_figures([job]) == ['rendered']
+    first = open(out, 'rb').read()
+    os.remove(out)
+    assert figure_service.render_figures([job]) == ['cached']
+    assert open(out, 'rb').read() == first
+
+
+def test_key_follows_data_arguments_and_style(data):
+    job = figure_service.figure_job(plot_line, data, outputs={'x.png': {}})
+    style = figure_service.current_style()
+    key = figure_service.job_key(job, style)
+    changed = data.assign(Value=data['Value'] + 1)
+    assert figure_service.job_key(figure_service.figure_job(plot_line, changed, outputs={'x.png': {}}), style) != key
+    assert figure_service.job_key(figure_service.figure_job(plot_line, data, title='Other', outputs={}), style) != key
+    with matplotlib.rc_context({'font.size': 20}):
+        assert figure_service.job_key(job, figure_service.current_style()) != key
+    assert figure_service.job_key(job, style) == key
+
+
+def test_save_options_get_their_own_cache_file(data):
+    job = figure_service.figure_job(plot_line, data, outputs={'a.png': {'dpi': 50}, 'b.png': {'dpi': 100}})
+    files = figure_service.cached_files(job, 'key')
+    assert files['a.png'] != files['b.png']
+
+
+def test_parallel_jobs_and_empty_figures(tmp_path, data):
+    jobs = [figure_service.figure_job(plot_line, data, title=str(i), outputs={str(tmp_path / f"{i}.png"): {'dpi': 40}})
+            for i in range(2)]
+    jobs.append(figure_service.figure_job(plot_nothing, data, outputs={str(tmp_path / 'none.png'): {}}))
+    assert figure_service.render_figures(jobs, n_jobs=2) == ['rendered', 'rendered', 'skipped']
+    assert sorted(os.listdir(tmp_path)) == ['0.png', '1.png', 'cache']
+
+
+def test_cache_writes_leave_no_temp_files(tmp_path, data, cache_dir):
+    jobs = [figure_service.figure_job(plot_line, data, outputs={str(tmp_path / 'a.png'): {}, str(tmp_path / 'a.pdf'): {}})]
+    figure_service.render_figures(jobs)
+    assert sorted(os.path.splitext(f)[1] for f in os.listdir(cache_dir)) == ['.pdf', '.png']
+
+
+def test_analysis_script_figures_render_through_the_cache(tmp_path):
+    train = importlib.import_module('06_train_spatial_model')
+    epi = importlib.import_module('08_epidemiology_analysis')
+    trends = pd.DataFrame({'Year': [2017, 2018, 2017, 2018], 'Pathogen': ['E. coli'] * 2 + ['K. pneumoniae'] * 2,
+                           'Resistance_Pct': [20.0, 25.0, 50.0, 55.0], 'Is_Carbapenem': [False, False, True, True]})
+    lat, lon = np.meshgrid([10.0, 20.0, 30.0], [70.0, 80.0, 90.0], indexing='ij')
+    grid = pd.DataFrame({'Latitude': lat.ravel(), 'Longitude': lon.ravel(), 'Predicted_Resistance': lat.ravel()})
+    pivot = trends.pivot_table(index='Pathogen', columns='Year', values='Resistance_Pct')
+    jobs = [
+        figure_service.figure_job(train.plot_feature_importance, np.array([0.1, 0.5, 0.4]), ['a', 'b', 'c'],
+                                  outputs={str(tmp_path / 'importance.png'): {'dpi': 40}}),
+        figure_service.figure_job(train.plot_ndm_risk_map, grid, outputs={str(tmp_path / 'ndm.png'): {'dpi': 40}}),
+        figure_service.figure_job(epi.plot_overall_trends, trends, outputs={str(tmp_path / 'overall.png'): {'dpi': 40}}),
+        figure_service.figure_job(epi.plot_carbapenem_trends, trends.assign(Is_Carbapenem=False),
+                                  outputs={str(tmp_path / 'carbapenem.png'): {'dpi': 40}}),
+        figure_service.figure_job(epi.plot_region_heatmap, pivot, outputs={str(tmp_path / 'region.png'): {'dpi': 40}}),
+    ]
+    assert figure_service.render_figures(jobs, n_jobs=2) == ['rendered', 'rendered', 'rendered', 'skipped', 'rendered']
+    assert figure_service.render_figures(jobs) == ['cached', 'cached', 'cached', 'skipped', 'cached']
+    assert not (tmp_path / 'carbapenem.png').exists()
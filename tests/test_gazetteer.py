@@ -0,0 +1,77 @@
+"""Offline gazetteer lookups: RC codes, aliases, fuzzy names and named areas."""
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from data_cache import BASE_DIR
+from gazetteer import lookup, lookup_rc, normalize_name, rc_code, rc_places, resolve
+
+# Coordinates 01_geocoding.py hard-coded for the synthetic centers before the gazetteer
+OLD_COORDS = {
+    'AIIMS, New Delhi': (28.5672, 77.2100),
+    'CMC, Vellore': (12.9248, 79.1352),
+    'PGIMER, Chandigarh': (30.7634, 76.7797),
+    'JIPMER, Puducherry': (11.9547, 79.7963),
+    'Apollo Hospital, Chennai': (13.0405, 80.2505),
+    'Tata Memorial Hospital, Mumbai': (18.9912, 72.8258),
+    'Kaling Institute, Bhubaneswar': (20.3546, 85.8198),
+    'Amrita Institute, Kochi': (10.0326, 76.2829),
+    'Sams Hospital, Hyderabad': (17.3850, 78.4867),
+    'King George Medical Univ, Lucknow': (26.8687, 80.9157),
+    'IPGMER, Kolkata': (22.5298, 88.3442),
+    'SMS Hospital, Jaipur': (26.9066, 75.8173),
+    'RIMS, Ranchi': (23.3644, 85.3400),
+    'GMCH, Guwahati': (26.1528, 91.7709),
+}
+
+
+@pytest.mark.parametrize('name', sorted(OLD_COORDS))
+def test_synthetic_centers_keep_their_coordinates(name):
+    place = lookup(name)
+    assert place is not None
+    np.testing.assert_allclose((place.latitude, place.longitude), OLD_COORDS[name], atol=0.03)
+
+
+def test_rc_codes_in_all_spellings():
+    assert rc_code('AIIMS (RC01)') == rc_code('Regional Centre 1') == rc_code('RC-1') == 'RC1'
+    assert lookup('AIIMS (RC01)').name == lookup_rc('RC 01').name == 'AIIMS New Delhi'
+    assert lookup('Regional Center 04').name == 'PGIMER Chandigarh'
+    assert rc_code('Arcade 12') is None
+
+
+def test_rc_places_match_processed_real_data():
+    path = os.path.join(BASE_DIR, "data", "processed", "amr_data_real.csv")
+    if not os.path.exists(path):
+        pytest.skip("amr_data_real.csv not built")
+    real = pd.read_csv(path)[['RC_Code', 'Center_Name', 'Latitude', 'Longitude']].drop_duplicates()
+    merged = real.merge(rc_places(), on='RC_Code', suffixes=('', '_gaz'))
+    assert len(merged) == len(real)
+    assert (merged['Center_Name'] == merged['Center_Name_gaz']).all()
+    np.testing.assert_allclose(merged[['Latitude', 'Longitude']], merged[['Latitude_gaz', 'Longitude_gaz']])
+
+
+def test_fuzzy_and_named_area_fallbacks():
+    assert normalize_name('Nodal: PGIMER, Chandigarh (Ward)') == 'pgimer chandigarh'
+    assert lookup('Christian Medical Colege Velore').name == 'CMC Vellore'
+    area = lookup('Some District Hospital Mumbai')
+    assert area is not None and area.type != 'hospital' and area.city == 'Mumbai'
+    assert lookup('Network of 39 hospitals across India') is None
+    assert lookup(None) is None and lookup(float('nan')) is None
+
+
+def test_resolve_broadcasts_distinct_names():
+    names = pd.Series(['CMC, Vellore', None, 'CMC, Vellore', 'Unknown place xyz'], index=[5, 6, 7, 8])
+    out = resolve(names)
+    assert out.index.tolist() == [5, 6, 7, 8]
+    assert out['Gazetteer_Name'].tolist()[::2] == ['CMC Vellore', 'CMC Vellore']
+    assert out.loc[[6, 8], 'Latitude'].isna().all()
+
+
+def test_tracked_hospital_locations_match_the_gazetteer():
+    path = os.path.join(BASE_DIR, 'data', 'processed', 'hospital_locations.csv')
+    if not os.path.exists(path):
+        pytest.skip("hospital_locations.csv not built")
+    tracked = pd.read_csv(path)
+    places = resolve(tracked['Center_Name'])
+    np.testing.assert_allclose(tracked[['Latitude', 'Longitude']], places[['Latitude', 'Longitude']])
@@ -0,0 +1,76 @@
+"""Roll-ups of the sparse gene cube against groupby on the detection rows."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from gene_cube import UNKNOWN, build_cube, load_cube, rollup, save_cube, slice_cube, weighted_prevalence, wilson_interval
+
+
+@pytest.fixture
+def detections():
+    rng = np.random.default_rng(0)
+    n = 400
+    prevalence = rng.uniform(0, 100, n)
+    prevalence[rng.random(n) < 0.3] = np.nan
+    isolates = rng.integers(5, 500, n).astype(float)
+    isolates[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Gene': rng.choice(['NDM', 'OXA-48', 'TEM'], n),
+        'Organism': rng.choice(['E. coli', 'K. pneumoniae', None], n),
+        'Year': rng.integers(2017, 2025, n),
+        'Specimen': rng.choice(['Blood', 'Urine'], n),
+        'Setting': rng.choice(['ICU', 'Ward', None], n),
+        'Prevalence': prevalence,
+        'Isolates': isolates,
+    })
+
+
+@pytest.mark.parametrize('by', [['Gene'], ['Year', 'Gene'], ['Organism', 'Setting']])
+def test_rollup_matches_groupby_on_rows(detections, by):
+    cube = build_cube(detections)
+    assert len(cube) < len(detections)
+    rows = detections.fillna({'Organism': UNKNOWN, 'Setting': UNKNOWN})
+    result = rollup(cube, by)
+    grouped = rows.groupby(by)
+    assert result.index.map(str).tolist() == grouped.size().index.map(str).tolist()
+    np.testing.assert_array_equal(result['Detections'], grouped.size())
+    np.testing.assert_allclose(result['Mean_Prevalence'], grouped['Prevalence'].mean())
+    quoted = rows.dropna(subset=['Prevalence', 'Isolates'])
+    weighted = quoted.groupby(by).apply(lambda g: np.average(g['Prevalence'], weights=g['Isolates']),
+                                        include_groups=False)
+    np.testing.assert_allclose(result['Weighted_Prevalence'].dropna(), weighted)
+
+
+def test_slice_and_round_trip(detections, tmp_path):
+    cube = build_cube(detections)
+    part = slice_cube(cube, Gene='NDM', Year=[2018, 2019])
+    assert set(part['Gene']) == {'NDM'} and set(part['Year']) == {2018, 2019}
+    rows = detections[(detections['Gene'] == 'NDM') & detections['Year'].isin([2018, 2019])]
+    assert part['Detections'].sum() == len(rows)
+    for path in [str(tmp_path / 'cube.csv'), str(tmp_path / 'cube.parquet')]:
+        save_cube(cube, path)
+        loaded = load_cube(path)
+        assert isinstance(loaded['Gene'].dtype, pd.CategoricalDtype)
+        assert rollup(loaded, ['Gene']).index.astype(str).tolist() == ['NDM', 'OXA-48', 'TEM']
+        np.testing.assert_allclose(rollup(loaded, ['Gene']).to_numpy(), rollup(cube, ['Gene']).to_numpy())
+
+
+def test_wilson_interval_matches_statsmodels():
+    from statsmodels.stats.proportion import proportion_confint
+    p = np.array([0.0, 0.05, 0.5, 0.93, 1.0])
+    n = np.array([20, 150, 7, 1000, 3])
+    lower, upper = wilson_interval(p, n)
+    ref_lower, ref_upper = proportion_confint(p * n, n, alpha=0.05, method='wilson')
+    np.testing.assert_allclose(lower, ref_lower, atol=1e-4)
+    np.testing.assert_allclose(upper, ref_upper, atol=1e-4)
+    assert np.isnan(wilson_interval([0.5], [0])[0]).all()
+
+
+def test_weighted_prevalence_counts_positive_isolates(detections):
+    result = weighted_prevalence(detections, ['Gene'])
+    quoted = detections.dropna(subset=['Prevalence', 'Isolates'])
+    positives = (quoted['Prevalence'] * quoted['Isolates'] / 100).groupby(quoted['Gene']).sum()
+    np.testing.assert_allclose(result['Positive_Isolates'], positives)
+    np.testing.assert_allclose(result['Weighted_N'], quoted.groupby('Gene')['Isolates'].sum())
+    assert (result['CI_Lower'] <= result['Weighted_Prevalence']).all()
+    assert (result['Weighted_Prevalence'] <= result['CI_Upper']).all()
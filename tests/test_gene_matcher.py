@@ -0,0 +1,71 @@
+"""One-pass gene matching against the per-gene regex loop of 70_molecular_analysis.py."""
+
+import os
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from data_cache import RAW_DIR
+from gene_matcher import GENE_SYNONYMS, Mention, find_genes, gene_presence, match_genes
+
+TEXTS = pd.Series([
+    'CTXM-15 (34%), OXA-1 (28%), NDM-1 (19%)',
+    'blaOXA-23 (predominant), blaNDM',
+    'OXA23 [~76 %], important IMP-like (3%)',
+    'TEM (29.58%), NDM-1 (14.47%), tem',
+    'mecA positive; vanA (2.5%)',
+    'Not in source',
+    None,
+], index=list('abcdefg'))
+
+
+def old_gene_rows(texts):
+    """(row, gene, prevalence) as the old loop built them: one search per gene."""
+    rows = []
+    for label, text in texts.items():
+        text = str(text)
+        if text in ('nan', 'Not in source', 'None'):
+            continue
+        for gene, patterns in GENE_SYNONYMS.items():
+            pattern = '|'.join(patterns)
+            if re.search(pattern, text, re.IGNORECASE):
+                regex = rf'(?:{pattern})[^,]*?[\(\[]\s*(?:[^)\d]*?)(\d+\.?\d*)\s*%'
+                prev = re.search(regex, text, re.IGNORECASE)
+                rows.append((label, gene, float(prev.group(1)) if prev else np.nan))
+    return rows
+
+
+def as_rows(presence):
+    return list(zip(presence['Row'], presence['Gene'].astype(str), presence['Prevalence']))
+
+
+def assert_same_rows(new, old):
+    assert [r[:2] for r in new] == [r[:2] for r in old]
+    np.testing.assert_allclose([r[2] for r in new], [r[2] for r in old])
+
+
+def test_presence_matches_old_loop_on_samples():
+    assert_same_rows(as_rows(gene_presence(TEXTS)), old_gene_rows(TEXTS))
+
+
+def test_presence_matches_old_loop_on_dataset_2():
+    path = os.path.join(RAW_DIR, 'dataset_2_molecular.csv')
+    if not os.path.exists(path):
+        pytest.skip("dataset_2_molecular.csv not bundled")
+    texts = pd.read_csv(path)['Resistance Mechanism/Gene Detected']
+    assert_same_rows(as_rows(gene_presence(texts)), old_gene_rows(texts))
+
+
+def test_mentions_have_spans_and_prevalence():
+    assert find_genes('TEM (29.58%), NDM-1 (14.47%)') == [Mention('TEM', 29.58, (0, 3)),
+                                                           Mention('NDM', 14.47, (14, 17))]
+    assert [m.gene for m in find_genes('important, temporary')] == []
+    assert find_genes(float('nan')) == [] and find_genes('Not in source') == []
+
+
+def test_match_genes_repeats_rows_per_mention():
+    texts = pd.Series(['NDM, TEM', None, 'NDM, TEM'], index=[10, 11, 12])
+    mentions = match_genes(texts)
+    assert mentions['Row'].tolist() == [10, 10, 12, 12]
+    assert mentions['Gene'].astype(str).tolist() == ['NDM', 'TEM', 'NDM', 'TEM']
+    assert mentions['Prevalence'].isna().all()
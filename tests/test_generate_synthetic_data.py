@@ -0,0 +1,125 @@
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_cache import BASE_DIR
+
+generator = importlib.import_module('00_generate_synthetic_data')
+
+
+def test_default_run_reproduces_the_tracked_dataset(tmp_path):
+    out = tmp_path / 'synthetic.csv'
+    generator.generate_synthetic_icmr_data(out_path=str(out))
+    with open(os.path.join(BASE_DIR, generator.OUT_PATH), 'rb') as tracked:
+        assert out.read_bytes() == tracked.read()
+    df = pd.read_csv(out)
+    assert list(df.columns) == generator.COLUMNS
+    assert len(df) == 840
+    assert df['Year'].unique().tolist() == generator.YEARS
+    assert df['Center_Name'].unique().tolist() == generator.CENTERS
+    assert (df['Resistant_Isolates'] <= df['Total_Isolates']).all()
+    assert df['Resistance_Percentage'].between(0, 100).all()
+
+
+def test_centers_and_years_scale_the_output(tmp_path):
+    out = tmp_path / 'scaled.parquet'
+    # Small blocks so the Parquet file gets several row groups
+    generator.generate_synthetic_icmr_data(n_centers=30, years=generator.parse_years('2010-2012'),
+                                           out_path=str(out), chunk_centers=8)
+    df = pd.read_parquet(out)
+    assert len(df) == 30 * 3 * 30
+    assert df['Center_Name'].nunique() == 30
+    assert df['Center_Name'].iloc[-1] == 'Synthetic Hospital 30, Vellore'
+    assert df['Year'].unique().tolist() == [2010, 2011, 2012]
+
+
+def test_parquet_and_csv_hold_the_same_records(tmp_path):
+    generator.generate_synthetic_icmr_data(n_centers=20, out_path=str(tmp_path / 'r.csv'), chunk_centers=7)
+    generator.generate_synthetic_icmr_data(n_centers=20, out_path=str(tmp_path / 'r.parquet'), chunk_centers=7)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'r.csv'), pd.read_parquet(tmp_path / 'r.parquet'),
+                                  check_dtype=False)
+
+
+def test_legacy_draws_do_not_depend_on_block_size():
+    whole = pd.concat(generator.iter_blocks(), ignore_index=True)
+    pd.testing.assert_frame_equal(pd.concat(generator.iter_blocks(chunk_centers=5), ignore_index=True), whole,
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_no_centers_writes_nothing(tmp_path):
+    out = tmp_path / 'empty.csv'
+    out.write_text('previous\n')
+    assert generator.write_blocks(generator.iter_blocks(n_centers=0), str(out)) == 0
+    generator.generate_synthetic_icmr_data(n_centers=0, out_path=str(tmp_path / 'none.parquet'))
+    assert out.read_text() == 'previous\n'
+    assert os.listdir(tmp_path) == ['empty.csv']
+
+
+@pytest.mark.parametrize('text, years', [('2022,2023', [2022, 2023]), ('2010-2013', [2010, 2011, 2012, 2013])])
+def test_parse_years(text, years):
+    assert generator.parse_years(text) == years
+
+
+def test_mic_breakpoints_are_ladder_values():
+    for group in generator.BREAKPOINTS.values():
+        for abx, (s_bp, r_bp) in group.items():
+            if generator.AST_TESTS[abx][1] == 'NM':
+                assert s_bp in generator.MIC_LADDER and r_bp in generator.MIC_LADDER, abx
+
+
+def test_interpret_ast_calls():
+    mic = generator.interpret_ast([0.5, 2, 4, np.nan], 'NM', 1, 4)
+    assert list(mic[:3]) == ['S', 'I', 'R'] and pd.isna(mic[3])
+    zone = generator.interpret_ast([30, 24, 21], 'ND5', 26, 21)
+    assert list(zone) == ['S', 'I', 'R']
+    # Penicillin's breakpoints are adjacent dilutions, so no MIC on the ladder is called I
+    _, calls = generator._levels('NM', *generator.BREAKPOINTS['positive']['Penicillin'])
+    assert 'I' not in set(calls)
+
+
+def test_ast_values_follow_the_resistance_rate():
+    rng = np.random.default_rng(0)
+    u = rng.uniform(size=200_000)
+    rate = np.full(len(u), 0.3)
+    values = generator.ast_values(u, rate, 'NM', 1, 4)
+    calls = pd.Series(generator.interpret_ast(values, 'NM', 1, 4))
+    assert calls.eq('R').mean() == pytest.approx(0.3, abs=0.01)
+    assert calls.eq('I').mean() == pytest.approx(generator.I_SHARE, abs=0.01)
+    assert np.isin(values, generator.MIC_LADDER).all()
+
+
+def test_isolate_mode_matches_the_aggregate_records(tmp_path):
+    out = tmp_path / 'isolates.parquet'
+    generator.generate_synthetic_icmr_data(n_centers=3, out_path=str(out), isolates=True, chunk_rows=2_000)
+    isolates = pd.read_parquet(out)
+    records = pd.concat(generator.iter_blocks(n_centers=3))
+    cells = records.drop_duplicates(['Year', 'Center_Name', 'Pathogen'])
+
+    assert len(isolates) == cells['Total_Isolates'].sum()
+    assert isolates['Isolate_ID'].tolist() == list(range(1, len(isolates) + 1))
+    for abx, (code, method) in generator.AST_TESTS.items():
+        assert f'{code}_{method}' in isolates and f'{code}_SIR' in isolates
+    # Gram-negative isolates have no penicillin result, Gram-positive ones no colistin
+    positive = isolates['Pathogen'].isin(generator.GRAM_POSITIVE)
+    assert isolates.loc[~positive, 'PEN_NM'].isna().all() and isolates.loc[positive, 'PEN_NM'].notna().all()
+    assert isolates.loc[positive, 'COL_NM'].isna().all() and isolates.loc[~positive, 'COL_NM'].notna().all()
+    assert not isolates['PEN_SIR'].eq('I').any()
+
+    # The resistant share tracks tracks its aggregate record's rate
+    ecoli = isolates['Pathogen'].eq('Escherichia coli')
+    observed = isolates.loc[ecoli, 'MEM_SIR'].eq('R').mean()
+    expected = records.loc[records['Pathogen'].eq('Escherichia coli') & records['Antibiotic'].eq('Meropenem')]
+    expected = np.average(expected['Resistance_Percentage'] / 100, weights=expected['Total_Isolates'])
+    assert observed == pytest.approx(expected, abs=0.03)
+
+
+def test_isolate_batches_are_bounded_and_reproducible():
+    batches = list(generator.iter_isolates(n_centers=2, years=[2022], chunk_rows=1_000))
+    assert len(batches) > 1
+    # Whole cells per batch, so a batch overshoots chunk_rows by at most one cell
+    largest_cell = pd.concat(generator.iter_blocks(n_centers=2, years=[2022]))['Total_Isolates'].max()
+    assert all(len(b) < 1_000 + largest_cell for b in batches)
+    again = list(generator.iter_isolates(n_centers=2, years=[2022], chunk_rows=1_000))
+    pd.testing.assert_frame_equal(pd.concat(batches), pd.concat(again))
@@ -0,0 +1,131 @@
+"""Batched ITS fits against statsmodels, one series at a time."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from its_engine import (ITS_TERMS, _ar1_transform, candidate_years, fit_its_batch, fit_its_series, its_design, permutation_null,
+                        newey_west_lags, placebo_permutation_test, segment_supported)
+
+YEARS = np.arange(2010, 2023)
+
+
+def series(n_series, seed=0, years=YEARS):
+    rng = np.random.default_rng(seed)
+    X = its_design(years)
+    beta = rng.normal([40, 1, -3, -0.5], [5, 0.5, 2, 0.5], size=(n_series, 4))
+    return X @ beta.T + rng.normal(scale=2, size=(len(years), n_series))
+
+
+def assert_matches(fit, reference, col):
+    np.testing.assert_allclose([fit[t][col] for t in ITS_TERMS], reference.params, rtol=1e-8, atol=1e-8)
+    np.testing.assert_allclose([fit[f'{t}_se'][col] for t in ITS_TERMS], reference.bse, rtol=1e-8)
+    np.testing.assert_allclose([fit[f'{t}_pval'][col] for t in ITS_TERMS], reference.pvalues, rtol=1e-6)
+    ci = reference.conf_int()
+    np.testing.assert_allclose([fit[f'{t}_ci_lower'][col] for t in ITS_TERMS], ci[:, 0], rtol=1e-8)
+    np.testing.assert_allclose([fit[f'{t}_ci_upper'][col] for t in ITS_TERMS], ci[:, 1], rtol=1e-8)
+
+
+def test_ols_matches_statsmodels():
+    Y = series(5)
+    fit = fit_its_batch(YEARS, Y)
+    X = its_design(YEARS)
+    for j in range(Y.shape[1]):
+        ols = sm.OLS(Y[:, j], X).fit()
+        assert_matches(fit, ols, j)
+        assert fit['r_squared'][j] == pytest.approx(ols.rsquared)
+        assert fit['durbin_watson'][j] == pytest.approx(sm.stats.durbin_watson(ols.resid))
+
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_rank_deficient_design_uses_minimum_norm_solution():
+    years = np.arange(2016, 2022)
+    Y = series(2, years=years)
+    fit = fit_its_batch(years, Y)
+    ols = sm.OLS(Y[:, 1], its_design(years)).fit()
+    np.testing.assert_allclose([fit[t][1] for t in ITS_TERMS], ols.params, atol=1e-8)
+
+
+def test_fit_its_series_groups_by_observed_years():
+    Y = series(3)
+    long = pd.DataFrame({'Series': np.repeat(['a', 'b', 'c'], len(YEARS)), 'Year': np.tile(YEARS, 3),
+                         'Mean_Resistance': Y.T.ravel()})
+    # Series 'b' misses two years, so it is fitted on its own design
+    long = long[~((long['Series'] == 'b') & long['Year'].isin([2012, 2019]))]
+    short = pd.DataFrame({'Series': 'd', 'Year': YEARS[:3], 'Mean_Resistance': 1.0})
+    fits = fit_its_series(pd.concat([long, short]), 'Series')
+    assert fits['Series'].tolist() == ['a', 'b', 'c']
+    for row in fits.itertuples():
+        part = long[long['Series'] == row.Series]
+        ols = sm.OLS(part['Mean_Resistance'].to_numpy(), its_design(part['Year'].to_numpy())).fit()
+        np.testing.assert_allclose([getattr(row, t) for t in ITS_TERMS], ols.params, rtol=1e-8)
+        assert row.n_years == len(part)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        fit_its_batch(YEARS, series(1), method='gls')
+
+
+def test_candidate_years_leave_two_years_each_side():
+    years = np.array([2015, 2016, 2017, 2018, 2019, 2020])
+    assert candidate_years(years).tolist() == [2017, 2018, 2019]
+    assert segment_supported(years, [2016, 2017, 2019, 2020, 2030]).tolist() == [False, True, True, False, False]
+
+
+def test_placebo_scan_refits_every_candidate_year():
+    y = series(1)[:, 0]
+    scan, null = placebo_permutation_test(YEARS, y, intervention_year=2016, n_permutations=500, n_jobs=1)
+    assert scan['intervention_year'].tolist() == candidate_years(YEARS).tolist()
+    for row in scan.itertuples():
+        assert row.slope_change == pytest.approx(fit_its_batch(YEARS, y, row.intervention_year)['slope_change'][0])
+    assert list(null.columns) == scan['intervention_year'].tolist() and len(null) == 500
+    assert ((scan['perm_pval'] > 0) & (scan['perm_pval'] <= 1)).all()
+    assert 0 < scan.attrs['placebo_pval'] <= 1
+
+
+def test_unsupported_actual_year_is_flagged():
+    years = np.arange(2015, 2022)
+    y = series(1, years=years)[:, 0]
+    scan, null = placebo_permutation_test(years, y, intervention_year=2016, n_permutations=200, n_jobs=1)
+    actual = scan[scan['is_actual']].iloc[0]
+    assert not actual['supported'] and np.isnan(actual['perm_pval'])
+    assert np.isnan(scan.attrs['placebo_pval'])
+    assert 2016 not in null.columns
+
+
+def test_permutation_null_does_not_depend_on_workers():
+    y = series(1)[:, 0]
+    serial = permutation_null(YEARS, y, [2016, 2018], n_permutations=900, n_jobs=1, chunk_size=200)
+    pooled = permutation_null(YEARS, y, [2016, 2018], n_permutations=900, n_jobs=2, chunk_size=200)
+    np.testing.assert_array_equal(serial, pooled)
+    assert serial.shape == (900, 2)
+
+
+@pytest.mark.parametrize('maxlags', [None, 1, 3])
+def test_hac_matches_statsmodels(maxlags):
+    Y = series(4, seed=3)
+    fit = fit_its_batch(YEARS, Y, method='hac', maxlags=maxlags)
+    lags = newey_west_lags(len(YEARS)) if maxlags is None else maxlags
+    X = its_design(YEARS)
+    for j in range(Y.shape[1]):
+        hac = sm.OLS(Y[:, j], X).fit(cov_type='HAC', cov_kwds={'maxlags': lags, 'use_correction': True})
+        assert_matches(fit, hac, j)
+
+
+def test_prais_winsten_reaches_its_fixed_point():
+    rng = np.random.default_rng(5)
+    X = its_design(YEARS)
+    noise = np.zeros((len(YEARS), 3))
+    for t in range(1, len(YEARS)):
+        noise[t] = 0.6 * noise[t - 1] + rng.normal(size=3)
+    Y = X @ np.array([[40, 1, -3, -0.5]] * 3).T + noise
+    fit = fit_its_batch(YEARS, Y, method='prais_winsten')
+    for j in range(Y.shape[1]):
+        beta = np.array([fit[t][j] for t in ITS_TERMS])
+        resid = Y[:, j] - X @ beta
+        # rho is the AR(1) coefficient of the residuals of its own fit ...
+        assert fit['rho'][j] == pytest.approx((resid[1:] @ resid[:-1]) / (resid[:-1] @ resid[:-1]), abs=1e-6)
+        # ... and the fit is OLS on the series transformed with that rho
+        Xs, Ys = _ar1_transform(X, Y[:, [j]], fit['rho'][[j]])
+        assert_matches(fit, sm.OLS(Ys[0], Xs[0]).fit(), j)
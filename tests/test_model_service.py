@@ -0,0 +1,61 @@
+"""Model serving: one-hot encoding against the training schema, and no scores for unseen labels."""
+
+import numpy as np
+import pandas as pd
+import pytest
+import model_service
+from model_service import design_matrix, forecast_pairs, load_model, predict
+
+# The committed models may have been pickled with another scikit-learn release
+pytestmark = pytest.mark.filterwarnings('ignore::UserWarning:sklearn')
+
+FEATURES = ['Year', 'Organism (Species)_E. coli', 'Organism (Species)_K. pneumoniae', 'Region/State_North']
+
+
+def test_design_matrix_matches_get_dummies():
+    requests = pd.DataFrame({'Year': [2020.0, 2021.0, 2022.0],
+                             'Organism (Species)': ['E. coli', 'A. baumannii', 'K. pneumoniae'],
+                             'Region/State': ['North', 'South', 'North']})
+    expected = pd.get_dummies(requests, columns=['Organism (Species)', 'Region/State'], dtype=float)
+    expected = expected.reindex(columns=FEATURES, fill_value=0.0)
+    pd.testing.assert_frame_equal(design_matrix(requests, FEATURES), expected)
+
+
+def test_unseen_labels_are_not_scored():
+    model, features, levels = load_model('forecast')
+    organisms = levels['Organism (Species)']
+    requests = pd.DataFrame({'Year': 2025.0,
+                             'Organism (Species)': [organisms[0], organisms[1], 'Not in source', organisms[1]],
+                             'Region/State': ['National', levels['Region/State'][0], 'National', None]})
+    scores = predict('forecast', requests)
+    assert np.isnan(scores[2:]).all()
+    # The drop_first reference levels are known and score as the all-zero indicator row
+    np.testing.assert_allclose(scores[:2], model.predict(design_matrix(requests.iloc[:2], features)))
+    assert predict('forecast', requests.iloc[:0]).shape == (0,)
+
+
+def test_spatial_model_knows_only_its_encoded_levels():
+    requests = pd.DataFrame({'Latitude': [28.6, 28.6], 'Longitude': [77.2, 77.2],
+                             'Pathogen': ['E. coli', 'Candida auris'], 'Antibiotic_Gene': ['NDM', 'NDM']})
+    scores = predict('spatial', requests)
+    assert np.isfinite(scores[0]) and np.isnan(scores[1])
+
+
+def test_forecast_pairs_leave_unknowns_as_nan():
+    pairs = pd.DataFrame({'Center_Name': ['AIIMS, New Delhi', 'CMC, Vellore', 'Network of 39 hospitals across India',
+                                          'JIPMER'],
+                          'Pathogen': ['Escherichia coli', 'Not in source', 'Klebsiella pneumoniae',
+                                       'Staphylococcus aureus (MRSA)']})
+    result = forecast_pairs(pairs, year=2025)
+    assert result['Region'].tolist()[:2] == ['North India', 'South India'] and pd.isna(result['Region'][2])
+    assert result['Forecast'].notna().tolist() == [True, False, False, True]
+    assert result['Forecast'].dropna().between(0, 100).all()
+    assert result['Spatial_Risk'].notna().tolist() == [True, False, False, True]
+
+
+def test_models_are_loaded_once_per_file_version():
+    first = load_model('forecast')
+    assert load_model('forecast') is first
+    assert sum(1 for key in model_service._models if key[0] == 'forecast') == 1
+    with pytest.raises(KeyError):
+        load_model('unknown')
@@ -0,0 +1,53 @@
+"""Reserve-agent susceptibility from one column-wise pattern against the per-agent search loop."""
+
+import importlib
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from resistance_parser import RESERVE_AGENTS
+
+molecular = importlib.import_module('70_molecular_analysis')
+
+
+def old_susceptibility(df):
+    """Rows as the old loop built them: one re.search per row and agent."""
+    rows = []
+    for _, row in df.iterrows():
+        text = str(row['Antibiotic Susceptibility (%)'])
+        if text in ('nan', 'Not in source'):
+            continue
+        for agent in RESERVE_AGENTS:
+            match = re.search(rf'{agent}\s*[\(\[]?\s*~?\s*(\d+\.?\d*)', text, re.IGNORECASE)
+            if match:
+                rows.append({'Organism': row['Organism'], 'Year': row['Report Year'], 'Agent': agent,
+                             'Susceptibility_%': float(match.group(1))})
+    return pd.DataFrame(rows, columns=['Organism', 'Year', 'Agent', 'Susceptibility_%'])
+
+
+def generated_panels(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n):
+        agents = rng.choice(RESERVE_AGENTS, size=rng.integers(0, 5), replace=False)
+        parts = [f"{a.lower() if rng.random() < 0.2 else a} {rng.choice(['(', '[', '', '(~'])}{rng.integers(0, 1000) / 10}"
+                 for a in agents]
+        texts.append(', '.join(parts) if parts else rng.choice(['Not in source', 'none reported']))
+    return pd.DataFrame({'Organism': 'E. coli', 'Report Year': 2020, 'Antibiotic Susceptibility (%)': texts})
+
+
+def assert_same(new, old):
+    pd.testing.assert_frame_equal(new.reset_index(drop=True), old.reset_index(drop=True), check_dtype=False)
+
+
+def test_matches_old_loop_on_generated_panels():
+    df = generated_panels()
+    assert_same(molecular.extract_susceptibility_data(df), old_susceptibility(df))
+
+
+def test_matches_old_loop_on_dataset_2():
+    try:
+        df = molecular.load_and_process_data()
+    except FileNotFoundError:
+        pytest.skip("dataset_2_molecular.csv not bundled")
+    assert_same(molecular.extract_susceptibility_data(df), old_susceptibility(df))
@@ -0,0 +1,51 @@
+"""Cached parallel page extraction returns what pdfplumber/pypdf read directly."""
+
+import glob
+import os
+import pytest
+import pdf_pages
+from data_cache import BASE_DIR
+
+REPORTS = sorted(glob.glob(os.path.join(BASE_DIR, "data", "raw", "ICMR reports", "*.pdf")))
+
+pytestmark = pytest.mark.skipif(not REPORTS, reason="no ICMR report PDFs bundled")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_pages, 'PDF_CACHE_DIR', str(tmp_path / 'pdf_pages'))
+    return tmp_path / 'pdf_pages'
+
+
+def test_parallel_pages_match_pdfplumber():
+    import pdfplumber
+    pages = list(range(pdf_pages.MIN_PARALLEL_PAGES + 2))
+    records = pdf_pages.extract_pages(REPORTS[0], pages, tables=True, n_jobs=2)
+    assert sorted(records) == [p for p in pages if p < pdf_pages.page_count(REPORTS[0])]
+    with pdfplumber.open(REPORTS[0]) as doc:
+        for i, record in records.items():
+            assert record['text'] == doc.pages[i].extract_text()
+            assert record['tables'] == doc.pages[i].extract_tables()
+
+
+def test_cached_pages_are_reused(cache_dir, monkeypatch):
+    first = pdf_pages.extract_pages(REPORTS[0], [0, 1], engine='pypdf')
+    assert len(list(cache_dir.rglob('*.json'))) == 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError("page was extracted again")
+
+    monkeypatch.setattr(pdf_pages, '_extract_chunk', fail)
+    assert pdf_pages.extract_pages(REPORTS[0], [0, 1], engine='pypdf') == first
+    assert pdf_pages.page_text(REPORTS[0], 1, engine='pypdf') == first[1]['text']
+
+
+def test_out_of_range_pages_and_engine_checks():
+    n = pdf_pages.page_count(REPORTS[0])
+    assert pdf_pages.extract_pages(REPORTS[0], [n, -1], engine='pypdf') == {}
+    with pytest.raises(IndexError):
+        pdf_pages.page_text(REPORTS[0], n)
+    with pytest.raises(ValueError):
+        pdf_pages.extract_pages(REPORTS[0], [0], engine='pypdf', tables=True)
+    with pytest.raises(ValueError):
+        pdf_pages.extract_pages(REPORTS[0], [0], engine='ocr')
@@ -0,0 +1,77 @@
+"""Normalizing RC tables from the store, selected by caption and column labels."""
+
+import importlib
+import os
+import pandas as pd
+import data_cache
+import pdf_pages
+import report_index
+from report_tables import table_to_long
+
+process = importlib.import_module('05_process_extracted_data')
+
+SPECS = {spec['pathogen']: spec for spec in process.TABLE_SPECS}
+
+MRSA_TABLE = [
+    ['RC/Antibiotics', 'Erythromycin', 'Cefoxitin\n(n)', 'Oxacillin'],
+    ['RC1', '100 (40.0)', '343 / 589 (58.2)', '12'],
+    ['RC2', '80 (30.0)', '20 / 100 (20.0)', '8'],
+    ['RC3', '50 (10.0)', '-', '4'],
+]
+MRSA_CONTINUED = [
+    ['RC/Antibiotics', 'Erythromycin', 'Cefoxitin\n(n)', 'Oxacillin'],
+    ['RC13', '10 (1.0)', '5 / 10 (50.0)', '1'],
+    ['RC14', '10 (2.0)', '6 / 10 (60.0)', '1'],
+    ['RC15', '10 (3.0)', '7 / 10 (70.0)', '1'],
+]
+GENE_TABLE = [
+    ['Regional Centers', 'CTXM15', 'OXA48', 'NDM'],
+    ['RC1', '55%', '30%', '120%'],
+    ['RC2', '40%', None, '10%'],
+    ['RC4', '20%', '15%', '5%'],
+]
+
+
+def store():
+    parts = [
+        table_to_long(MRSA_TABLE, 'r.pdf', 149, 0, 'Table 7.2: Staphylococcus aureus susceptibility'),
+        table_to_long(MRSA_CONTINUED, 'r.pdf', 150, 0, None),
+        table_to_long(GENE_TABLE, 'r.pdf', 94, 0, 'Table 5.4: Resistance genes in E. coli'),
+        # Gene columns, but captioned for another pathogen
+        table_to_long(GENE_TABLE, 'r.pdf', 97, 0, 'Table 5.6: Resistance genes in Klebsiella pneumoniae'),
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def test_tables_are_selected_by_caption_and_content():
+    tables = process.table_catalog(store())
+    keys = {name: sorted(process.select_tables(tables, spec)['Page']) for name, spec in SPECS.items()}
+    assert keys == {'S. aureus': [149, 150], 'E. coli': [94], 'K. pneumoniae': [97]}
+
+
+def test_mrsa_rows_take_the_bracketed_cefoxitin_value():
+    rows = store()
+    out = process.normalize_rc_table(rows[rows['Page'] == 149], SPECS['S. aureus'])
+    assert out.to_dict('records') == [
+        {'RC_Code': 'RC1', 'Pathogen': 'S. aureus', 'Antibiotic_Gene': 'MRSA (Phenotypic)', 'Resistance_Percentage': 58.2},
+        {'RC_Code': 'RC2', 'Pathogen': 'S. aureus', 'Antibiotic_Gene': 'MRSA (Phenotypic)', 'Resistance_Percentage': 20.0},
+    ]
+
+
+def test_gene_columns_keep_their_labels_and_are_capped():
+    rows = store()
+    out = process.normalize_rc_table(rows[rows['Page'] == 94], SPECS['E. coli'])
+    assert out.groupby('RC_Code').size().to_dict() == {'RC1': 3, 'RC2': 2, 'RC4': 3}
+    rc1 = out[out['RC_Code'] == 'RC1'].set_index('Antibiotic_Gene')['Resistance_Percentage']
+    assert rc1.to_dict() == {'CTXM15': 55.0, 'OXA48': 30.0, 'NDM': 100.0}
+
+
+def test_tracked_inputs_rebuild_amr_data_real(tmp_path, monkeypatch):
+    for module, name in [(data_cache, 'CACHE_DIR'), (pdf_pages, 'PDF_CACHE_DIR'), (report_index, 'INDEX_DIR')]:
+        monkeypatch.setattr(module, name, str(tmp_path / name))
+    # No store yet: 05 builds it from the report archive and the tracked 2022 page dumps
+    out_path = tmp_path / 'amr_data_real.csv'
+    process.process_extracted_data(store_path=str(tmp_path / 'store.csv'), out_path=str(out_path))
+    tracked = pd.read_csv(os.path.join(data_cache.BASE_DIR, process.OUT_PATH))
+    pd.testing.assert_frame_equal(pd.read_csv(out_path), tracked)
+    assert len(tracked) == 380
@@ -0,0 +1,95 @@
+"""Boolean, phrase, proximity and prefix queries against a brute-force scan of the page text."""
+
+import os
+import numpy as np
+import pytest
+import report_index
+from report_index import _Parser, tokenize
+
+PAGES = {
+    0: "Table 3.1: Regional centres and participating sites",
+    1: "Annexure I lists the participating centre of each region",
+    2: "Table 4: Centre wise resistance of E. coli at each site",
+    3: "Resistance of Klebsiella pneumoniae; no table on this page",
+    4: "",
+}
+
+
+def make_index(pages):
+    """In-memory index with the layout build_report_index writes."""
+    postings = {}
+    for page, text in pages.items():
+        for pos, token in enumerate(tokenize(text)):
+            postings.setdefault(token, {}).setdefault(page, []).append(pos)
+    postings = {t: {p: np.array(v, dtype=np.int32) for p, v in by_page.items()} for t, by_page in postings.items()}
+    return {'report': 'test.pdf', 'pages': sorted(pages), 'postings': postings, 'vocabulary': sorted(postings)}
+
+
+def query(text):
+    return sorted(_Parser(make_index(PAGES), text).parse())
+
+
+def pages_where(predicate):
+    return sorted(p for p, text in PAGES.items() if predicate(tokenize(text)))
+
+
+def within(tokens, a, b, distance):
+    pos_a = [i for i, t in enumerate(tokens) if t == a]
+    pos_b = [i for i, t in enumerate(tokens) if t == b]
+    return any(abs(i - j) <= distance for i in pos_a for j in pos_b)
+
+
+def test_boolean_operators():
+    assert query('table AND centre') == pages_where(lambda t: 'table' in t and 'centre' in t)
+    assert query('table centre') == query('table AND centre')
+    assert query('annexure OR klebsiella') == pages_where(lambda t: 'annexure' in t or 'klebsiella' in t)
+    assert query('NOT table') == pages_where(lambda t: 'table' not in t)
+    assert query('resistance AND (coli OR pneumoniae) AND NOT site') == pages_where(
+        lambda t: 'resistance' in t and ('coli' in t or 'pneumoniae' in t) and 'site' not in t)
+
+
+def test_phrase_near_and_prefix():
+    assert query('"participating sites"') == [0]
+    assert query('"sites participating"') == []
+    assert query('table NEAR/2 centre') == pages_where(lambda t: within(t, 'table', 'centre', 2))
+    assert query('table NEAR/8 (site OR sites)') == pages_where(
+        lambda t: within(t, 'table', 'site', 8) or within(t, 'table', 'sites', 8))
+    assert query('centr*') == pages_where(lambda t: any(w.startswith('centr') for w in t))
+
+
+def test_malformed_queries_are_rejected():
+    for bad in ['table AND', '(table', 'table )', '(table OR centre) NEAR/2 region AND NOT']:
+        with pytest.raises(ValueError):
+            query(bad)
+    with pytest.raises(ValueError):
+        query('(table AND centre) NEAR/2 resistance')
+
+
+def test_search_report_matches_page_text(tmp_path, monkeypatch):
+    reports = report_index.report_paths()
+    if not reports:
+        pytest.skip("no ICMR report PDFs bundled")
+    monkeypatch.setattr(report_index, 'INDEX_DIR', str(tmp_path))
+    texts = report_index.extract_pages(reports[0], engine='pypdf')
+    for term in ['resistance', 'annexure']:
+        expected = sorted(p for p, r in texts.items() if term in tokenize(r['text']))
+        assert report_index.search_report(reports[0], term) == expected
+
+
+def test_index_with_failed_pages_is_not_saved(tmp_path, monkeypatch):
+    pdf = tmp_path / 'report.pdf'
+    pdf.write_bytes(b'%PDF-1.4 stand-in')
+    pages = {0: {'page': 0, 'text': 'Table of regional centres', 'tables': None},
+             1: {'page': 1, 'text': None, 'tables': None, 'error': 'broken stream'}}
+    monkeypatch.setattr(report_index, 'INDEX_DIR', str(tmp_path / 'index'))
+    monkeypatch.setattr(report_index, 'extract_pages', lambda path, engine: dict(pages))
+
+    assert report_index.build_report_index(str(pdf)) is None
+    assert not (tmp_path / 'index').exists()
+    assert report_index.search_report(str(pdf), 'table') == [0]
+
+    # Once the page extracts, the full index is saved
+    pages[1] = {'page': 1, 'text': 'Table annexure', 'tables': None}
+    path = report_index.build_report_index(str(pdf))
+    assert os.path.exists(path)
+    assert report_index.search_report(str(pdf), 'table') == [0, 1]
@@ -0,0 +1,68 @@
+"""RC-keyed table detection and the long, typed table store."""
+
+import pandas as pd
+import pytest
+import report_tables
+from report_tables import RC_QUERY, column_labels, is_rc_table, rc_codes, table_cells, table_frame, table_to_long
+
+TABLE = [
+    ['Centre', 'Cefoxitin\nresistance', None, 'Oxacillin'],
+    [None, 'n(%)', None, 'n(%)'],
+    ['RC1', '343 / 589 (58.2)', None, '55%'],
+    ['RC 02', '12 (4.1)', None, None],
+    [None, 'RC-12', '7 (10)', '40 %'],
+    ['Total', '362', None, None],
+]
+
+
+def test_rc_codes_in_first_or_second_column():
+    codes = rc_codes(table_cells(TABLE))
+    assert codes.tolist()[2:5] == ['1', '2', '12']
+    assert codes[[0, 1, 5]].isna().all()
+    assert is_rc_table(TABLE) and not is_rc_table(TABLE, min_rows=4) and not is_rc_table([])
+
+
+def test_column_labels_use_the_fullest_header_row():
+    labels = column_labels(table_cells(TABLE), 2)
+    assert labels[1] == 'Cefoxitin' and labels[3] == 'Oxacillin'
+    # Spanned header: the empty column takes the nearest label
+    assert labels[2] in ('Cefoxitin', 'Oxacillin')
+
+
+def test_table_to_long_types_values():
+    long = table_to_long(TABLE, 'report.pdf', page=5, table_index=1, caption='Table 2: S. aureus')
+    assert set(long['RC_Code']) == {'RC1', 'RC2', 'RC12'}
+    row = long[(long['RC_Code'] == 'RC1') & (long['Column_Index'] == 1)].iloc[0]
+    assert (row['Number'], row['Percentage'], row['Column_Label']) == (343.0, 58.2, 'Cefoxitin')
+    assert long.loc[(long['RC_Code'] == 'RC1') & (long['Column_Index'] == 3), 'Percentage'].item() == 55.0
+    # The shifted code cell is not a value; the value next to it is
+    shifted = long[long['RC_Code'] == 'RC12']
+    assert shifted['Raw_Value'].tolist() == ['7 (10)', '40 %']
+    assert shifted['Percentage'].tolist() == [10.0, 40.0]
+    assert 'Total' not in long['Raw_Value'].tolist()
+
+
+def test_table_frame_round_trip():
+    store = table_to_long(TABLE, 'report.pdf', page=5, table_index=1)
+    wide = table_frame(store, 'report.pdf', 5, 1)
+    assert wide.index.tolist() == ['RC1', 'RC2', 'RC12']
+    assert wide.columns[0] == 'Cefoxitin' and wide.iloc[0, 0] == '343 / 589 (58.2)'
+
+
+def test_rc_query_covers_the_code_spellings():
+    for number in ['1', '01', '12', '30']:
+        assert f'rc{number}' in RC_QUERY and f'"rc {number}"' in RC_QUERY
+
+
+def test_build_store_on_bundled_reports(tmp_path):
+    reports = report_tables.report_paths()
+    if not reports:
+        pytest.skip("no ICMR report PDFs bundled")
+    store = report_tables.build_table_store(reports[:1], n_jobs=1, out_path=str(tmp_path / 'store.csv'))
+    assert list(store.columns) == report_tables.STORE_COLUMNS
+    assert store['RC_Code'].astype(str).str.match(r'^RC\d+$').all()
+    reloaded = report_tables.load_table_store(str(tmp_path / 'store.csv'))
+    assert len(reloaded) == len(store)
+    if len(store):
+        assert (store['Report_Year'].dropna() > 2000).all()
+        assert isinstance(store['Caption'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,118 @@
+"""Parity of the vectorized parser with the per-row helpers it replaced."""
+
+import os
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from data_cache import BASE_DIR
+from resistance_parser import (extract_agent_values, extract_drug_percentage, extract_first_number,
+                               missing_mask, parse_resistance_strings)
+
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+
+SAMPLES = pd.Series([
+    '35% Susceptible', '91.0% Resistant', '37% (Imipenem)', '14% (Imipenem), 20% Amikacin',
+    '25% Meropenem', '62 r', '40 s', 'sensitive in 80%', 'Not in source', 'NA', '', None,
+    'no data', '12.5', '99% resistant, 1% susceptible',
+])
+
+
+# Helpers removed from 08, 12 and 50 (kept here as the reference behaviour)
+def old_parse_resistance(val):
+    val = str(val).lower()
+    if 'not in source' in val:
+        return None, None
+    match = re.search(r'(\d+\.?\d*)', val)
+    if match:
+        num = float(match.group(1))
+        is_susceptible = 'susceptible' in val or ' s ' in val or val.endswith(' s') or 'sensitive' in val
+        is_resistant = 'resistant' in val or ' r ' in val or val.endswith(' r')
+        if is_susceptible:
+            return 100 - num, 'Calculated (100-S)'
+        elif is_resistant:
+            return num, 'Direct (R)'
+        return None, 'Ambiguous'
+    return None, 'No Number'
+
+
+def old_clean_percentage(x):
+    if pd.isna(x) or str(x).lower().strip() in ['not in source', 'na', 'nan', '']:
+        return None
+    match = re.search(r'(\d+\.?\d*)', str(x))
+    return float(match.group(1)) if match else None
+
+
+def old_parse_res(val):
+    if pd.isna(val) or 'Not in source' in str(val):
+        return None
+    val_str = str(val).lower()
+    for drug in ['imipenem', 'meropenem', 'ertapenem', 'carbapenem']:
+        if drug in val_str:
+            m = re.search(r'(\d+\.?\d*)%?\s*[\(-]?\s*' + drug, val_str)
+            if m:
+                return float(m.group(1))
+    m = re.search(r'^(\d+\.?\d*)%', str(val))
+    return float(m.group(1)) if m else None
+
+
+def as_float(values):
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def raw_column(filename, column):
+    path = os.path.join(RAW_DIR, filename)
+    if not os.path.exists(path):
+        pytest.skip(f"{filename} not bundled")
+    return pd.read_csv(path)[column]
+
+
+@pytest.mark.parametrize('series', [
+    SAMPLES,
+    pytest.param(None, id='dataset_1'),
+])
+def test_parse_resistance_matches_old_helper(series):
+    if series is None:
+        series = raw_column('dataset_1_epidemiology.csv', 'Resistance/Susceptibility Percentage')
+    parsed = parse_resistance_strings(series)
+    old = [old_parse_resistance(v) for v in series]
+    # The old helper read empty and 'NA' cells as text; the parser calls them missing
+    text = series.astype('string').str.strip().str.lower()
+    present = ~(text.isna() | text.isin(['', 'na', 'nan'])).to_numpy(dtype=bool)
+    np.testing.assert_allclose(parsed['Resistance_Pct'].to_numpy()[present], as_float([o[0] for o in old])[present])
+    types = parsed['Value_Type'].astype(object).where(parsed['Value_Type'].notna(), None).to_numpy()[present]
+    assert list(types) == [o[1] for o in np.array(old, dtype=object)[present]]
+
+
+def test_first_number_matches_clean_percentage():
+    series = pd.concat([SAMPLES, raw_column('dataset_3_granular.csv', 'Resistance_Percentage')], ignore_index=True)
+    np.testing.assert_allclose(extract_first_number(series).to_numpy(),
+                               as_float([old_clean_percentage(v) for v in series]))
+
+
+def test_drug_percentage_matches_old_parse_res():
+    series = pd.concat([SAMPLES, raw_column('dataset_3_granular.csv', 'Resistance_Percentage')], ignore_index=True)
+    np.testing.assert_allclose(extract_drug_percentage(series).to_numpy(),
+                               as_float([old_parse_res(v) for v in series]))
+
+
+def test_ambiguous_and_priority_options():
+    series = pd.Series(['12.5', '99% resistant, 1% susceptible'])
+    assert np.isnan(parse_resistance_strings(series)['Resistance_Pct'][0])
+    assert parse_resistance_strings(series, ambiguous='direct')['Resistance_Pct'][0] == 12.5
+    assert parse_resistance_strings(series)['Resistance_Pct'][1] == 1.0
+    assert parse_resistance_strings(series, priority='resistant')['Resistance_Pct'][1] == 99.0
+
+
+def test_missing_and_drug_context():
+    assert missing_mask(SAMPLES).tolist()[8:12] == [True, True, True, True]
+    context = parse_resistance_strings(SAMPLES)['Drug_Context']
+    assert context[2] == 'Imipenem' and context[4] == 'Meropenem' and pd.isna(context[0])
+
+
+def test_agent_values_prefer_longest_name():
+    values = extract_agent_values(pd.Series(['Colistin (99.8), Minocycline (~70)', 'Ampicillin-sulbactam 40',
+                                             None]))
+    assert values.loc[0, 'Colistin'] == 99.8 and values.loc[0, 'Minocycline'] == 70
+    assert values.loc[1, 'Ampicillin-sulbactam'] == 40 and np.isnan(values.loc[1, 'Ampicillin'])
+    assert values.loc[2].isna().all()
@@ -0,0 +1,62 @@
+"""Stage graph, change detection and scheduling of the pipeline runner."""
+
+import pytest
+import run_pipeline
+
+
+def stage(name, inputs=(), outputs=()):
+    return {'name': name, 'script': f"{name}.py", 'inputs': list(inputs), 'outputs': list(outputs)}
+
+
+def test_declared_stages_form_a_dag():
+    deps = run_pipeline.resolve_dependencies(run_pipeline.STAGES)
+    assert '05_process_extracted_data' in deps['06_train_spatial_model']
+    assert 'report_tables' in deps['05_process_extracted_data']
+    done = set()
+    while len(done) < len(deps):
+        ready = {n for n, ds in deps.items() if n not in done and set(ds) <= done}
+        assert ready, f"cycle among {set(deps) - done}"
+        done |= ready
+
+
+def test_local_modules_follow_imports():
+    modules = run_pipeline.local_modules('09_ml_prediction_new.py')
+    assert {'resistance_parser.py', 'data_cache.py'} <= set(modules)
+
+
+def test_stage_hash_follows_inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_pipeline, 'BASE_DIR', str(tmp_path))
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'a.csv').write_text("x\n1\n")
+    s = stage('09_ml_prediction_new', inputs=['data/*.csv'])
+    first = run_pipeline.stage_hash(s)
+    assert run_pipeline.stage_hash(s) == first
+    (tmp_path / 'data' / 'b.csv').write_text("x\n2\n")
+    assert run_pipeline.input_files('data/*.csv') == ['data/a.csv', 'data/b.csv']
+    assert run_pipeline.stage_hash(s) != first
+
+
+def test_select_stages_by_prefix():
+    stages = [stage('06_train'), stage('50_its'), stage('51_its_plots')]
+    assert [s['name'] for s in run_pipeline.select_stages(stages, ['5'])] == ['50_its', '51_its_plots']
+    with pytest.raises(SystemExit):
+        run_pipeline.select_stages(stages, ['99'])
+
+
+def test_run_pipeline_orders_stages_and_blocks_after_failure(monkeypatch, tmp_path):
+    stages = [stage('a', outputs=['a.out']), stage('b', inputs=['a.out'], outputs=['b.out']),
+              stage('c', inputs=['b.out']), stage('d', outputs=['d.out']), stage('e', inputs=['d.out'])]
+    finished = []
+
+    def fake_run(s, state, force=False, dry_run=False):
+        assert all(p in finished for p in run_pipeline.resolve_dependencies(stages)[s['name']])
+        finished.append(s['name'])
+        return ("failed (exit 1)" if s['name'] == 'd' else "ran"), 0.0, s['name']
+
+    monkeypatch.setattr(run_pipeline, 'STAGES', stages)
+    monkeypatch.setattr(run_pipeline, 'STATE_PATH', str(tmp_path / 'state.json'))
+    monkeypatch.setattr(run_pipeline, 'run_stage', fake_run)
+    results = run_pipeline.run_pipeline(jobs=2)
+    assert sorted(finished) == ['a', 'b', 'c', 'd']
+    assert results['e'][0] == "blocked (upstream failed)"
+    assert run_pipeline.load_state() == {'a': 'a', 'b': 'b', 'c': 'c'}
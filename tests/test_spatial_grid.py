@@ -0,0 +1,52 @@
+"""Batched grid inference against the per-point loop it replaced."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from spatial_grid import build_grid_features, data_markers, make_grid_axes, marker_columns, predict_grid, predict_marker_grids
+
+FEATURES = ['Latitude', 'Longitude', 'Pathogen_E. coli', 'Pathogen_S. aureus', 'Antibiotic_Gene_NDM']
+
+
+@pytest.fixture(scope='module')
+def model():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((200, len(FEATURES))), columns=FEATURES)
+    X[FEATURES[2:]] = (X[FEATURES[2:]] > 0.5).astype(float)
+    X[['Latitude', 'Longitude']] = X[['Latitude', 'Longitude']] * 30 + [8, 68]
+    y = X['Latitude'] + 20 * X['Pathogen_E. coli'] + rng.normal(size=len(X))
+    return RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+
+
+def test_grid_matches_point_loop(model):
+    lats, lons = make_grid_axes(7, 5)
+    grid = predict_grid(model, FEATURES, lats, lons, pathogen='E. coli', gene='NDM', batch_size=4)
+    rows = [{'Latitude': la, 'Longitude': lo, 'Pathogen_E. coli': 1.0, 'Pathogen_S. aureus': 0.0,
+             'Antibiotic_Gene_NDM': 1.0} for la in lats for lo in lons]
+    expected = model.predict(pd.DataFrame(rows, columns=FEATURES))
+    np.testing.assert_allclose(grid['Predicted_Resistance'], expected)
+    assert grid[['Latitude', 'Longitude']].to_numpy().tolist() == [[r['Latitude'], r['Longitude']] for r in rows]
+
+
+def test_batch_size_does_not_change_predictions(model):
+    lats, lons = make_grid_axes(9)
+    small = predict_grid(model, FEATURES, lats, lons, pathogen='S. aureus', batch_size=7)
+    whole = predict_grid(model, FEATURES, lats, lons, pathogen='S. aureus')
+    pd.testing.assert_frame_equal(small, whole)
+
+
+def test_unknown_marker_columns_are_ignored():
+    assert marker_columns(FEATURES, 'E. coli', 'OXA-48') == ['Pathogen_E. coli']
+    X = build_grid_features(FEATURES, np.array([10.0]), np.array([70.0]), ['Antibiotic_Gene_NDM'])
+    assert X.iloc[0].tolist() == [10.0, 70.0, 0.0, 0.0, 1.0]
+
+
+def test_marker_grids_are_tagged(model):
+    df = pd.DataFrame({'Pathogen': ['E. coli', 'E. coli', 'S. aureus'], 'Antibiotic_Gene': ['NDM', 'NDM', 'NDM']})
+    markers = data_markers(df)
+    assert markers == [('E. coli', 'NDM'), ('S. aureus', 'NDM')]
+    lats, lons = make_grid_axes(3)
+    grids = predict_marker_grids(model, FEATURES, markers, lats, lons)
+    assert len(grids) == 2 * 9 and grids.groupby('Pathogen').size().tolist() == [9, 9]
+    assert predict_marker_grids(model, FEATURES, [], lats, lons).empty
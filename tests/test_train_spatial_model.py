@@ -0,0 +1,36 @@
+"""Leave-one-center-out folds give the same scores on a process pool as in a serial loop."""
+
+import importlib
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from joblib import Parallel, delayed
+from sklearn.model_selection import LeaveOneGroupOut
+from data_cache import BASE_DIR
+
+train = importlib.import_module('06_train_spatial_model')
+
+DATA_PATH = os.path.join(BASE_DIR, "data", "processed", "amr_data_real.csv")
+
+
+@pytest.fixture(scope='module')
+def folds():
+    if not os.path.exists(DATA_PATH):
+        pytest.skip("amr_data_real.csv not built")
+    df = pd.get_dummies(pd.read_csv(DATA_PATH), columns=['Pathogen', 'Antibiotic_Gene'], drop_first=False)
+    X = df[[c for c in df.columns if c not in ['RC_Code', 'Center_Name', 'Resistance_Percentage']]]
+    y = df['Resistance_Percentage']
+    splits = list(LeaveOneGroupOut().split(X, y, df['Center_Name']))[:4]
+    return X, y, splits
+
+
+def test_pooled_folds_match_serial_loop(folds):
+    X, y, splits = folds
+    serial = [train.fit_loco_fold(X, y, tr, te) for tr, te in splits]
+    pooled = Parallel(n_jobs=2)(delayed(train.fit_loco_fold)(X, y, tr, te, 2) for tr, te in splits)
+    # Threaded forests sum their trees in no fixed order, so predictions agree to rounding only
+    for (rmse, y_true, preds), (rmse_s, y_true_s, preds_s) in zip(pooled, serial):
+        assert y_true == y_true_s
+        np.testing.assert_allclose(preds, preds_s, rtol=1e-12)
+        np.testing.assert_allclose(rmse, rmse_s, rtol=1e-12)